@@ -2,39 +2,36 @@
 
 The mass exporter writes WeiDU-style .D text files. This script extracts all
 StrRef numbers used in SAY/REPLY statements so downstream tooling can join them
-with dialog.tlk.
+with dialog.tlk. Files are parsed on a process pool by bg2vo.dparse.
 """
 from __future__ import annotations
 
+import argparse
 import csv
-import re
+import sys
 from pathlib import Path
-from typing import Iterable, Set
+from typing import Iterable, List, Set
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.dparse import Statement, parse_dir, parse_file  # type: ignore[import-not-found]
+
 INPUT_DIR = ROOT / "BG2 Files" / "Dialog Files"
 OUTPUT_DIR = ROOT / "exports" / "ni"
 
-# Regex matches SAY #12345 (ignores whitespace/comments). Replies are skipped.
-STRREF_RE = re.compile(r"\bSAY\s+#(?P<id>\d+)\b")
+
+def say_strrefs(statements: List[Statement]) -> Set[int]:
+    """StrRefs of the SAY statements. Replies are skipped."""
+    return {statement.strref for statement in statements if statement.kind == "SAY"}
 
 
 def extract_strrefs(path: Path) -> Set[int]:
     """Return the set of StrRef integers found in a .D file."""
-    strrefs: Set[int] = set()
-
     try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
+        return say_strrefs(parse_file(path))
     except OSError:
-        return strrefs
-
-    for match in STRREF_RE.finditer(text):
-        try:
-            strrefs.add(int(match.group("id")))
-        except ValueError:
-            continue
-
-    return strrefs
+        return set()
 
 
 def write_csv(path: Path, strrefs: Iterable[int]) -> None:
@@ -49,6 +46,10 @@ def write_csv(path: Path, strrefs: Iterable[int]) -> None:
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert .D exports to *_dlg.csv StrRef lists")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
     if not INPUT_DIR.exists():
         raise SystemExit(f"❌ Input directory not found: {INPUT_DIR}")
 
@@ -57,8 +58,8 @@ def main() -> None:
     converted = 0
     total_refs = 0
 
-    for source in sorted(INPUT_DIR.glob("*.D")):
-        strrefs = extract_strrefs(source)
+    for source, statements in parse_dir(INPUT_DIR, args.workers).items():
+        strrefs = say_strrefs(statements)
         if not strrefs:
             continue
 
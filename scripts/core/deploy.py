@@ -1,32 +1,48 @@
-"""Deploy generated WAV files to WeiDU mod structure.
+"""Deploy generated voice files to WeiDU mod structure.
 
 This script:
-1. Copies WAV files from build/OGG to mod/vvoBG/OGG
+1. Copies each line from build/OGG to mod/vvoBG/OGG, as the Ogg Vorbis
+   encode from build/vorbis (scripts/utils/encode_ogg.py) when
+   reports/encode-manifest.json records it as the encode of the WAV's
+   current content (the same digest rule encode_ogg.py uses)
 2. Renames them with OH prefix (WeiDU convention: OH<StrRef>.wav)
 3. Generates WeiDU TP2 script entries for testing
 
+BG2:EE reads Ogg Vorbis data from WAV resources, so an encoded line keeps the
+OH<StrRef>.wav name and the TP2 COPY lines work for either payload.
+
 Usage:
     python scripts/deploy.py --test       # Deploy only test files
     python scripts/deploy.py --chapter 1  # Deploy all Chapter 1
     python scripts/deploy.py --all        # Deploy everything in build/OGG
+    python scripts/deploy.py --all --wav  # Ship uncompressed WAVs
 """
 from __future__ import annotations
 
 import argparse
 import shutil
+import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.audio import EncodeManifest  # type: ignore[import-not-found]
+
 BUILD_OGG = ROOT / "build" / "OGG"
+BUILD_VORBIS = ROOT / "build" / "vorbis"
 MOD_OGG = ROOT / "mod" / "vvoBG" / "OGG"
 TP2_FILE = ROOT / "mod" / "vvoBG.tp2"
 
 
-def deploy_files(strrefs: list[str] | None = None) -> list[tuple[str, Path]]:
-    """Deploy WAV files to mod directory.
+def deploy_files(strrefs: list[str] | None = None, compressed: bool = True) -> list[tuple[str, Path]]:
+    """Deploy generated lines to mod directory.
     
     Args:
         strrefs: List of specific StrRefs to deploy, or None for all
+        compressed: Ship build/vorbis/<StrRef>.ogg when the encode manifest
+            says it was encoded from the WAV's current content; other lines
+            fall back to the WAV
         
     Returns:
         List of (strref, deployed_path) tuples
@@ -34,6 +50,8 @@ def deploy_files(strrefs: list[str] | None = None) -> list[tuple[str, Path]]:
     MOD_OGG.mkdir(parents=True, exist_ok=True)
     
     deployed = []
+    stale = []
+    manifest = EncodeManifest() if compressed else None
     wav_files = list(BUILD_OGG.glob("*.wav"))
     
     if not wav_files:
@@ -48,14 +66,28 @@ def deploy_files(strrefs: list[str] | None = None) -> list[tuple[str, Path]]:
         if strrefs and strref not in strrefs:
             continue
         
-        # WeiDU convention: OH<StrRef>.wav
+        source = wav_path
+        if compressed:
+            ogg_path = BUILD_VORBIS / f"{strref}.ogg"
+            if manifest.encodes(wav_path, ogg_path):
+                source = ogg_path
+            else:
+                stale.append(strref)
+        
+        # WeiDU convention: OH<StrRef>.wav, whether the payload is PCM or Ogg Vorbis
         target_name = f"OH{strref}.wav"
         target_path = MOD_OGG / target_name
+        # Left behind by deploys that named encodes OH<StrRef>.ogg
+        target_path.with_suffix(".ogg").unlink(missing_ok=True)
         
         # Copy file
-        shutil.copy2(wav_path, target_path)
+        shutil.copy2(source, target_path)
         deployed.append((strref, target_path))
-        print(f"✅ Deployed: {strref}.wav → {target_name}")
+        print(f"✅ Deployed: {source.name} → {target_name}")
+    
+    if stale:
+        print(f"⚠️ {len(stale)} lines have no up-to-date .ogg and were shipped as WAV; "
+              "run scripts/utils/encode_ogg.py first")
     
     return deployed
 
@@ -70,7 +102,7 @@ def generate_tp2_entries(deployed: list[tuple[str, Path]]) -> str:
     
     for strref, path in deployed:
         lines.append(f"// StrRef {strref}")
-        lines.append(f'COPY ~vvoBG/OGG/OH{strref}.wav~ ~override~')
+        lines.append(f'COPY ~vvoBG/OGG/{path.name}~ ~override/OH{strref}.wav~')
         lines.append(f"STRING_SET {strref} @{strref}")
         lines.append("")
     
@@ -78,11 +110,12 @@ def generate_tp2_entries(deployed: list[tuple[str, Path]]) -> str:
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Deploy WAV files to WeiDU mod")
+    parser = argparse.ArgumentParser(description="Deploy generated voice files to WeiDU mod")
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--test", action="store_true", help="Deploy test files only (38537, 38606)")
     group.add_argument("--chapter", type=int, help="Deploy all Chapter N files")
     group.add_argument("--all", action="store_true", help="Deploy all files in build/OGG")
+    parser.add_argument("--wav", action="store_true", help="Ship uncompressed WAVs instead of build/vorbis encodes")
     parser.add_argument("--generate-tp2", action="store_true", help="Generate TP2 script entries")
     args = parser.parse_args()
     
@@ -102,7 +135,7 @@ def main() -> None:
         print("🎯 No mode specified, deploying test files...")
     
     # Deploy
-    deployed = deploy_files(strrefs)
+    deployed = deploy_files(strrefs, compressed=not args.wav)
     
     if not deployed:
         print("❌ No files were deployed")
@@ -0,0 +1,89 @@
+"""
+Ingest dialogue straight from a local game install, without Near Infinity.
+
+Reads every DLG resource through chitin.key / BIFF / override
+(bg2vo.gameres), writes exports/ni/<DLG>_dlg.csv with the SAY StrRefs of
+each one, exactly as convert_d_to_csv.py does from a mass export, and then
+runs near_infinity_join.py against the game's own dialog.tlk to produce
+data/lines.csv.
+
+Usage:
+    python scripts/core/ingest_game.py --game "E:/SteamLibrary/steamapps/common/Baldur's Gate II Enhanced Edition"
+    python scripts/core/ingest_game.py --game ... --lang de_DE --no-join
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.gameres import TYPE_DLG, GameResources, find_path, parse_dlg  # type: ignore[import-not-found]
+from bg2vo.tlk import TlkFile  # type: ignore[import-not-found]
+from convert_d_to_csv import OUTPUT_DIR, say_strrefs, write_csv  # type: ignore[import]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build exports/ni and data/lines.csv from a game install")
+    parser.add_argument("--game", type=Path, default=os.environ.get("BG2_GAME_DIR"),
+                        help="Game directory with chitin.key (default: $BG2_GAME_DIR)")
+    parser.add_argument("--lang", default="en_US", help="Language folder for dialog.tlk (default: en_US)")
+    parser.add_argument("--no-join", action="store_true", help="Only write exports/ni/*_dlg.csv")
+    args = parser.parse_args()
+
+    if args.game is None:
+        print("❌ Pass --game or set BG2_GAME_DIR to the game directory")
+        sys.exit(1)
+    tlk_path = find_path(args.game, f"lang/{args.lang}/dialog.tlk") or find_path(args.game, "dialog.tlk")
+    if tlk_path is None:
+        print(f"❌ dialog.tlk not found under {args.game} (lang {args.lang})")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        resources = GameResources(args.game)
+    except (OSError, ValueError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    converted = total_refs = failed = 0
+    with resources, TlkFile(tlk_path) as tlk:
+        names = resources.names(TYPE_DLG)
+        print(f"📦 Reading {len(names)} DLG resources from {args.game}")
+        for name in names:
+            try:
+                statements = parse_dlg(resources.read(name, TYPE_DLG), name, tlk)
+            except (KeyError, OSError, ValueError) as exc:
+                print(f"  ⚠️ {name}: {exc}")
+                failed += 1
+                continue
+            strrefs = say_strrefs(statements)
+            if not strrefs:
+                continue
+            write_csv(OUTPUT_DIR / f"{name}_dlg.csv", strrefs)
+            converted += 1
+            total_refs += len(strrefs)
+
+    print(f"✅ Wrote {converted} dialogue files → {OUTPUT_DIR} in {time.perf_counter() - start:.1f}s")
+    print(f"   Total StrRefs extracted: {total_refs:,}")
+    if failed:
+        print(f"⚠️ {failed} DLG resources could not be read")
+
+    if args.no_join:
+        return
+    # near_infinity_join picks the TLK up from here unless exports/ni/dialog_tlk.csv exists
+    os.environ["BG2_DIALOG_TLK"] = str(tlk_path)
+    import near_infinity_join  # type: ignore[import]
+
+    print()
+    near_infinity_join.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,17 @@ from __future__ import annotations
 
 import csv
 import os
-import struct
+import sys
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, Tuple
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.speakers import SpeakerResolver  # type: ignore[import-not-found]
+from bg2vo.tlk import TlkIndex  # type: ignore[import-not-found]
+
 EXPORTS = ROOT / "exports" / "ni"
 OUTPUT = ROOT / "data" / "lines.csv"
 
@@ -19,92 +24,8 @@ DEFAULT_TLK_PATHS = [
     Path(r"C:/Program Files (x86)/Steam/steamapps/common/Baldur's Gate II Enhanced Edition/lang/en_US/dialog.tlk"),
 ]
 
-# Character DLG file mappings
-COMPANIONS = {
-    "IMOEN": "Imoen",
-    "IMOENJ": "Imoen",
-    "MINSC": "Minsc",
-    "MINSCJ": "Minsc",
-    "JAHEIRA": "Jaheira",
-    "JAHEIRAJ": "Jaheira",
-    "VICONIA": "Viconia",
-    "VVICONI": "Viconia",
-    "EDWIN": "Edwin",
-    "EDWINJ": "Edwin",
-    "AERIE": "Aerie",
-    "AERIEJ": "Aerie",
-    "KORGAN": "Korgan",
-    "KORGANJ": "Korgan",
-    "ANOMEN": "Anomen",
-    "ANOMENJ": "Anomen",
-    "KELDORN": "Keldorn",
-    "KELDORJ": "Keldorn",
-    "NALIA": "Nalia",
-    "NALIAJ": "Nalia",
-    "HAERDALI": "HaerDalis",
-    "HAERDA": "HaerDalis",
-}
-
-
-def load_tlk_csv(tlk_csv: Path) -> Dict[int, str]:
-    """Load StrRef -> text mapping from a CSV export."""
-    strref_map: Dict[int, str] = {}
-
-    with tlk_csv.open("r", encoding="utf-8", errors="ignore") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            try:
-                strref = int(row["StrRef"])
-            except (ValueError, KeyError):
-                continue
-
-            text = row.get("Text", "").strip()
-            if text:
-                strref_map[strref] = text
-
-    return strref_map
-
-
-def load_tlk_binary(tlk_path: Path) -> Dict[int, str]:
-    """Parse a binary dialog.tlk file and return StrRef -> text."""
-    data = tlk_path.read_bytes()
-    if len(data) < 18:
-        raise ValueError(f"TLK file too small: {tlk_path}")
-
-    signature, version, language_id, string_count, string_offset = struct.unpack(
-        "<4s4sHII", data[:18]
-    )
-
-    if signature != b"TLK " or not version.startswith(b"V1"):
-        raise ValueError(f"Unexpected TLK header: {signature!r} {version!r}")
-
-    entries_offset = 18
-    entry_size = 26
-    entries_end = entries_offset + string_count * entry_size
-    if entries_end > len(data):
-        raise ValueError("TLK entry table exceeds file length")
-
-    strref_map: Dict[int, str] = {}
-
-    for index in range(string_count):
-        start = entries_offset + index * entry_size
-        end = start + entry_size
-        flags, sound_resref, vol_var, pitch_var, offset, length = struct.unpack(
-            "<H8sIIII", data[start:end]
-        )
-
-        has_text = bool(flags & 0x0001)
-        if not has_text or length == 0:
-            continue
-
-        absolute = string_offset + offset
-        text_bytes = data[absolute : absolute + length]
-        text = text_bytes.decode("cp1252", errors="ignore").strip()
-
-        if text:
-            strref_map[index] = text
-
-    return strref_map
+# DLG file -> canonical character (Canonical/Aliases/DLGFiles in data/characters.csv)
+SPEAKERS = SpeakerResolver.from_csv()
 
 
 def find_tlk_source() -> Tuple[str, Path]:
@@ -135,7 +56,7 @@ def load_dlg_files(exports_dir: Path) -> Dict[int, str]:
 
     for dlg_file in exports_dir.glob("*_dlg.csv"):
         dlg_stem = dlg_file.stem.replace("_dlg", "").upper()
-        speaker = COMPANIONS.get(dlg_stem, dlg_stem.title())
+        speaker = SPEAKERS.resolve(dlg_stem, dlg_stem.title())
 
         with dlg_file.open("r", encoding="utf-8", errors="ignore") as handle:
             reader = csv.DictReader(handle)
@@ -165,15 +86,6 @@ def main() -> None:
         print(f"❌ {exc}")
         return
 
-    if tlk_kind == "csv":
-        print(f"\n📁 Loading TLK CSV: {tlk_path}")
-        strref_text = load_tlk_csv(tlk_path)
-    else:
-        print(f"\n📁 Loading TLK binary: {tlk_path}")
-        strref_text = load_tlk_binary(tlk_path)
-
-    print(f"   ✓ Loaded {len(strref_text):,} text entries")
-
     print(f"\n📁 Loading DLG exports from: {EXPORTS}")
     dlg_files = list(EXPORTS.glob("*_dlg.csv"))
     if not dlg_files:
@@ -185,6 +97,14 @@ def main() -> None:
     strref_speakers = load_dlg_files(EXPORTS)
     print(f"   ✓ Mapped {len(strref_speakers):,} StrRefs to speakers")
 
+    # Both kinds go through the cached index (reports/tlk-index), rebuilt
+    # only when the source file's hash changes
+    print(f"\n📁 Loading TLK {'CSV' if tlk_kind == 'csv' else 'binary'}: {tlk_path}")
+    with TlkIndex.open(tlk_path) as tlk_index:
+        strref_text = tlk_index.get_many(strref_speakers)
+
+    print(f"   ✓ Loaded {len(strref_text):,} text entries")
+
     print(f"\n📝 Creating {OUTPUT}")
     OUTPUT.parent.mkdir(parents=True, exist_ok=True)
 
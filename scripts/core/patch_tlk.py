@@ -0,0 +1,225 @@
+"""
+Point dialog.tlk entries at deployed lines directly, for fast local test installs.
+
+Instead of regenerating the TP2 and running the WeiDU installer, this writes
+the OH<StrRef> sound resref of every line in mod/vvoBG/OGG straight into the
+dialog.tlk of a local game copy. The TLK is memory-mapped and only entries
+whose resref or flags differ are written. With --override the deployed audio
+is also copied into the game's override folder as OH<StrRef>.wav, as the TP2
+would.
+
+The original flags and resref of every patched entry are journaled in
+reports/tlk-patch.json (per TLK path), so ``revert`` restores the file
+exactly and removes copied override files. An override file this tool did
+not create is backed up to reports/tlk-patch-backup/ before it is replaced
+and put back by ``revert``. ``verify`` checks that every deployed line is
+patched (and present in override).
+
+Point --tlk at a copy of the game, never at the install you play.
+
+Usage:
+    python scripts/core/patch_tlk.py patch --tlk "D:/BG2EE-test/lang/en_US/dialog.tlk" --override "D:/BG2EE-test/override"
+    python scripts/core/patch_tlk.py patch --tlk ... --strref 38537 38606
+    python scripts/core/patch_tlk.py verify --tlk ... --override ...
+    python scripts/core/patch_tlk.py revert --tlk ...
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.tlk import TlkFile  # type: ignore[import-not-found]
+from deploy import MOD_OGG  # type: ignore[import]
+
+JOURNAL_PATH = ROOT / "reports" / "tlk-patch.json"
+BACKUP_DIR = ROOT / "reports" / "tlk-patch-backup"
+# OH<StrRef> must fit the 8-character sound resref
+MAX_STRREF = 999_999
+
+
+class PatchJournal:
+    """Original (flags, resref) of patched entries, copied override files and backups, per TLK."""
+
+    def __init__(self, path: Path = JOURNAL_PATH) -> None:
+        self.path = path
+        self.data: dict = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+    def entry(self, tlk_path: Path) -> dict:
+        entry = self.data.setdefault(os.path.abspath(tlk_path), {"entries": {}, "override": []})
+        entry.setdefault("backups", {})
+        return entry
+
+    def record(
+        self, tlk_path: Path, previous: dict[int, tuple[int, str]], copied: list[Path], backups: dict[str, str]
+    ) -> None:
+        entry = self.entry(tlk_path)
+        for strref, (flags, sound) in previous.items():
+            # Keep the value from before the first patch
+            entry["entries"].setdefault(str(strref), [flags, sound])
+        entry["override"] = sorted(set(entry["override"]) | {str(path) for path in copied})
+        for target, backup in backups.items():
+            entry["backups"].setdefault(target, backup)
+
+    def pop(self, tlk_path: Path) -> dict:
+        return self.data.pop(os.path.abspath(tlk_path), {"entries": {}, "override": [], "backups": {}})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def deployed_lines(strrefs: list[str] | None = None) -> dict[int, Path]:
+    """StrRef -> deployed file in mod/vvoBG/OGG (OH<StrRef>.ogg or .wav)."""
+    lines: dict[int, Path] = {}
+    for path in sorted(MOD_OGG.glob("OH*")):
+        if path.suffix.lower() not in (".ogg", ".wav") or not path.stem[2:].isdigit():
+            continue
+        if strrefs and path.stem[2:] not in strrefs:
+            continue
+        lines[int(path.stem[2:])] = path
+    return lines
+
+
+def copy_overrides(lines: dict[int, Path], override_dir: Path, owned: set[str]) -> tuple[list[Path], dict[str, str]]:
+    """Copy deployed files to override as OH<StrRef>.wav, skipping up-to-date copies.
+
+    ``owned`` lists override files an earlier patch created; any other
+    existing target is backed up first.
+
+    Returns:
+        (copied files, target -> backup path of files that were there before)
+    """
+    override_dir = Path(os.path.abspath(override_dir))
+    override_dir.mkdir(parents=True, exist_ok=True)
+    backup_dir = BACKUP_DIR / hashlib.md5(str(override_dir).encode("utf-8")).hexdigest()[:12]
+    copied = []
+    backups = {}
+    for strref, source in lines.items():
+        target = override_dir / f"OH{strref}.wav"
+        if target.exists():
+            if str(target) in owned:
+                source_stat, target_stat = source.stat(), target.stat()
+                if target_stat.st_size == source_stat.st_size and target_stat.st_mtime >= source_stat.st_mtime:
+                    continue
+            else:
+                backup_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(target, backup_dir / target.name)
+                backups[str(target)] = str(backup_dir / target.name)
+        shutil.copy2(source, target)
+        copied.append(target)
+    return copied, backups
+
+
+def patch(tlk_path: Path, lines: dict[int, Path], override_dir: Path | None) -> None:
+    journal = PatchJournal()
+    with TlkFile(tlk_path, writable=True) as tlk:
+        previous = tlk.set_sounds({strref: f"OH{strref}" for strref in lines})
+    # Journal the TLK changes before touching override, so a failed copy can still be reverted
+    journal.record(tlk_path, previous, [], {})
+    journal.save()
+    copied, backups = [], {}
+    if override_dir:
+        copied, backups = copy_overrides(lines, override_dir, set(journal.entry(tlk_path)["override"]))
+        journal.record(tlk_path, {}, copied, backups)
+        journal.save()
+    print(f"✅ Patched {len(previous)} TLK entries ({len(lines) - len(previous)} already set)")
+    if override_dir:
+        print(f"✅ Copied {len(copied)} files to {override_dir}")
+    if backups:
+        print(f"💾 Backed up {len(backups)} existing override files to {BACKUP_DIR}")
+
+
+def verify(tlk_path: Path, lines: dict[int, Path], override_dir: Path | None) -> bool:
+    problems = []
+    with TlkFile(tlk_path) as tlk:
+        for strref in lines:
+            if strref >= len(tlk):
+                problems.append(f"{strref}: StrRef out of range")
+            elif (sound := tlk.sound(strref)) != f"OH{strref}":
+                problems.append(f"{strref}: sound is {sound!r}" if sound else f"{strref}: no sound")
+    if override_dir:
+        for strref in lines:
+            if not (override_dir / f"OH{strref}.wav").exists():
+                problems.append(f"{strref}: OH{strref}.wav missing from override")
+
+    if problems:
+        print(f"❌ {len(problems)} problems:")
+        for problem in problems[:20]:
+            print(f"   {problem}")
+        return False
+    print(f"✅ All {len(lines)} deployed lines are patched")
+    return True
+
+
+def revert(tlk_path: Path) -> None:
+    journal = PatchJournal()
+    entry = journal.pop(tlk_path)
+    previous = {int(strref): (flags, sound) for strref, (flags, sound) in entry["entries"].items()}
+    if previous:
+        with TlkFile(tlk_path, writable=True) as tlk:
+            tlk.restore(previous)
+    removed = 0
+    for path in map(Path, entry["override"]):
+        if path.exists():
+            path.unlink()
+            removed += 1
+    restored = 0
+    for target, backup in entry.get("backups", {}).items():
+        if Path(backup).exists():
+            shutil.move(backup, target)
+            restored += 1
+    journal.save()
+    print(f"✅ Restored {len(previous)} TLK entries, removed {removed} override files")
+    if restored:
+        print(f"✅ Put back {restored} override files that were there before patching")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Patch OH<StrRef> sound resrefs straight into a test dialog.tlk")
+    parser.add_argument("command", choices=["patch", "verify", "revert"])
+    parser.add_argument("--tlk", type=Path, required=True, help="dialog.tlk of a local test copy of the game")
+    parser.add_argument("--override", type=Path, help="Game override folder to copy deployed audio into")
+    parser.add_argument("--strref", nargs="+", help="Only these StrRefs (default: everything in mod/vvoBG/OGG)")
+    args = parser.parse_args()
+
+    if not args.tlk.exists():
+        print(f"❌ TLK not found: {args.tlk}")
+        sys.exit(1)
+
+    if args.command == "revert":
+        revert(args.tlk)
+        return
+
+    lines = deployed_lines(args.strref)
+    if not lines:
+        print(f"❌ No deployed lines in {MOD_OGG}; run scripts/core/deploy.py first")
+        sys.exit(1)
+    too_long = sorted(strref for strref in lines if strref > MAX_STRREF)
+    if too_long:
+        print(f"❌ OH<StrRef> exceeds the 8-character resref limit for StrRef {too_long[0]}"
+              f"{f' and {len(too_long) - 1} more' if len(too_long) > 1 else ''} (max {MAX_STRREF})")
+        sys.exit(1)
+
+    try:
+        if args.command == "patch":
+            patch(args.tlk, lines, args.override)
+        elif not verify(args.tlk, lines, args.override):
+            sys.exit(1)
+    except (IndexError, ValueError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
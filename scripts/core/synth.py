@@ -289,12 +289,13 @@ tts.infer(**kwargs)
         if pitch_shift or speed_adjust:
             print(f"  🎵 Applying post-processing (pitch_shift={pitch_shift}, speed={speed_adjust})")
             sys.path.insert(0, str(ROOT / "scripts" / "utils"))
-            from adjust_audio import change_pitch, change_speed
+            from adjust_audio import change_pitch, change_speed, to_float32, to_pcm16
             import soundfile as sf
             import scipy.io.wavfile as wavfile
             
             # Load generated audio
             sr, audio = wavfile.read(str(out_wav))
+            audio = to_float32(audio)
             
             # Apply speed adjustment
             if speed_adjust and speed_adjust != 1.0:
@@ -305,7 +306,7 @@ tts.infer(**kwargs)
                 audio = change_pitch(audio, sr, pitch_shift)
             
             # Save modified audio
-            wavfile.write(str(out_wav), sr, audio)
+            wavfile.write(str(out_wav), sr, to_pcm16(audio))
             
     finally:
         import os
@@ -14,20 +14,22 @@ import time
 from pathlib import Path
 from typing import Any
 
-import numpy as np
-import scipy.io.wavfile as wavfile
 import torch
 
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT / "src"))
 
 from bg2vo.config import load_config  # type: ignore[import-not-found]
-from bg2vo.emotions import detect_emotion, get_emotion_config  # type: ignore[import-not-found]
+from bg2vo.emotions import get_emotion_config  # type: ignore[import-not-found]
+from bg2vo.emotion_vectors import EmotionVectorEngine  # type: ignore[import-not-found]
+from bg2vo.text import sanitize  # type: ignore[import-not-found]
+from bg2vo.tokens import CachingTokenizer, FrontendCache, IndexTTSTokenizer, TokenIndex  # type: ignore[import-not-found]
 # Audio post-processing helpers
 sys.path.insert(0, str(ROOT / "scripts" / "utils"))
-from adjust_audio import change_pitch, change_speed  # type: ignore[import]
+from adjust_audio import AdjustManifest, adjust_file, adjustment_params  # type: ignore[import]
 # Vocalization detection
-from classify_vocalizations import classify_text, VocalizationType  # type: ignore[import]
+from classify_vocalizations import VocalizationType  # type: ignore[import]
+from vocalization_index import VocalizationIndex  # type: ignore[import]
 # Statistics auto-update
 from update_project_stats import main as update_stats  # type: ignore[import]
 
@@ -57,88 +59,12 @@ except Exception as exc:  # pragma: no cover - defensive fallback
 
 OUT.mkdir(parents=True, exist_ok=True)
 
+FRONTEND_CACHE = ROOT / "reports" / "frontend-cache.jsonl"
+TOKEN_INDEX = ROOT / "reports" / "token-index.json"
+
 with open(VOICES_PATH, "r", encoding="utf-8") as voice_file:
     VOICE_MAP: dict[str, dict[str, object] | str] = json.load(voice_file)
 
-# ---------------------------------------------------------------------------
-# Text sanitiser (copied from synth.py)
-# ---------------------------------------------------------------------------
-TOKEN_REPLACEMENTS = {
-    "CHARNAME": "you",
-    "PRO_HESHE": "they",
-    "PRO_HIMHER": "them",
-    "PRO_HISHER": "their",
-    "PRO_MANWOMAN": "person",
-    "PRO_LADYLORD": "my friend",
-    "LADYLORD": "friend",
-    "PRO_RACE": "traveler",
-    "RACE": "traveler",
-    "PRO_SIRMAAM": "friend",
-    "SIRMAAM": "friend",
-    "MALEFEMALE": "person",
-    "PRO_MALEFEMALE": "person",
-    "MANWOMAN": "person",
-    "PRO_BROTHERSISTER": "friend",
-    "BROTHERSISTER": "friend",
-    "PRO_GIRLBOY": "child",
-    "GIRLBOY": "child",
-    "GABBER": "friend",
-    "DAYNIGHTALL": "day",
-}
-
-TOKEN_PATTERN = re.compile(r"<([^>]+)>")
-
-
-def sanitize(text: str) -> str:
-    """Normalize dialogue text by removing WeiDU tokens and tidying spacing."""
-
-    def _replace(match: re.Match[str]) -> str:
-        token = match.group(1)
-        if token == "CHARNAME":
-            return "__CHARNAME__"
-        return TOKEN_REPLACEMENTS.get(token, "")
-
-    cleaned = TOKEN_PATTERN.sub(_replace, text)
-    cleaned = cleaned.replace("~", "")
-    cleaned = cleaned.replace("\u00a0", " ")
-    fallback = cleaned.replace("__CHARNAME__", "you").strip()
-
-    cleaned = re.sub(r"(^|[.!?]\s*)__CHARNAME__,\s*", r"\1", cleaned)
-    cleaned = re.sub(r"(^|[.!?]\s*)__CHARNAME__\s*[!?]+\s*", r"\1", cleaned)
-    cleaned = re.sub(r",\s*__CHARNAME__\s*,", ", ", cleaned)
-    cleaned = re.sub(r",\s*__CHARNAME__([.!?])", r"\1", cleaned)
-    cleaned = re.sub(r",\s*__CHARNAME__", "", cleaned)
-
-    cleaned = cleaned.replace("__CHARNAME__", "you")
-    cleaned = re.sub(r"^(?:[Yy]ou[!?]+\s+)+", "", cleaned)
-    cleaned = re.sub(r"^[\s\-—]*[,.;:!?]+\s*", "", cleaned)
-    cleaned = cleaned.lstrip('"')
-    cleaned = re.sub(r"\s{2,}", " ", cleaned)
-    cleaned = re.sub(r"\s+([,.!?;:])", r"\1", cleaned)
-    cleaned = re.sub(r",\s*,", ", ", cleaned)
-    cleaned = re.sub(r"(?<!\.)\.\.(?!\.)", ".", cleaned)
-    cleaned = re.sub(r"([!?;:]){2,}", lambda m: m.group(0)[0], cleaned)
-    cleaned = re.sub(r",([!?;:])", r"\1", cleaned)
-
-    for pattern, replacement in (
-        (r"\b[Yy]ou has\b", "you have"),
-        (r"\b[Yy]ou is\b", "you are"),
-        (r"\b[Yy]ou was\b", "you were"),
-        (r"\b[Yy]ou's\b", "your"),
-        (r"\b[Tt]hey has\b", "they have"),
-        (r"\b[Tt]hey is\b", "they are"),
-        (r"\b[Tt]hey was\b", "they were"),
-        (r"\b[Tt]hey decides\b", "they decide"),
-    ):
-        cleaned = re.sub(pattern, replacement, cleaned)
-
-    cleaned = cleaned.strip()
-    if not cleaned:
-        cleaned = fallback
-    if cleaned and cleaned[0].islower():
-        cleaned = cleaned[0].upper() + cleaned[1:]
-    return cleaned
-
 
 # ---------------------------------------------------------------------------
 # Vocalization handling
@@ -317,6 +243,23 @@ class BatchSynthesiser:
             device=self.device,
         )
 
+        # Serve text normalization + BPE tokenization from disk on re-renders
+        bpe_path = Path(getattr(self.tts, "bpe_path", INDEX_TTS_ROOT / "checkpoints" / "bpe.model"))
+        self.frontend_cache: FrontendCache | None = None
+        self.fingerprint: str | None = None
+        try:
+            self.fingerprint = IndexTTSTokenizer(INDEX_TTS_ROOT, bpe_path).fingerprint
+        except FileNotFoundError as exc:
+            print(f"⚠️ Text frontend cache disabled: {exc}")
+        else:
+            self.frontend_cache = FrontendCache(FRONTEND_CACHE, self.fingerprint)
+            self.tts.tokenizer = CachingTokenizer(self.tts.tokenizer, self.frontend_cache)
+            print(f"   Text frontend cache: {len(self.frontend_cache)} entries")
+
+    def save_frontend_cache(self) -> None:
+        if self.frontend_cache is not None:
+            self.frontend_cache.save()
+
     def generate(self, voice_ref: str | None, text: str, out_wav: Path, config: dict) -> None:
         kwargs: dict[str, object] = {
             "text": text,
@@ -358,7 +301,7 @@ def resolve_voice_config(speaker: str) -> tuple[str | None, dict[str, object]]:
         config_dict: dict[str, object] = {}
     elif isinstance(config, dict):
         voice_ref = config.get("ref") or config.get("voice") or "narrator"
-        config_dict = {k: v for k, v in config.items() if k not in {"ref", "voice", "notes", "status"}}
+        config_dict = {k: v for k, v in config.items() if k not in {"ref", "voice", "notes", "status", "auto_emotion"}}
     else:
         voice_ref = "narrator"
         config_dict = {}
@@ -371,20 +314,16 @@ def resolve_voice_config(speaker: str) -> tuple[str | None, dict[str, object]]:
     return voice_ref, config_dict
 
 
-def apply_post_processing(out_wav: Path, speed: float | None, pitch_shift: float | None) -> None:
-    if not speed and not pitch_shift:
+def apply_post_processing(
+    out_wav: Path, speed: float | None, pitch_shift: float | None, manifest: AdjustManifest
+) -> None:
+    params = adjustment_params(speed, pitch_shift)
+    if not params:
         return
 
-    sample_rate, audio = wavfile.read(str(out_wav))
-    if audio.dtype != np.int16:
-        audio = (audio * 32767).astype(np.int16)
-
-    if speed and speed != 1.0:
-        audio, sample_rate = change_speed(audio, sample_rate, speed)
-    if pitch_shift and pitch_shift != 0:
-        audio = change_pitch(audio, sample_rate, pitch_shift)
-
-    wavfile.write(str(out_wav), sample_rate, audio)
+    # Recorded so adjust_audio.py --speaker/--batch will not apply it again
+    name, raw, output = adjust_file(out_wav, params)
+    manifest.record(name, raw, output, params)
 
 
 def synth_batch(csv_path: Path) -> None:
@@ -398,7 +337,52 @@ def synth_batch(csv_path: Path) -> None:
     total = len(rows)
     print(f"   Total entries: {total}")
 
+    voc_index = VocalizationIndex()
+    if len(voc_index):
+        print(f"   Vocalization index: {len(voc_index)} StrRefs")
+    else:
+        print("   Vocalization index not built, classifying lines live")
+
+    # Blended emotion vectors for speakers with "auto_emotion": true, scored in one pass
+    emotion_engine = EmotionVectorEngine.from_voices(VOICE_MAP)
+    auto_speakers = {
+        name.lower() for name, config in VOICE_MAP.items()
+        if isinstance(config, dict) and config.get("auto_emotion")
+    }
+    auto_rows = [
+        idx for idx, row in enumerate(rows, start=1)
+        if row.get("Speaker", "").strip().lower() in auto_speakers and row.get("Text")
+    ]
+    auto_vectors, auto_labels = emotion_engine.analyze(
+        [sanitize(rows[idx - 1]["Text"]) for idx in auto_rows],
+        [rows[idx - 1]["Speaker"].strip() for idx in auto_rows],
+    )
+    auto_emotions = {
+        idx: (vector.round(4).tolist(), label)
+        for idx, vector, label in zip(auto_rows, auto_vectors, auto_labels)
+    }
+
     synthesiser = BatchSynthesiser()
+    adjust_manifest = AdjustManifest()
+
+    # Token counts of the lines still to render (scripts/utils/index_tokens.py) drive the ETA
+    line_tokens: dict[str, int] = {}
+    if synthesiser.fingerprint is not None:
+        token_index = TokenIndex(TOKEN_INDEX, synthesiser.fingerprint)
+        if token_index.stale:
+            print("⚠️ Token index was built with another tokenizer, rerun scripts/utils/index_tokens.py")
+        for row in rows:
+            strref = row.get("StrRef", "").strip()
+            if not strref or row.get("Original_VO_WAV", "").strip() or (OUT / f"{strref}.wav").exists():
+                continue
+            line = token_index.get(strref)
+            if line is not None:
+                line_tokens[strref] = line.tokens
+    planned_tokens = sum(line_tokens.values())
+    done_tokens = 0
+    if line_tokens:
+        print(f"   Planned tokens: {planned_tokens:,} across {len(line_tokens)} lines")
+
     start_time = time.perf_counter()
     generated = 0
     skipped = 0
@@ -431,8 +415,8 @@ def synth_batch(csv_path: Path) -> None:
 
         voice_ref, config_dict = resolve_voice_config(speaker)
 
-        # Check if text is a vocalization (NEW)
-        voc_result = classify_text(sanitized, min_confidence=0.6)
+        # Check if text is a vocalization (precomputed by vocalization_index.py)
+        voc_result = voc_index.classify(strref, text, min_confidence=0.6, sanitized=sanitized)
         is_vocalization = voc_result is not None
         
         # Emotion handling
@@ -463,10 +447,11 @@ def synth_batch(csv_path: Path) -> None:
             emotion_label = manual_emotion.strip().lower()
             emotion_config = get_emotion_config(emotion_label, speaker)
         
-        # Priority 3: Auto-detect emotion (Ilyich special case)
-        if not emotion_config and speaker.lower() == "ilyich":
-            emotion_label = detect_emotion(sanitized)
-            emotion_config = get_emotion_config(emotion_label, speaker)
+        # Priority 3: Auto-detected blended emotion (opt-in speakers)
+        if not emotion_config and idx in auto_emotions:
+            emo_vector, dominant = auto_emotions[idx]
+            emotion_label = f"{dominant} (blended)"
+            emotion_config = {"emo_vector": emo_vector}
 
         if emotion_config:
             if "emo_audio_prompt" in emotion_config:
@@ -483,12 +468,22 @@ def synth_batch(csv_path: Path) -> None:
             if emotion_label:
                 print(f"   🎭 Emotion: {emotion_label}")
             synthesiser.generate(voice_ref, sanitized, out_wav, config_dict)
-            apply_post_processing(out_wav, speed_adjust, pitch_shift)
+            apply_post_processing(out_wav, speed_adjust, pitch_shift, adjust_manifest)
             generated += 1
         except Exception as exc:  # pragma: no cover - log and continue
             print(f"   ⚠️ Failed to generate {strref}: {exc}")
             if out_wav.exists():
                 out_wav.unlink(missing_ok=True)
+        if line_tokens.get(strref):
+            done_tokens += line_tokens[strref]
+            eta = (time.perf_counter() - start_time) / done_tokens * (planned_tokens - done_tokens)
+            print(f"   ⏱️ ETA {eta/60:.1f} min ({done_tokens:,}/{planned_tokens:,} tokens)")
+        if generated and generated % 50 == 0:
+            synthesiser.save_frontend_cache()
+            adjust_manifest.save()
+
+    synthesiser.save_frontend_cache()
+    adjust_manifest.save()
 
     elapsed = time.perf_counter() - start_time
     rtf = elapsed / max(generated, 1)
@@ -498,6 +493,9 @@ def synth_batch(csv_path: Path) -> None:
     print(f"   Skipped:   {skipped}")
     print(f"   Elapsed:   {elapsed/60:.2f} minutes")
     print(f"   Avg time per line: {rtf:.2f} seconds")
+    if synthesiser.frontend_cache is not None:
+        cache = synthesiser.frontend_cache
+        print(f"   Frontend cache: {cache.hits} hits, {cache.misses} misses")
 
     return generated  # Return count for caller
 
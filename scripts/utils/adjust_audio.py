@@ -1,110 +1,822 @@
 """
-Post-process generated audio files with pitch and speed adjustments.
+Post-process generated audio files with pitch, speed and gain adjustments.
 
-Uses pydub and numpy for audio manipulation without requiring external tools.
+Uses numpy and scipy for audio manipulation without requiring external tools.
+16-bit WAVs are processed as a stream of blocks (see build_stages), so
+long stitched references do not need to fit in memory. Samples stay float32
+through every stage and are quantized to int16 once, with dither, on write.
+
+--speaker and --batch run on a process pool and record the params applied to
+each file in reports/adjust-manifest.json (unadjusted copies go to build/raw),
+so re-running them is a no-op and changed settings re-render from the copy.
+
+Usage:
+    python scripts/utils/adjust_audio.py 38606 --speed 0.95 --pitch -2
+    python scripts/utils/adjust_audio.py --speaker Ilyich
+    python scripts/utils/adjust_audio.py --batch data/chapter1_lines.csv --workers 8
 """
+import argparse
+import csv
+import json
+import os
+import shutil
 import sys
 import wave
 import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd
 from pathlib import Path
 from scipy import signal
 import scipy.io.wavfile as wavfile
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.audio import file_digest  # type: ignore[import-not-found]
+
+# Which params each build/OGG file was adjusted with, and unadjusted copies
+MANIFEST_PATH = ROOT / "reports" / "adjust-manifest.json"
+RAW_DIR = ROOT / "build" / "raw"
+
+# Largest up/down factor used for polyphase resampling. Keeps the FIR filter
+# bank small while approximating any 0.5-1.5 speed to within ~0.01%.
+MAX_RESAMPLE_DENOMINATOR = 100
+
+# Phase-vocoder pitch shifting: 46 ms frames at 22050 Hz with 75% overlap,
+# processed PITCH_BLOCK_FRAMES frames at a time.
+PITCH_FFT_SIZE = 1024
+PITCH_HOP = 256
+PITCH_BLOCK_FRAMES = 128
+
+# Samples read per block by the streaming file processor
+STREAM_BLOCK = 65536
+
+
+def resample_ratio(speed_factor: float, max_denominator: int = MAX_RESAMPLE_DENOMINATOR) -> tuple[int, int]:
+    """
+    Approximate 1/speed_factor as a small up/down fraction for resample_poly.
+    
+    Returns:
+        Tuple of (up, down) so that up/down ~= 1/speed_factor
+    """
+    ratio = Fraction(speed_factor).limit_denominator(max_denominator)
+    return ratio.denominator, ratio.numerator
+
+
+def to_float32(audio_data: np.ndarray) -> np.ndarray:
+    """
+    Convert samples read from a WAV to float32 on the int16 scale (+/-32767).
+    
+    Float WAV data is taken to be in [-1, 1]. All processing works on these
+    buffers (change_speed/change_pitch take int16 or such float32 arrays as
+    is); quantize once with to_pcm16 (or Dither) when writing.
+    """
+    if np.issubdtype(audio_data.dtype, np.floating):
+        return np.asarray(audio_data * 32767, dtype=np.float32)
+    if audio_data.dtype == np.int32:
+        return (audio_data / 65536).astype(np.float32)
+    if audio_data.dtype == np.uint8:
+        return ((audio_data.astype(np.float32) - 128) * 256)
+    return audio_data.astype(np.float32)
+
+
+class Dither:
+    """
+    TPDF-dithered float32 -> int16 quantizer.
+    
+    Adds triangular noise of +/-1 LSB before rounding so the single final
+    quantization leaves uncorrelated noise instead of truncation distortion.
+    Seeded, with one noise pair drawn per sample (per channel for
+    (frames, channels) buffers), so the noise sequence is the same for every
+    run and block size and re-renders are byte-identical.
+    """
+    
+    def __init__(self, seed: int = 0) -> None:
+        self._rng = np.random.default_rng(seed)
+    
+    def __call__(self, audio_data: np.ndarray) -> np.ndarray:
+        out = np.empty(audio_data.shape, dtype=np.int16)
+        for start in range(0, len(audio_data), STREAM_BLOCK):
+            block = audio_data[start:start + STREAM_BLOCK]
+            pairs = self._rng.random(block.shape + (2,), dtype=np.float32)
+            noisy = block + (pairs[..., 0] - pairs[..., 1])
+            out[start:start + len(block)] = np.clip(np.rint(noisy), -32768, 32767)
+        return out
+
+
+def to_pcm16(audio_data: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Quantize a float32 buffer (mono or (frames, channels)) to int16 with TPDF dither."""
+    return Dither(seed)(audio_data)
+
+
+@lru_cache(maxsize=None)
+def resample_filter(up: int, down: int) -> np.ndarray:
+    """The Kaiser FIR resample_poly designs for up/down, as float32."""
+    max_rate = max(up, down)
+    taps = signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    return taps.astype(np.float32)
+
 
+def resample(audio_data: np.ndarray, up: int, down: int) -> np.ndarray:
+    """Whole-array float32 polyphase resample (same result as StreamingResampler)."""
+    common = gcd(up, down)
+    up, down = up // common, down // common
+    # resample_poly scales the filter in place, so hand it a copy
+    return signal.resample_poly(audio_data, up, down, window=resample_filter(up, down).copy())
 
-def change_speed(audio_data: np.ndarray, sample_rate: int, speed_factor: float) -> tuple[np.ndarray, int]:
+
+def change_speed(
+    audio_data: np.ndarray,
+    sample_rate: int,
+    speed_factor: float,
+    method: str = "poly",
+) -> tuple[np.ndarray, int]:
     """
     Change audio speed by resampling.
     
+    The default "poly" method uses a polyphase FIR resampler with a rational
+    approximation of the speed factor; its cost is linear in clip length. The
+    "fft" method is the original whole-clip FFT resample, which is exact in
+    length but slows down badly for lengths with large prime factors.
+    
     Args:
         audio_data: Audio samples as numpy array
         sample_rate: Original sample rate
         speed_factor: Speed multiplier (0.95 = slower, 1.05 = faster)
+        method: "poly" (default) or "fft"
     
     Returns:
-        Tuple of (modified audio data, new sample rate)
+        Tuple of (float32 audio data on the int16 scale, new sample rate)
+    """
+    audio_data = np.asarray(audio_data, dtype=np.float32)
+    if method == "fft":
+        new_length = int(len(audio_data) / speed_factor)
+        resampled = signal.resample(audio_data, new_length)
+    elif method == "poly":
+        resampled = resample(audio_data, *resample_ratio(speed_factor))
+    else:
+        raise ValueError(f"Unknown resampling method: {method}")
+    
+    return resampled.astype(np.float32, copy=False), sample_rate
+
+
+class TimeStretcher:
     """
-    # Calculate new length
-    new_length = int(len(audio_data) / speed_factor)
+    Streaming phase-vocoder time stretch (changes length, keeps pitch).
     
-    # Resample audio
-    resampled = signal.resample(audio_data, new_length)
+    Feed audio in chunks of any size with ``process`` and finish with
+    ``flush``; each call returns the output samples that are final so far.
+    Spectra are computed ``block_frames`` STFT frames at a time and only the
+    input/output tails still needed are kept, so memory does not grow with
+    clip length. Spectra are float32/complex64; only the running phase is kept
+    in float64 (and wrapped) so it does not drift over long clips.
     
-    return resampled.astype(np.int16), sample_rate
+    One stretcher handles one channel; time_stretch runs one per channel.
+    """
+    
+    def __init__(
+        self,
+        factor: float,
+        n_fft: int = PITCH_FFT_SIZE,
+        hop: int = PITCH_HOP,
+        block_frames: int = PITCH_BLOCK_FRAMES,
+    ) -> None:
+        if n_fft % hop:
+            raise ValueError("hop must divide n_fft")
+        self.factor = factor
+        self.rate = 1.0 / factor
+        self.n_fft = n_fft
+        self.hop = hop
+        self.block_frames = block_frames
+        self._half = n_fft // 2
+        self._overlap = n_fft // hop
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self._window_sq = (self._window ** 2).reshape(self._overlap, hop)
+        self._omega = (2 * np.pi * hop * np.arange(self._half + 1) / n_fft).astype(np.float32)
+        self._phase: np.ndarray | None = None
+        
+        # Input is centre-padded: the first frame is centred on sample 0.
+        self._input = np.zeros(self._half, dtype=np.float32)
+        self._input_base = 0  # padded index of self._input[0]
+        self._received = 0  # unpadded input samples seen
+        self._step = 0  # next synthesis frame
+        
+        self._out = np.zeros(0, dtype=np.float32)
+        self._norm = np.zeros(0, dtype=np.float32)
+        self._out_base = 0  # synthesis index of self._out[0]
+        self._emitted = 0
+    
+    def _steps_ready(self, n_frames: int) -> int:
+        """Number of synthesis steps whose two analysis frames are < n_frames."""
+        # Same condition as np.arange(0, n_frames - 1, rate): step * rate < n_frames - 1
+        stop = max(int(np.ceil((n_frames - 1) * self.factor)), 0)
+        while stop > 0 and (stop - 1) * self.rate >= n_frames - 1:
+            stop -= 1
+        while stop * self.rate < n_frames - 1:
+            stop += 1
+        return stop
+    
+    def _synthesise(self, stop: int) -> list[np.ndarray]:
+        hop, n_fft, two_pi = self.hop, self.n_fft, 2 * np.pi
+        pieces = []
+        while self._step < stop:
+            steps = np.arange(self._step, min(self._step + self.block_frames, stop))
+            positions = steps * self.rate
+            idx = positions.astype(np.int64)
+            frac = (positions - idx).astype(np.float32)[:, None]
+            first = idx[0]
+            start = first * hop - self._input_base
+            segment = self._input[start:start + (idx[-1] + 1 - first) * hop + n_fft]
+            frames = np.lib.stride_tricks.sliding_window_view(segment, n_fft)[::hop]
+            spectra = np.fft.rfft(frames * self._window, axis=1)
+            magnitudes = np.abs(spectra)
+            angles = np.angle(spectra)
+            left = idx - first
+            
+            magnitude = (1 - frac) * magnitudes[left] + frac * magnitudes[left + 1]
+            delta = angles[left + 1] - angles[left] - self._omega
+            delta -= two_pi * np.round(delta / two_pi)
+            advance = np.cumsum(self._omega + delta, axis=0, dtype=np.float64)
+            if self._phase is None:
+                self._phase = angles[0].astype(np.float64)
+            phases = np.mod(np.vstack([self._phase, self._phase + advance[:-1]]), two_pi).astype(np.float32)
+            self._phase = np.mod(self._phase + advance[-1], two_pi)
+            
+            synthesis = np.empty(magnitude.shape, dtype=np.complex64)
+            synthesis.real = magnitude * np.cos(phases)
+            synthesis.imag = magnitude * np.sin(phases)
+            grains = np.fft.irfft(synthesis, n=n_fft, axis=1) * self._window
+            grains = grains.reshape(len(steps), self._overlap, hop)
+            
+            # Overlap-add in hop-sized rows
+            offset = self._step * hop - self._out_base
+            needed = offset + (len(steps) + self._overlap) * hop
+            if needed > len(self._out):
+                grow = needed - len(self._out)
+                self._out = np.concatenate([self._out, np.zeros(grow, dtype=np.float32)])
+                self._norm = np.concatenate([self._norm, np.zeros(grow, dtype=np.float32)])
+            rows = self._out[offset:needed].reshape(-1, hop)
+            norm_rows = self._norm[offset:needed].reshape(-1, hop)
+            for segment_index in range(self._overlap):
+                rows[segment_index:segment_index + len(steps)] += grains[:, segment_index]
+                norm_rows[segment_index:segment_index + len(steps)] += self._window_sq[segment_index]
+            self._step = int(steps[-1]) + 1
+            # Samples before the next grain's start can no longer change
+            pieces.append(self._emit(self._step * hop))
+        
+        # Drop input no longer needed by the next step
+        keep = int(self._step * self.rate) * hop - self._input_base
+        if keep > 0:
+            self._input = self._input[keep:]
+            self._input_base += keep
+        return pieces
+    
+    def _emit(self, upto: int) -> np.ndarray:
+        """Return normalised output up to synthesis index ``upto``."""
+        count = upto - self._out_base
+        out = self._out[:count]
+        norm = self._norm[:count]
+        ready = np.divide(out, norm, out=np.zeros_like(out), where=norm > 1e-6)
+        self._out = self._out[count:]
+        self._norm = self._norm[count:]
+        # The first half-frame of synthesis output is centring padding
+        skip = max(self._half - self._out_base, 0)
+        self._out_base = upto
+        ready = ready[skip:]
+        self._emitted += len(ready)
+        return ready
+    
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.ndim != 1:
+            raise ValueError(f"TimeStretcher takes mono samples, got shape {chunk.shape}")
+        self._input = np.concatenate([self._input, chunk])
+        self._received += len(chunk)
+        n_frames = 1 + (self._input_base + len(self._input) - self.n_fft) // self.hop
+        if n_frames < 2:
+            return np.zeros(0, dtype=np.float32)
+        pieces = self._synthesise(self._steps_ready(n_frames))
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    
+    def flush(self) -> np.ndarray:
+        tail = np.zeros(self._half + self.hop, dtype=np.float32)
+        self._input = np.concatenate([self._input, tail])
+        n_frames = 1 + (self._input_base + len(self._input) - self.n_fft) // self.hop
+        remaining = int(round(self._received * self.factor)) - self._emitted
+        pieces = self._synthesise(self._steps_ready(n_frames))
+        pieces.append(self._emit(self._out_base + len(self._out)))
+        return fit_length(np.concatenate(pieces), max(remaining, 0))
 
 
-def change_pitch(audio_data: np.ndarray, sample_rate: int, semitones: float) -> np.ndarray:
+class StreamingResampler:
+    """
+    Polyphase resampler by ``up``/``down`` that accepts audio in chunks.
+    
+    Uses the same Kaiser FIR and zero-phase alignment as
+    ``scipy.signal.resample_poly``, so feeding a clip in any chunking gives
+    the resample_poly result (computed in float32) and the same length.
+    """
+    
+    def __init__(self, up: int, down: int, block: int = STREAM_BLOCK) -> None:
+        common = gcd(up, down)
+        self.up = up // common
+        self.down = down // common
+        self.block = block
+        self._half_len = 10 * max(self.up, self.down)
+        self._filter = resample_filter(self.up, self.down) * np.float32(self.up)
+        self._taps = -(-len(self._filter) // self.up)
+        # Zeros standing in for the samples before the clip
+        self._buffer = np.zeros(self._taps, dtype=np.float32)
+        self._base = -self._taps
+        self._received = 0
+        self._next = 0
+    
+    def _emit(self, stop: int) -> np.ndarray:
+        # Output n is sum_j x[j] * h[n * down + half_len - j * up]; each block
+        # runs upfirdn over just the inputs it needs, with the filter delayed
+        # so the block's first output lands on an upfirdn output sample.
+        pieces = []
+        while self._next < stop:
+            first = self._next
+            last = min(first + self.block, stop) - 1
+            lo = (first * self.down + self._half_len) // self.up - self._taps + 1
+            hi = (last * self.down + self._half_len) // self.up + 1
+            offset = self._half_len - lo * self.up
+            delay = -offset % self.down
+            taps = np.concatenate([np.zeros(delay, dtype=np.float32), self._filter])
+            out = signal.upfirdn(taps, self._buffer[lo - self._base:hi - self._base], self.up, self.down)
+            start = first + (offset + delay) // self.down
+            pieces.append(out[start:start + last - first + 1])
+            self._next = last + 1
+        oldest = (self._next * self.down + self._half_len) // self.up - self._taps + 1 - self._base
+        if oldest > 0:
+            self._buffer = self._buffer[oldest:]
+            self._base += oldest
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        self._buffer = np.concatenate([self._buffer, np.asarray(chunk, dtype=np.float32)])
+        self._received += len(chunk)
+        # Output n needs input up to (n * down + half_len) // up
+        stop = -(-(self._received * self.up - self._half_len) // self.down)
+        return self._emit(max(stop, self._next))
+    
+    def flush(self) -> np.ndarray:
+        total = -(-self._received * self.up // self.down)
+        last = ((total - 1) * self.down + self._half_len) // self.up
+        missing = last + 1 - (self._base + len(self._buffer))
+        if missing > 0:
+            self._buffer = np.concatenate([self._buffer, np.zeros(missing, dtype=np.float32)])
+        return self._emit(total)
+
+
+class Gain:
+    """Streaming gain stage in dB."""
+    
+    def __init__(self, gain_db: float) -> None:
+        self.scale = np.float32(10 ** (gain_db / 20.0))
+    
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        return chunk * self.scale
+    
+    def flush(self) -> np.ndarray:
+        return np.zeros(0, dtype=np.float32)
+
+
+class FixedLength:
+    """Streaming stage that trims or zero-pads the stream to ``length`` frames."""
+    
+    def __init__(self, length: int, channels: int = 1) -> None:
+        self.length = length
+        self._shape = () if channels == 1 else (channels,)
+        self._seen = 0
+    
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        keep = max(min(len(chunk), self.length - self._seen), 0)
+        self._seen += len(chunk)
+        return chunk[:keep]
+    
+    def flush(self) -> np.ndarray:
+        return np.zeros((max(self.length - self._seen, 0),) + self._shape, dtype=np.float32)
+
+
+class PerChannel:
+    """Run one mono stage per column of (frames, channels) chunks."""
+    
+    def __init__(self, stages: list) -> None:
+        self.stages = stages
+    
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        return np.column_stack([stage.process(chunk[:, index]) for index, stage in enumerate(self.stages)])
+    
+    def flush(self) -> np.ndarray:
+        return np.column_stack([stage.flush() for stage in self.stages])
+
+
+def build_stages(
+    length: int,
+    speed: float | None = None,
+    pitch_shift: float | None = None,
+    gain_db: float | None = None,
+    channels: int = 1,
+) -> list:
+    """
+    Streaming stages for speed, pitch and gain on a clip of ``length`` frames.
+    
+    Speed is a plain resample (as change_speed) and pitch is a time stretch
+    plus resample (as change_pitch); when both are set the two resamples are
+    fused into one at the combined ratio. With ``channels`` > 1 the stages
+    take (frames, channels) chunks and stretch/resample each channel apart.
+    """
+    def _each_channel(make):
+        return make() if channels == 1 else PerChannel([make() for _ in range(channels)])
+    
+    stages: list = []
+    ratio = speed if speed and speed != 1.0 else 1.0
+    out_length = length
+    if ratio != 1.0:
+        up, down = resample_ratio(ratio)
+        out_length = -(-length * up // down)
+    if pitch_shift:
+        pitch_factor = 2 ** (pitch_shift / 12.0)
+        stages.append(_each_channel(lambda: TimeStretcher(pitch_factor)))
+        ratio *= pitch_factor
+    if ratio != 1.0:
+        up, down = resample_ratio(ratio)
+        stages.append(_each_channel(lambda: StreamingResampler(up, down)))
+    if pitch_shift:
+        stages.append(FixedLength(out_length, channels))
+    if gain_db:
+        stages.append(Gain(gain_db))
+    return stages
+
+
+def run_stages(stages: list, chunk: np.ndarray, final: bool = False) -> np.ndarray:
+    """Push one chunk through every stage; with ``final`` also flush them."""
+    for stage in stages:
+        chunk = stage.process(chunk)
+        if final:
+            tail = stage.flush()
+            if len(tail):
+                chunk = np.concatenate([chunk, tail])
+    return chunk
+
+
+def time_stretch(audio_data: np.ndarray, factor: float) -> np.ndarray:
+    """
+    Stretch audio in time without changing pitch (phase vocoder).
+    
+    Args:
+        audio_data: Mono samples or a (frames, channels) array
+        factor: Length multiplier (2.0 = twice as long)
+    
+    Returns:
+        Float32 samples, round(len(audio_data) * factor) long
+    """
+    if audio_data.ndim > 1:
+        return np.column_stack([time_stretch(audio_data[:, channel], factor) for channel in range(audio_data.shape[1])])
+    stretcher = TimeStretcher(factor)
+    return np.concatenate([stretcher.process(audio_data), stretcher.flush()])
+
+
+def fit_length(audio_data: np.ndarray, length: int) -> np.ndarray:
+    """Trim or zero-pad audio (mono or (frames, channels)) to exactly ``length`` frames."""
+    if len(audio_data) >= length:
+        return audio_data[:length]
+    return np.pad(audio_data, [(0, length - len(audio_data))] + [(0, 0)] * (audio_data.ndim - 1))
+
+
+def change_pitch(
+    audio_data: np.ndarray,
+    sample_rate: int,
+    semitones: float,
+    method: str = "vocoder",
+) -> np.ndarray:
     """
     Change audio pitch by shifting frequency.
     
+    The default "vocoder" method time-stretches by the pitch ratio with a
+    block-based phase vocoder and then resamples once (polyphase) back to the
+    original length. The "fft" method is the original double FFT resample.
+    
     Args:
         audio_data: Audio samples as numpy array
         sample_rate: Sample rate
         semitones: Number of semitones to shift (+2 = higher, -2 = lower)
+        method: "vocoder" (default) or "fft"
     
     Returns:
-        Modified audio data
+        Float32 audio data on the int16 scale
     """
+    audio_data = np.asarray(audio_data, dtype=np.float32)
     # Calculate pitch shift ratio
     pitch_factor = 2 ** (semitones / 12.0)
     
-    # Resample to shift pitch
-    new_length = int(len(audio_data) / pitch_factor)
-    shifted = signal.resample(audio_data, new_length)
+    if method == "fft":
+        # Resample to shift pitch
+        new_length = int(len(audio_data) / pitch_factor)
+        shifted = signal.resample(audio_data, new_length)
+        
+        # Resample back to original length to maintain speed
+        final = signal.resample(shifted, len(audio_data))
+    elif method == "vocoder":
+        stretched = time_stretch(audio_data, pitch_factor)
+        final = fit_length(resample(stretched, *resample_ratio(pitch_factor)), len(audio_data))
+    else:
+        raise ValueError(f"Unknown pitch-shift method: {method}")
     
-    # Resample back to original length to maintain speed
-    final = signal.resample(shifted, len(audio_data))
+    return final.astype(np.float32, copy=False)
+
+
+def stream_process_file(
+    input_path: Path,
+    output_path: Path,
+    speed: float | None = None,
+    pitch_shift: float | None = None,
+    gain_db: float | None = None,
+    block_size: int = STREAM_BLOCK,
+) -> None:
+    """
+    Apply speed/pitch/gain to a 16-bit PCM WAV block by block.
+    
+    Reads ``block_size`` frames at a time, pushes them through the streaming
+    stages and writes the result as it becomes final, so peak memory depends
+    on the block size, not on the clip length.
     
-    return final.astype(np.int16)
+    Raises:
+        ValueError: If the file is not 16-bit PCM
+    """
+    with wave.open(str(input_path), "rb") as src:
+        if src.getsampwidth() != 2:
+            raise ValueError(f"Streaming needs 16-bit PCM: {input_path}")
+        channels = src.getnchannels()
+        shape = (-1,) if channels == 1 else (-1, channels)
+        stages = build_stages(src.getnframes(), speed, pitch_shift, gain_db, channels)
+        with wave.open(str(output_path), "wb") as dst:
+            dst.setnchannels(channels)
+            dst.setsampwidth(2)
+            dst.setframerate(src.getframerate())
+            dither = Dither()
+            while True:
+                raw = src.readframes(block_size)
+                if not raw:
+                    break
+                chunk = np.frombuffer(raw, dtype="<i2").astype(np.float32).reshape(shape)
+                dst.writeframes(dither(run_stages(stages, chunk)).astype("<i2").tobytes())
+            tail = run_stages(stages, np.zeros(0, dtype=np.float32).reshape(shape), final=True)
+            dst.writeframes(dither(tail).astype("<i2").tobytes())
+
+
+def _is_pcm16(path: Path) -> bool:
+    try:
+        with wave.open(str(path), "rb") as wav:
+            return wav.getsampwidth() == 2
+    except (wave.Error, EOFError):
+        return False
 
 
 def process_audio_file(
     input_path: Path,
     output_path: Path,
     speed: float | None = None,
-    pitch_shift: float | None = None
+    pitch_shift: float | None = None,
+    gain_db: float | None = None,
+    verbose: bool = True,
 ) -> None:
     """
-    Process a WAV file with speed and/or pitch adjustments.
+    Process a WAV file with speed, pitch and/or gain adjustments.
+    
+    16-bit PCM (Index-TTS output is mono) is streamed block by block; other
+    formats are loaded whole.
     
     Args:
         input_path: Path to input WAV file
         output_path: Path to save modified WAV file
         speed: Speed multiplier (e.g., 0.95 for 5% slower)
         pitch_shift: Semitones to shift pitch (e.g., -2 for 2 semitones lower)
+        gain_db: Gain in dB (e.g., -3 for quieter)
+        verbose: Print each step (off for pool workers)
     """
-    # Read audio file
-    sample_rate, audio_data = wavfile.read(str(input_path))
+    if verbose:
+        if speed and speed != 1.0:
+            print(f"  Adjusting speed: {speed}x")
+        if pitch_shift and pitch_shift != 0:
+            print(f"  Shifting pitch: {pitch_shift:+.1f} semitones")
+        if gain_db:
+            print(f"  Gain: {gain_db:+.1f} dB")
     
-    # Ensure 16-bit PCM
-    if audio_data.dtype != np.int16:
-        audio_data = (audio_data * 32767).astype(np.int16)
+    if _is_pcm16(input_path):
+        stream_process_file(input_path, output_path, speed, pitch_shift, gain_db)
+        if verbose:
+            print(f"  ✓ Saved: {output_path}")
+        return
+    
+    # Read audio file; everything below stays float32 until the final write
+    sample_rate, audio_data = wavfile.read(str(input_path))
+    audio_data = to_float32(audio_data)
     
     # Apply speed change
     if speed and speed != 1.0:
-        print(f"  Adjusting speed: {speed}x")
         audio_data, sample_rate = change_speed(audio_data, sample_rate, speed)
     
     # Apply pitch shift
     if pitch_shift and pitch_shift != 0:
-        print(f"  Shifting pitch: {pitch_shift:+.1f} semitones")
         audio_data = change_pitch(audio_data, sample_rate, pitch_shift)
     
-    # Write output file
-    wavfile.write(str(output_path), sample_rate, audio_data)
-    print(f"  ✓ Saved: {output_path}")
+    if gain_db:
+        audio_data = audio_data * np.float32(10 ** (gain_db / 20.0))
+    
+    # Write output file (single dithered quantization)
+    wavfile.write(str(output_path), sample_rate, to_pcm16(audio_data))
+    if verbose:
+        print(f"  ✓ Saved: {output_path}")
+
+
+def adjustment_params(
+    speed: float | None = None,
+    pitch_shift: float | None = None,
+    gain_db: float | None = None,
+) -> dict[str, float]:
+    """Normalised parameter dict; neutral settings are left out."""
+    params: dict[str, float] = {}
+    if speed and speed != 1.0:
+        params["speed"] = float(speed)
+    if pitch_shift:
+        params["pitch_shift"] = float(pitch_shift)
+    if gain_db:
+        params["gain_db"] = float(gain_db)
+    return params
+
+
+class AdjustManifest:
+    """
+    Record of which adjustments were applied to each WAV, by content hash.
+    
+    Entries are keyed by file name and hold the digest of the unadjusted
+    audio (a copy is kept in RAW_DIR), the digest of the adjusted file and
+    the params used. A file whose digest matches its recorded output with the
+    same params is already done; with different params it is re-rendered from
+    the raw copy instead of being adjusted twice. Any other digest means the
+    file was (re)generated and is treated as raw.
+    """
+    
+    def __init__(self, path: Path = MANIFEST_PATH) -> None:
+        self.path = path
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            self._entries = json.loads(path.read_text(encoding="utf-8"))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def plan(self, wav_path: Path, params: dict[str, float]) -> str:
+        """Return "skip", "process" (file is raw), "reprocess" or "restore"."""
+        entry = self._entries.get(wav_path.name)
+        if entry and entry["output"] == file_digest(wav_path):
+            if entry["params"] == params:
+                return "skip"
+            return "reprocess" if params else "restore"
+        return "process" if params else "skip"
+    
+    def record(self, name: str, raw: str, output: str, params: dict[str, float]) -> None:
+        self._entries[name] = {"raw": raw, "output": output, "params": params}
+    
+    def forget(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def follow(self, name: str, before: str, after: str) -> None:
+        """Track a later in-place stage (e.g. normalize_audio) that turned ``before`` into ``after``."""
+        entry = self._entries.get(name)
+        if entry and entry["output"] == before:
+            entry["output"] = after
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def adjust_file(
+    wav_path: Path,
+    params: dict[str, float],
+    action: str = "process",
+    raw_dir: Path = RAW_DIR,
+) -> tuple[str, str, str]:
+    """
+    Adjust one WAV in place, atomically.
+    
+    "process" first saves the file to ``raw_dir``; "reprocess" renders from
+    that saved copy; "restore" puts the saved copy back unchanged.
+    
+    Returns:
+        Tuple of (file name, raw digest, output digest)
+    """
+    raw_copy = raw_dir / wav_path.name
+    if action == "process":
+        raw_dir.mkdir(parents=True, exist_ok=True)
+        tmp_raw = raw_copy.with_name(raw_copy.name + ".tmp")
+        shutil.copyfile(wav_path, tmp_raw)
+        os.replace(tmp_raw, raw_copy)
+    elif not raw_copy.exists():
+        raise FileNotFoundError(f"Unadjusted copy missing, re-synthesize instead: {raw_copy}")
+    
+    tmp_out = wav_path.with_name(f"{wav_path.stem}_adjusted.wav")
+    if action == "restore":
+        shutil.copyfile(raw_copy, tmp_out)
+    else:
+        process_audio_file(raw_copy, tmp_out, verbose=False, **params)
+    os.replace(tmp_out, wav_path)
+    return wav_path.name, file_digest(raw_copy), file_digest(wav_path)
+
+
+def adjust_batch(
+    jobs: list[tuple[Path, dict[str, float]]],
+    workers: int | None = None,
+    manifest: AdjustManifest | None = None,
+    raw_dir: Path = RAW_DIR,
+) -> Counter:
+    """
+    Apply per-file params to many WAVs on a process pool.
+    
+    Files already adjusted with the same params are skipped, so re-running a
+    batch is a no-op. The manifest is saved every 100 files and at the end.
+    
+    Args:
+        jobs: (wav path, adjustment_params) pairs
+        workers: Worker processes (default: os.cpu_count()); 1 runs inline
+        manifest: Manifest to consult and update (default: MANIFEST_PATH)
+        raw_dir: Where unadjusted copies are kept
+    
+    Returns:
+        Counter of actions taken ("process", "reprocess", "restore", "skip", "failed")
+    """
+    if manifest is None:
+        manifest = AdjustManifest()
+    workers = workers or os.cpu_count() or 1
+    counts: Counter = Counter()
+    tasks = []
+    for wav_path, params in jobs:
+        action = manifest.plan(wav_path, params)
+        if action == "skip":
+            counts["skip"] += 1
+        else:
+            tasks.append((wav_path, params, action))
+    
+    def _done(wav_path: Path, params: dict[str, float], action: str, result: tuple[str, str, str]) -> None:
+        name, raw, output = result
+        if action == "restore":
+            manifest.forget(name)
+        else:
+            manifest.record(name, raw, output, params)
+        counts[action] += 1
+        if sum(counts.values()) % 100 == 0:
+            manifest.save()
+    
+    try:
+        if workers == 1:
+            for wav_path, params, action in tasks:
+                try:
+                    _done(wav_path, params, action, adjust_file(wav_path, params, action, raw_dir))
+                except Exception as exc:
+                    print(f"  ⚠️ {wav_path.name}: {exc}")
+                    counts["failed"] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(adjust_file, wav_path, params, action, raw_dir): (wav_path, params, action)
+                    for wav_path, params, action in tasks
+                }
+                for future in as_completed(futures):
+                    wav_path, params, action = futures[future]
+                    try:
+                        _done(wav_path, params, action, future.result())
+                    except Exception as exc:
+                        print(f"  ⚠️ {wav_path.name}: {exc}")
+                        counts["failed"] += 1
+    finally:
+        manifest.save()
+    return counts
 
 
 def main():
     """Process audio files based on voices.json configuration."""
-    import json
-    import csv
+    parser = argparse.ArgumentParser(description="Apply speed/pitch/gain adjustments to generated WAVs")
+    parser.add_argument("strref", nargs="?", help="Single StrRef to adjust with --speed/--pitch/--gain")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--speaker", help="Adjust every line of a speaker using voices.json settings")
+    mode.add_argument("--batch", type=Path, help="Adjust every line in a CSV using voices.json settings")
+    parser.add_argument("--speed", type=float, help="Speed multiplier (single StrRef mode)")
+    parser.add_argument("--pitch", type=float, help="Pitch shift in semitones (single StrRef mode)")
+    parser.add_argument("--gain", type=float, help="Gain in dB (single StrRef mode)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
     
-    if len(sys.argv) < 2:
-        print("Usage: python adjust_audio.py <strref> [--speed 0.95] [--pitch -2]")
-        print("   OR: python adjust_audio.py --speaker <SpeakerName>")
-        print("   OR: python adjust_audio.py --batch <csv_file>")
+    if not args.strref and not args.speaker and not args.batch:
+        parser.print_help()
         sys.exit(1)
     
     # Load voices.json to get speaker configurations
@@ -113,93 +825,54 @@ def main():
         voices = json.load(f)
     
     build_dir = ROOT / "build" / "OGG"
+    jobs: list[tuple[Path, dict[str, float]]] = []
     
-    # Parse arguments
-    mode = sys.argv[1]
-    
-    if mode == "--speaker":
+    if args.speaker:
         # Process all files for a specific speaker
-        speaker = sys.argv[2]
+        speaker = args.speaker
         voice_config = voices.get(speaker, {})
-        
-        speed = voice_config.get("speed")
-        pitch_shift = voice_config.get("pitch_shift")
-        
-        if not speed and not pitch_shift:
-            print(f"No speed or pitch_shift configured for {speaker}")
-            sys.exit(0)
+        params = adjustment_params(voice_config.get("speed"), voice_config.get("pitch_shift"))
         
         print(f"Processing all files for speaker: {speaker}")
-        print(f"  Speed: {speed if speed else 'unchanged'}")
-        print(f"  Pitch: {pitch_shift if pitch_shift else 'unchanged'}")
+        print(f"  Speed: {params.get('speed', 'unchanged')}")
+        print(f"  Pitch: {params.get('pitch_shift', 'unchanged')}")
         
         # Find all lines for this speaker
         lines_csv = ROOT / "data" / "chapter1_lines.csv"
         with open(lines_csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            count = 0
-            for row in reader:
+            for row in csv.DictReader(f):
                 if row['Speaker'] == speaker:
-                    strref = row['StrRef']
-                    input_file = build_dir / f"{strref}.wav"
+                    input_file = build_dir / f"{row['StrRef']}.wav"
                     if input_file.exists():
-                        output_file = build_dir / f"{strref}_adjusted.wav"
-                        print(f"\n{strref}: {row['Text'][:60]}...")
-                        process_audio_file(input_file, output_file, speed, pitch_shift)
-                        # Replace original with adjusted
-                        output_file.replace(input_file)
-                        count += 1
-        
-        print(f"\n✅ Processed {count} files for {speaker}")
+                        jobs.append((input_file, params))
     
-    elif mode == "--batch":
+    elif args.batch:
         # Process files from a CSV
-        csv_file = Path(sys.argv[2])
-        print(f"Processing batch from: {csv_file}")
-        
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                speaker = row['Speaker']
-                strref = row['StrRef']
-                voice_config = voices.get(speaker, {})
-                
-                speed = voice_config.get("speed")
-                pitch_shift = voice_config.get("pitch_shift")
-                
-                if speed or pitch_shift:
-                    input_file = build_dir / f"{strref}.wav"
-                    if input_file.exists():
-                        output_file = build_dir / f"{strref}_adjusted.wav"
-                        print(f"\n{speaker} - {strref}: {row['Text'][:60]}...")
-                        process_audio_file(input_file, output_file, speed, pitch_shift)
-                        output_file.replace(input_file)
+        print(f"Processing batch from: {args.batch}")
+        with open(args.batch, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                voice_config = voices.get(row['Speaker'], {})
+                if not isinstance(voice_config, dict):
+                    voice_config = {}
+                params = adjustment_params(voice_config.get("speed"), voice_config.get("pitch_shift"))
+                input_file = build_dir / f"{row['StrRef']}.wav"
+                if input_file.exists():
+                    jobs.append((input_file, params))
     
     else:
         # Process single file with manual parameters
-        strref = sys.argv[1]
-        
-        # Parse optional arguments
-        speed = None
-        pitch_shift = None
-        
-        for i, arg in enumerate(sys.argv[2:], start=2):
-            if arg == "--speed" and i + 1 < len(sys.argv):
-                speed = float(sys.argv[i + 1])
-            elif arg == "--pitch" and i + 1 < len(sys.argv):
-                pitch_shift = float(sys.argv[i + 1])
-        
-        input_file = build_dir / f"{strref}.wav"
-        output_file = build_dir / f"{strref}_adjusted.wav"
-        
+        input_file = build_dir / f"{args.strref}.wav"
         if not input_file.exists():
             print(f"File not found: {input_file}")
             sys.exit(1)
-        
-        print(f"Processing: {strref}")
-        process_audio_file(input_file, output_file, speed, pitch_shift)
-        output_file.replace(input_file)
-        print(f"✅ Done!")
+        print(f"Processing: {args.strref}")
+        jobs.append((input_file, adjustment_params(args.speed, args.pitch, args.gain)))
+    
+    counts = adjust_batch(jobs, workers=args.workers)
+    print(f"\n✅ Adjusted {counts['process']} new, re-rendered {counts['reprocess']}, "
+          f"restored {counts['restore']}, unchanged {counts['skip']}")
+    if counts["failed"]:
+        print(f"⚠️ {counts['failed']} files failed")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""
+Benchmark the post-processing helpers in adjust_audio.py.
+
+Uses synthetic harmonic test tones (no game audio needed) at our 22050 Hz
+output rate, including prime sample counts, which are the worst case for
+FFT-based resampling. Speed quality is measured as SNR against the
+analytically sped-up signal, ignoring a short margin at each edge; pitch
+quality as the measured fundamental against the target, plus a check that two
+runs give identical samples. The precision test compares the old int16-after-every-stage data
+flow with the float32 chain (time, peak traced memory, and quantization error
+against the unquantized result); the file test compares whole-clip processing
+with the block-streaming path by time and peak traced memory.
+
+Usage:
+    python scripts/utils/benchmark_audio.py
+    python scripts/utils/benchmark_audio.py --seconds 2 60 --speed 0.9 --semitones 3 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+from scipy import signal
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from adjust_audio import (  # type: ignore[import]
+    change_pitch,
+    change_speed,
+    fit_length,
+    resample_ratio,
+    stream_process_file,
+    time_stretch,
+    to_pcm16,
+)
+
+SAMPLE_RATE = 22050
+# Voice-like fundamental with a few harmonics (Hz, amplitude)
+PARTIALS = ((110.0, 0.40), (220.0, 0.20), (330.0, 0.12), (1210.0, 0.06), (2750.0, 0.03))
+EDGE_SECONDS = 0.05
+
+
+def is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    factor = 3
+    while factor * factor <= n:
+        if n % factor == 0:
+            return False
+        factor += 2
+    return True
+
+
+def next_prime(n: int) -> int:
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def tone(length: int, rate_scale: float = 1.0) -> np.ndarray:
+    """Harmonic test tone sampled at ``rate_scale`` times normal speed."""
+    t = np.arange(length, dtype=np.float64) * rate_scale / SAMPLE_RATE
+    out = np.zeros(length, dtype=np.float64)
+    for freq, amp in PARTIALS:
+        out += amp * np.sin(2 * np.pi * freq * t)
+    return out
+
+
+def snr_db(result: np.ndarray, reference: np.ndarray) -> float:
+    edge = int(EDGE_SECONDS * SAMPLE_RATE)
+    length = min(len(result), len(reference)) - edge
+    if length <= edge:
+        return float("nan")
+    signal_part = reference[edge:length]
+    noise = result[edge:length].astype(np.float64) - signal_part
+    return 10 * np.log10(np.sum(signal_part ** 2) / max(np.sum(noise ** 2), 1e-20))
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_speed(lengths: list[int], speed: float, repeat: int) -> None:
+    print(f"\n⏩ change_speed (speed={speed})")
+    print(f"   {'samples':>10} {'prime':>5} {'method':>6} {'time ms':>9} {'SNR dB':>7}")
+    for length in lengths:
+        clip = (tone(length) * 32767).astype(np.int16)
+        for method in ("fft", "poly"):
+            elapsed = best_time(lambda: change_speed(clip, SAMPLE_RATE, speed, method=method), repeat)
+            result, _ = change_speed(clip, SAMPLE_RATE, speed, method=method)
+            reference = tone(len(result), rate_scale=speed) * 32767
+            print(
+                f"   {length:>10} {'yes' if is_prime(length) else 'no':>5} {method:>6} "
+                f"{elapsed * 1000:>9.1f} {snr_db(result, reference):>7.1f}"
+            )
+
+
+def peak_frequency(clip: np.ndarray) -> float:
+    """Frequency (Hz) of the strongest spectral peak, i.e. the fundamental here."""
+    spectrum = np.abs(np.fft.rfft(clip.astype(np.float64) * np.hanning(len(clip))))
+    return float(np.argmax(spectrum)) * SAMPLE_RATE / len(clip)
+
+
+def bench_pitch(lengths: list[int], semitones: float, repeat: int) -> None:
+    target = PARTIALS[0][0] * 2 ** (semitones / 12.0)
+    print(f"\n🎚️ change_pitch (semitones={semitones:+g}, target fundamental {target:.1f} Hz)")
+    print(f"   {'samples':>10} {'prime':>5} {'method':>7} {'time ms':>9} {'peak Hz':>8} {'stable':>6}")
+    for length in lengths:
+        clip = (tone(length) * 32767).astype(np.int16)
+        for method in ("fft", "vocoder"):
+            elapsed = best_time(lambda: change_pitch(clip, SAMPLE_RATE, semitones, method=method), repeat)
+            first = change_pitch(clip, SAMPLE_RATE, semitones, method=method)
+            stable = np.array_equal(first, change_pitch(clip, SAMPLE_RATE, semitones, method=method))
+            print(
+                f"   {length:>10} {'yes' if is_prime(length) else 'no':>5} {method:>7} "
+                f"{elapsed * 1000:>9.1f} {peak_frequency(first):>8.1f} {'yes' if stable else 'NO':>6}"
+            )
+
+
+def whole_file(input_path: Path, output_path: Path, speed: float, semitones: float) -> None:
+    """In-memory reference: load, change_speed, change_pitch, write."""
+    sample_rate, audio = wavfile.read(str(input_path))
+    audio, sample_rate = change_speed(audio, sample_rate, speed)
+    wavfile.write(str(output_path), sample_rate, to_pcm16(change_pitch(audio, sample_rate, semitones)))
+
+
+def peak_memory(func: Callable[[], object]) -> tuple[float, float]:
+    """Run ``func`` once; return (seconds, peak traced MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def bench_stream(minutes: list[float], speed: float, semitones: float) -> None:
+    print(f"\n🌊 File processing, speed={speed} + pitch {semitones:+g} (peak traced memory)")
+    print(f"   {'minutes':>7} {'mode':>6} {'time ms':>9} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "in.wav"
+        target = Path(tmp) / "out.wav"
+        for length in minutes:
+            wavfile.write(str(source), SAMPLE_RATE, (tone(int(length * 60 * SAMPLE_RATE)) * 32767).astype(np.int16))
+            for mode, func in (
+                ("whole", lambda: whole_file(source, target, speed, semitones)),
+                ("stream", lambda: stream_process_file(source, target, speed, semitones)),
+            ):
+                elapsed, peak = peak_memory(func)
+                print(f"   {length:>7g} {mode:>6} {elapsed * 1000:>9.1f} {peak:>8.1f}")
+
+
+def int16_chain(clip: np.ndarray, speed: float, semitones: float) -> np.ndarray:
+    """The pre-float32 data flow: float64 stages truncated back to int16 after each."""
+    up, down = resample_ratio(speed)
+    audio = signal.resample_poly(clip, up, down).astype(np.int16)
+    factor = 2 ** (semitones / 12.0)
+    stretched = time_stretch(audio, factor).astype(np.float64)
+    up, down = resample_ratio(factor)
+    return fit_length(signal.resample_poly(stretched, up, down), len(audio)).astype(np.int16)
+
+
+def float32_chain(clip: np.ndarray, speed: float, semitones: float) -> np.ndarray:
+    """Current data flow: float32 throughout, one dithered int16 conversion."""
+    audio, _ = change_speed(clip, SAMPLE_RATE, speed)
+    return to_pcm16(change_pitch(audio, SAMPLE_RATE, semitones))
+
+
+def bench_precision(length: int, speed: float, semitones: float) -> None:
+    print(f"\n🔢 In-memory chain, speed={speed} + pitch {semitones:+g} on {length} samples")
+    print(f"   {'chain':>8} {'time ms':>9} {'peak MB':>8} {'bias LSB':>9} {'err RMS LSB':>12}")
+    clip = (tone(length) * 32767).astype(np.int16)
+    sped, _ = change_speed(clip, SAMPLE_RATE, speed)
+    reference = change_pitch(sped, SAMPLE_RATE, semitones).astype(np.float64)
+    for name, chain in (("int16", int16_chain), ("float32", float32_chain)):
+        elapsed, peak = peak_memory(lambda: chain(clip, speed, semitones))
+        error = chain(clip, speed, semitones).astype(np.float64) - reference
+        print(f"   {name:>8} {elapsed * 1000:>9.1f} {peak:>8.1f} {error.mean():>9.3f} {np.sqrt(np.mean(error ** 2)):>12.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark adjust_audio.py post-processing")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2.0, 10.0, 60.0], help="Clip lengths to test")
+    parser.add_argument("--speed", type=float, default=0.95, help="Speed factor (default: 0.95)")
+    parser.add_argument("--semitones", type=float, default=-2.0, help="Pitch shift (default: -2)")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1.0, 10.0], help="File lengths for the streaming test")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; best time is reported")
+    args = parser.parse_args()
+
+    lengths: list[int] = []
+    for seconds in args.seconds:
+        length = int(seconds * SAMPLE_RATE)
+        lengths.extend([length, next_prime(length)])
+
+    bench_speed(lengths, args.speed, args.repeat)
+    bench_pitch(lengths, args.semitones, args.repeat)
+    bench_precision(lengths[-2], args.speed, args.semitones)
+    bench_stream(args.minutes, args.speed, args.semitones)
+
+
+if __name__ == "__main__":
+    main()
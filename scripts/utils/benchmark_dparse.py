@@ -0,0 +1,143 @@
+"""
+Benchmark the bg2vo.dparse lexer against the regex scans it replaced.
+
+The legacy side runs SAY_PATTERN (build_complete_lines_db.py) and
+VOICED_PATTERN (filter_unvoiced_lines.py) over each file, as those scripts
+did. The lexer side is bg2vo.dparse.parse_text. Synthetic corpora (no game
+files needed):
+
+- export: Near Infinity style states, as in "BG2 Files/Dialog Files"
+- weidu: hand-written WeiDU with CHAIN, INTERJECT_COPY_TRANS, multi-SAY
+  and ``++`` replies, which the regexes do not see
+- malformed: unterminated comments, stray brackets and a long whitespace tail
+
+For each one the table shows size, time, MB/s and lines found, and for
+``export`` whether the lexer's SAY lines equal the regex matches. --dir adds
+a real directory of .D files.
+
+Usage:
+    python scripts/utils/benchmark_dparse.py
+    python scripts/utils/benchmark_dparse.py --states 20000 --repeat 5
+    python scripts/utils/benchmark_dparse.py --dir "BG2 Files/Dialog Files"
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.dparse import parse_text  # type: ignore[import-not-found]
+
+# The patterns as they were in build_complete_lines_db.py and filter_unvoiced_lines.py
+SAY_PATTERN = re.compile(
+    r'\bSAY\s+#(\d+)\s+/\*\s*~([^~]*)~\s*(?:\[([A-Z0-9_]+)\])?\s*\*/',
+    re.DOTALL
+)
+VOICED_PATTERN = re.compile(r'\bSAY\s+#(\d+)\s+/\*[^*]*\[([A-Z0-9_]+)\]\s*\*/', re.DOTALL)
+
+
+def export_corpus(states: int) -> str:
+    parts = ["// creator  : Near Infinity\nBEGIN ~IMOEN2~\n\n"]
+    for state in range(states):
+        sound = f" [IMOEN{state % 97}]" if state % 3 == 0 else ""
+        parts.append(
+            f'IF ~Global("Chapter","GLOBAL",{state % 7})~ THEN BEGIN {state} // from: {state - 1}.0\n'
+            f"  SAY #{10000 + state} /* ~Line {state}, spoken with some words.~{sound} */\n"
+            f"  IF ~~ THEN REPLY #{50000 + state} /* ~A reply.~ */ GOTO {state + 1}\n"
+            f"  IF ~~ THEN EXTERN ~JAHEIRAJ~ {state % 11}\n"
+            "END\n\n"
+        )
+    return "".join(parts)
+
+
+def weidu_corpus(states: int) -> str:
+    parts = ["BEGIN ~IMOEN2~\n"]
+    for state in range(states):
+        strref = 10000 + 10 * state
+        parts.append(
+            f"IF ~~ THEN BEGIN s{state}\n"
+            f"  SAY #{strref} /* ~One.~ [IM{state}] */ = #{strref + 1} /* ~Two.~ */\n"
+            f"  ++ #{strref + 2} /* ~Reply.~ */ + s{state + 1}\n"
+            "END\n"
+            f'CHAIN IF ~Global("c{state}","GLOBAL",1)~ THEN IMOEN2 c{state}\n'
+            f"  #{strref + 3} /* ~Imoen.~ */\n"
+            f"  == JAHEIRJ #{strref + 4} /* ~Jaheira.~ [JA{state}] */\n"
+            f"  = #{strref + 5}\n"
+            "EXIT\n"
+            f"INTERJECT_COPY_TRANS MINSC {state}\n"
+            f"  == MINSCJ #{strref + 6} /* ~Boo!~ */\n"
+            "END\n"
+        )
+    return "".join(parts)
+
+
+def malformed_corpus(states: int) -> str:
+    parts = ["BEGIN ~BROKEN~\n"]
+    for state in range(states):
+        parts.append(f"IF ~~ THEN BEGIN {state}\n  SAY #{state} /* ~Line {state} [a [b [c\n")
+        parts.append(f"  SAY #{state}      \n" + "[x " * 20 + "\nEND\n")
+    parts.append(" " * 10000)
+    return "".join(parts)
+
+
+def legacy_scan(content: str) -> tuple[list[tuple[int, str, str]], dict[int, str]]:
+    says = [(int(m.group(1)), m.group(2).strip(), m.group(3) or "") for m in SAY_PATTERN.finditer(content)]
+    voiced = {int(m.group(1)): m.group(2) for m in VOICED_PATTERN.finditer(content)}
+    return says, voiced
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(name: str, content: str, repeat: int, check: bool = False) -> None:
+    size_mb = len(content.encode("utf-8")) / 1e6
+    legacy_time = best_time(lambda: legacy_scan(content), repeat)
+    lexer_time = best_time(lambda: parse_text(content, name), repeat)
+    says, voiced = legacy_scan(content)
+    statements = parse_text(content, name)
+    lexer_says = [s for s in statements if s.kind == "SAY"]
+    lexer_voiced = {s.strref: s.sound for s in lexer_says if s.sound}
+
+    print(f"\n{name} ({size_mb:.2f} MB)")
+    print(f"   regex  {legacy_time * 1000:8.1f} ms  {size_mb / legacy_time:6.1f} MB/s  "
+          f"{len(says):6} SAY  {len(voiced):6} voiced")
+    print(f"   lexer  {lexer_time * 1000:8.1f} ms  {size_mb / lexer_time:6.1f} MB/s  "
+          f"{len(lexer_says):6} SAY  {len(lexer_voiced):6} voiced  {len(statements) - len(lexer_says):6} REPLY")
+    if check:
+        same = [(s.strref, s.text, s.sound) for s in lexer_says] == says and lexer_voiced == voiced
+        print(f"   {'✅' if same else '❌'} SAY lines {'match' if same else 'differ from'} the regex scan")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the .D lexer against the legacy regex scans")
+    parser.add_argument("--states", type=int, default=5000, help="States per synthetic corpus (default: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3)")
+    parser.add_argument("--dir", type=Path, help="Also benchmark every .D file in this directory")
+    args = parser.parse_args()
+
+    print("📊 .D parsing: legacy SAY_PATTERN + VOICED_PATTERN vs bg2vo.dparse lexer")
+    run("export", export_corpus(args.states), args.repeat, check=True)
+    run("weidu", weidu_corpus(args.states // 2), args.repeat)
+    run("malformed", malformed_corpus(args.states), args.repeat)
+    if args.dir:
+        directory = args.dir if args.dir.is_absolute() else ROOT / args.dir
+        content = "\n".join(
+            path.read_text(encoding="utf-8", errors="ignore") for path in sorted(directory.glob("*.D"))
+        )
+        run(directory.name, content, args.repeat, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,24 @@ from __future__ import annotations
 
 import csv
 import re
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.chapters import ChapterResolver  # type: ignore[import-not-found]
+from bg2vo.dparse import DIndex  # type: ignore[import-not-found]
+from bg2vo.speakers import SpeakerResolver  # type: ignore[import-not-found]
+from bg2vo.tlk import TlkIndex  # type: ignore[import-not-found]
+
 DIALOG_DIR = ROOT / "BG2 Files" / "Dialog Files"
 DIALOG_TRA = ROOT / "BG2 Files" / "dialog.tra"
 OUTPUT_CSV = ROOT / "data" / "all_lines.csv"
 
-# Match: SAY #12345 /* ~text~ [WAVFILE] */ or SAY #12345 /* ~text~ */
-SAY_PATTERN = re.compile(
-    r'\bSAY\s+#(\d+)\s+/\*\s*~([^~]*)~\s*(?:\[([A-Z0-9_]+)\])?\s*\*/',
-    re.DOTALL
-)
+# DLG file -> canonical character (Canonical/Aliases/DLGFiles in data/characters.csv)
+SPEAKERS = SpeakerResolver.from_csv()
 
 # Chapter assignment based on area codes (approximate)
 CHAPTER_AREAS = {
@@ -29,120 +34,88 @@ CHAPTER_AREAS = {
     # Add more chapter mappings as needed
 }
 
+# DLG file -> chapter (archive/data/dlg_chapter_map.csv)
+CHAPTERS = ChapterResolver.from_csv()
+
+# Fallback for files the chapter map leaves unassigned: Chapter 1 - Irenicus Dungeon.
+# Common companions (Aerie, Anomen, Edwin, ...) appear throughout and stay unassigned.
+CHAPTER1_PATTERN = re.compile(r'IMOEN10|JAHEIRA|MINSC|YOSHIMO|ILYICH|RIELEV|DRYAD')
+
 # Guess chapter from dialog file name
 def guess_chapter_from_filename(filename: str) -> Optional[int]:
-    """Guess chapter based on dialog filename patterns."""
-    name_upper = filename.upper()
-    
-    # Chapter 1 - Irenicus Dungeon
-    if any(x in name_upper for x in ['IMOEN10', 'JAHEIRA', 'MINSC', 'YOSHIMO', 'ILYICH', 'RIELEV', 'DRYAD']):
+    """Chapter from the DLG chapter map, else from dialog filename patterns."""
+    chapter = CHAPTERS.resolve(filename)
+    if chapter is not None:
+        return chapter
+    if CHAPTER1_PATTERN.search(filename.upper()):
         return 1
-    
-    # Common companions appear throughout, default to "Multiple"
-    if any(x in name_upper for x in ['AERIE', 'ANOMEN', 'EDWIN', 'VICONIA', 'KORGAN', 'KELDORN']):
-        return None  # Multiple chapters
-    
     return None
 
 
 def extract_speaker_from_filename(filename: str) -> str:
     """Extract likely speaker name from dialog filename."""
-    # Remove file extension
-    base = filename.upper().replace('.D', '')
-    
-    # Common character mappings
-    speaker_map = {
-        'IMOEN': 'Imoen',
-        'JAHEIRA': 'Jaheira',
-        'MINSC': 'Minsc',
-        'YOSHIMO': 'Yoshimo',
-        'AERIE': 'Aerie',
-        'ANOMEN': 'Anomen',
-        'EDWIN': 'Edwin',
-        'VICONIA': 'Viconia',
-        'KORGAN': 'Korgan',
-        'KELDORN': 'Keldorn',
-        'MAZZY': 'Mazzy',
-        'VALYGAR': 'Valygar',
-        'NALIA': 'Nalia',
-        'HAERDALIS': 'HaerDalis',
-        'CERND': 'Cernd',
-        'SAREVOK': 'Sarevok',
-        'ILYICH': 'Ilyich',
-        'RIELEV': 'Rielev',
-    }
-    
-    for key, value in speaker_map.items():
-        if key in base:
-            return value
+    speaker = SPEAKERS.resolve(filename)
+    if speaker is not None:
+        return speaker
     
+    base = filename.upper().replace('.D', '')
     # Return cleaned filename if no match
     return base.replace('PLAYER1', 'PC').replace('BIMOEN', 'Imoen')
 
 
-def scan_all_dialog_files() -> List[Dict[str, str]]:
-    """Scan all .D files and extract dialogue information."""
+def scan_all_dialog_files(workers: int | None = None) -> List[Dict[str, str]]:
+    """Scan all .D files and extract dialogue information.
+    
+    Parse results are cached per file in reports/d-index.sqlite
+    (bg2vo.dparse.DIndex); only added or changed files are reparsed.
+    """
     all_lines = []
     
     if not DIALOG_DIR.exists():
         print(f"❌ Dialog directory not found: {DIALOG_DIR}")
         return all_lines
     
-    d_files = sorted(DIALOG_DIR.glob("*.D"))
-    print(f"🔍 Scanning {len(d_files)} .D files...")
-    
-    for d_file in d_files:
-        try:
-            content = d_file.read_text(encoding="utf-8", errors="ignore")
-            speaker = extract_speaker_from_filename(d_file.stem)
-            chapter = guess_chapter_from_filename(d_file.stem)
-            
-            for match in SAY_PATTERN.finditer(content):
-                strref = match.group(1)
-                text = match.group(2).strip()
-                wav_ref = match.group(3) if match.group(3) else ''
-                
-                all_lines.append({
-                    'StrRef': strref,
-                    'Speaker': speaker,
-                    'Text': text,
-                    'Original_VO_WAV': wav_ref,
-                    'Generated_VO_WAV': '',  # Will be populated by synthesis
-                    'Chapter': str(chapter) if chapter else '',
-                    'DLG_File': d_file.stem
-                })
+    print(f"🔍 Scanning .D files in {DIALOG_DIR}...")
+    with DIndex() as index:
+        counts = index.update(DIALOG_DIR, workers)
+        parsed = index.statements(DIALOG_DIR)
+    print(f"   {counts['added']} added, {counts['changed']} changed, "
+          f"{counts['removed']} removed, {counts['unchanged']} unchanged")
+    
+    for d_file, statements in parsed.items():
+        chapter = guess_chapter_from_filename(d_file.stem)
         
-        except Exception as e:
-            print(f"⚠️ Error reading {d_file.name}: {e}")
-            continue
+        for statement in statements:
+            if statement.kind != 'SAY':
+                continue
+            all_lines.append({
+                'StrRef': str(statement.strref),
+                # CHAIN / INTERJECT lines name their own speaker's DLG
+                'Speaker': extract_speaker_from_filename(statement.dlg or d_file.stem),
+                'Text': statement.text,
+                'Original_VO_WAV': statement.sound,
+                'Generated_VO_WAV': '',  # Will be populated by synthesis
+                'Chapter': str(chapter) if chapter else '',
+                'DLG_File': d_file.stem
+            })
     
     return all_lines
 
 
-def load_dialog_tra() -> Dict[int, str]:
-    """Load text from dialog.tra file for StrRef lookup."""
-    text_map = {}
-    
+def load_dialog_tra(strrefs: Iterable[int]) -> Dict[int, str]:
+    """Look up StrRefs in dialog.tra through its cached index (bg2vo.tlk.TlkIndex)."""
     if not DIALOG_TRA.exists():
         print(f"⚠️ dialog.tra not found: {DIALOG_TRA}")
-        return text_map
+        return {}
     
     print(f"📖 Loading dialog.tra...")
     
     try:
-        content = DIALOG_TRA.read_text(encoding="utf-8", errors="ignore")
-        # Match: @12345 = ~text~
-        tra_pattern = re.compile(r'@(\d+)\s*=\s*~([^~]*)~', re.DOTALL)
-        
-        for match in tra_pattern.finditer(content):
-            strref = int(match.group(1))
-            text = match.group(2).strip()
-            text_map[strref] = text
-    
+        with TlkIndex.open(DIALOG_TRA) as tra_index:
+            return tra_index.get_many(strrefs)
     except Exception as e:
         print(f"⚠️ Error reading dialog.tra: {e}")
-    
-    return text_map
+        return {}
 
 
 def main():
@@ -157,15 +130,12 @@ def main():
     
     print(f"✅ Extracted {len(all_lines)} dialogue lines")
     
-    # Load dialog.tra for text lookup (if needed to fill missing text)
-    tra_text = load_dialog_tra()
-    
     # Fill in missing text from dialog.tra
-    for line in all_lines:
-        if not line['Text'] or line['Text'] == '':
-            strref = int(line['StrRef'])
-            if strref in tra_text:
-                line['Text'] = tra_text[strref]
+    missing = [line for line in all_lines if not line['Text']]
+    if missing:
+        tra_text = load_dialog_tra(int(line['StrRef']) for line in missing)
+        for line in missing:
+            line['Text'] = tra_text.get(int(line['StrRef']), line['Text'])
     
     # Sort by StrRef
     all_lines.sort(key=lambda x: int(x['StrRef']))
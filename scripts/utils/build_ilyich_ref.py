@@ -3,10 +3,14 @@ Build Ilyich voice reference from ElevenLabs generated audio.
 Ilyich is a duergar (evil dwarf) dungeon leader - gruff and aggressive.
 Using custom ElevenLabs voice sample.
 """
-import wave
 from pathlib import Path
+import sys
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.audio import wav_duration  # type: ignore[import-not-found]
+
 ELEVENLABS_SOURCE = ROOT / "BG2 Files" / "Character Samples from Elevenlabs" / "ilyic v3.mp3"
 OUTPUT = ROOT / "refs" / "ilyich_ref.wav"
 
@@ -23,12 +27,6 @@ def convert_mp3_to_wav(mp3_path: Path, wav_path: Path) -> None:
         audio, sr = librosa.load(str(mp3_path), sr=None)
         sf.write(str(wav_path), audio, sr)
 
-def get_duration(wav_path: Path) -> float:
-    with wave.open(str(wav_path), 'rb') as wf:
-        frames = wf.getnframes()
-        rate = wf.getframerate()
-        return frames / float(rate)
-
 def main():
     print("🎤 Building Ilyich Voice Reference")
     print(f"   Using ElevenLabs generated audio\n")
@@ -45,7 +43,7 @@ def main():
     print(f"   Converting MP3 to WAV...")
     convert_mp3_to_wav(ELEVENLABS_SOURCE, OUTPUT)
     
-    duration = get_duration(OUTPUT)
+    duration = wav_duration(OUTPUT)
     print(f"   Duration: {duration:.1f} seconds")
     print(f"\n✅ Ilyich reference ready at: refs/ilyich_ref.wav")
 
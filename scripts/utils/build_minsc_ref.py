@@ -4,9 +4,15 @@ Based on successful Jaheira reference approach: ~30 seconds, 5-8 diverse clips.
 """
 import wave
 from pathlib import Path
+import sys
 
 ROOT = Path(__file__).resolve().parents[2]
-BG2_AUDIO = ROOT / "BG2 Files"
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.audio import wav_duration  # type: ignore[import-not-found]
+from bg2vo.gameres import WavProvider  # type: ignore[import-not-found]
+
+WAV_PROVIDER = WavProvider()
 OUTPUT = ROOT / "refs" / "minsc_ref.wav"
 
 # Selected clips for Minsc's voice reference
@@ -25,20 +31,6 @@ SELECTED_CLIPS = [
     "MINSC10.WAV",
 ]
 
-def find_wav(filename: str) -> Path:
-    """Find WAV file in BG2 Files directory."""
-    matches = list(BG2_AUDIO.rglob(filename))
-    if not matches:
-        raise FileNotFoundError(f"Could not find {filename}")
-    return matches[0]
-
-def get_duration(wav_path: Path) -> float:
-    """Get duration of WAV file in seconds."""
-    with wave.open(str(wav_path), 'rb') as wf:
-        frames = wf.getnframes()
-        rate = wf.getframerate()
-        return frames / float(rate)
-
 def concatenate_wavs(wav_files: list[Path], output_path: Path) -> None:
     """Concatenate multiple WAV files into one."""
     # Read parameters from first file
@@ -54,7 +46,7 @@ def concatenate_wavs(wav_files: list[Path], output_path: Path) -> None:
                 output.writeframes(wf.readframes(wf.getnframes()))
     
     print(f"✅ Created: {output_path}")
-    print(f"   Duration: {get_duration(output_path):.1f} seconds")
+    print(f"   Duration: {wav_duration(output_path):.1f} seconds")
 
 def main():
     print("🎤 Building Minsc Voice Reference")
@@ -66,12 +58,12 @@ def main():
     
     for clip_name in SELECTED_CLIPS:
         try:
-            path = find_wav(clip_name)
-            duration = get_duration(path)
+            path = WAV_PROVIDER.path(clip_name)
+            duration = wav_duration(path)
             wav_paths.append(path)
             total_duration += duration
             print(f"   ✓ {clip_name:15} {duration:5.2f}s")
-        except FileNotFoundError as e:
+        except (FileNotFoundError, ValueError) as e:
             print(f"   ✗ {e}")
             return
     
@@ -4,14 +4,20 @@ Automatically extracts dialogue, voice characteristics, and recommendations for
 """
 import csv
 import re
+import sys
 from pathlib import Path
 from collections import Counter
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.gameres import WavProvider  # type: ignore[import-not-found]
+
 LINES_CSV = ROOT / "data" / "lines.csv"
 CHAPTER1_CSV = ROOT / "data" / "chapter1_lines.csv"
 VOICES_JSON = ROOT / "data" / "voices.json"
-BG2_AUDIO = ROOT / "BG2 Files"
+# Original clips: "BG2 Files" exports and, with $BG2_GAME_DIR set, the game itself
+WAV_PROVIDER = WavProvider()
 
 def analyze_dialogue_characteristics(lines: list[str]) -> dict:
     """Analyze dialogue to infer voice characteristics."""
@@ -89,12 +95,12 @@ def get_character_profile(speaker_name: str) -> dict:
     
     # Check for BG2 audio files
     search_patterns = [
-        f"{speaker_name.upper()}*.WAV",
-        f"{speaker_name.upper()[:6]}*.WAV",  # Truncated to 6 chars
+        f"{speaker_name.upper()}*",
+        f"{speaker_name.upper()[:6]}*",  # Truncated to 6 chars
     ]
     
     for pattern in search_patterns:
-        matches = list(BG2_AUDIO.rglob(pattern))
+        matches = WAV_PROVIDER.names(pattern)
         if matches:
             profile["audio_available"] = len(matches)
             break
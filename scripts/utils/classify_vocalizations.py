@@ -41,6 +41,13 @@ class VocalizationPattern:
     description: str          # Human-readable description
 
 
+# Short words that are always regular speech, never vocalizations
+# Bump when classify_text() logic changes so indexes built from it are rebuilt
+CLASSIFIER_VERSION = 1
+
+SPEECH_WORDS = frozenset(['i', 'a', 'the', 'is', 'it', 'to', 'in', 'of', 'and', 'or'])
+
+
 # Vocalization patterns ordered by specificity (most specific first)
 VOCALIZATION_PATTERNS: List[VocalizationPattern] = [
     # Action descriptions (explicit markers)
@@ -174,7 +181,7 @@ def classify_word(word: str) -> Optional[Dict]:
         return None
     
     # Skip words that are clearly regular speech
-    if normalized in ['i', 'a', 'the', 'is', 'it', 'to', 'in', 'of', 'and', 'or']:
+    if normalized in SPEECH_WORDS:
         return None
     
     # Try each pattern in order (most specific first)
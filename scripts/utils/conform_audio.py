@@ -0,0 +1,203 @@
+"""
+Bring WAVs to the game format declared in config and verify it from headers.
+
+The target is synthesis.sample_rate / bit_depth / channels in
+config/defaults.yaml (22050 Hz, 16-bit, mono). --check reads only the RIFF
+header of each file (bg2vo.audio.read_wav_header), so verifying thousands of
+clips takes seconds. Without --check, every file that does not conform is
+converted on a process pool: mixed down to mono, resampled with the polyphase
+filter from adjust_audio.py and written as dithered 16-bit PCM, atomically.
+
+Run it on build/OGG right after synthesis (before adjust_audio.py), or point
+it at game clips with --output-dir to leave the originals untouched.
+
+Usage:
+    python scripts/utils/conform_audio.py --check
+    python scripts/utils/conform_audio.py --workers 8
+    python scripts/utils/conform_audio.py --dir "BG2 Files/WAV Files" --output-dir build/game_wav
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import gcd
+from pathlib import Path
+
+import scipy.io.wavfile as wavfile
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.audio import read_wav_header  # type: ignore[import-not-found]
+from bg2vo.config import load_config  # type: ignore[import-not-found]
+from adjust_audio import AdjustManifest, file_digest, resample, to_float32, to_pcm16  # type: ignore[import]
+
+try:
+    settings = load_config()
+    OUT = Path(settings.outputs.get("ogg_dir", "build/OGG"))
+    SAMPLE_RATE = int(settings.synthesis.get("sample_rate", 22050))
+    BIT_DEPTH = int(settings.synthesis.get("bit_depth", 16))
+    CHANNELS = int(settings.synthesis.get("channels", 1))
+except Exception as exc:  # pragma: no cover - defensive fallback
+    print(f"⚠️ Config load failed ({exc}), using defaults")
+    OUT = Path("build/OGG")
+    SAMPLE_RATE, BIT_DEPTH, CHANNELS = 22050, 16, 1
+OUT = OUT if OUT.is_absolute() else ROOT / OUT
+
+
+def conform_file(input_path: Path, output_path: Path, sample_rate: int = SAMPLE_RATE) -> tuple[str, str]:
+    """
+    Convert one WAV to mono 16-bit PCM at ``sample_rate``, replacing ``output_path`` atomically.
+
+    Returns:
+        Tuple of (input digest, output digest)
+    """
+    before = file_digest(input_path)
+    source_rate, data = wavfile.read(str(input_path))
+    audio = to_float32(data)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if source_rate != sample_rate:
+        common = gcd(sample_rate, source_rate)
+        audio = resample(audio, sample_rate // common, source_rate // common)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}_conformed.wav")
+    wavfile.write(str(tmp_path), sample_rate, to_pcm16(audio))
+    os.replace(tmp_path, output_path)
+    return before, file_digest(output_path)
+
+
+def check_files(wav_paths: list[Path]) -> tuple[list[Path], dict[str, list[Path]]]:
+    """
+    Header-only conformance check.
+
+    Returns:
+        Tuple of (conforming paths, description -> non-conforming paths);
+        unreadable files are grouped under "unreadable: <reason>"
+    """
+    ok: list[Path] = []
+    bad: dict[str, list[Path]] = {}
+    for path in wav_paths:
+        try:
+            info = read_wav_header(path)
+        except (OSError, ValueError) as exc:
+            reason = str(exc).split(":")[0]
+            bad.setdefault(f"unreadable: {reason}", []).append(path)
+            continue
+        if info.conforms(SAMPLE_RATE, BIT_DEPTH, CHANNELS):
+            ok.append(path)
+        else:
+            bad.setdefault(info.describe(), []).append(path)
+    return ok, bad
+
+
+def conform_batch(
+    jobs: list[tuple[Path, Path]],
+    workers: int | None = None,
+    adjust_manifest: AdjustManifest | None = None,
+) -> Counter:
+    """
+    Convert (input, output) pairs on a process pool.
+
+    In-place conversions are reported to adjust_audio's manifest, if given,
+    so an already adjusted file is not mistaken for a fresh render.
+    """
+    workers = workers or os.cpu_count() or 1
+    counts: Counter = Counter()
+
+    def _done(input_path: Path, output_path: Path, digests: tuple[str, str]) -> None:
+        if adjust_manifest is not None and input_path == output_path:
+            adjust_manifest.follow(input_path.name, *digests)
+        counts["converted"] += 1
+
+    try:
+        if workers == 1:
+            for input_path, output_path in jobs:
+                try:
+                    _done(input_path, output_path, conform_file(input_path, output_path))
+                except Exception as exc:
+                    print(f"  ⚠️ {input_path.name}: {exc}")
+                    counts["failed"] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(conform_file, input_path, output_path): (input_path, output_path)
+                    for input_path, output_path in jobs
+                }
+                for future in as_completed(futures):
+                    input_path, output_path = futures[future]
+                    try:
+                        _done(input_path, output_path, future.result())
+                    except Exception as exc:
+                        print(f"  ⚠️ {input_path.name}: {exc}")
+                        counts["failed"] += 1
+    finally:
+        if adjust_manifest is not None:
+            adjust_manifest.save()
+    return counts
+
+
+def _is_stale(source: Path, target: Path) -> bool:
+    return not target.exists() or target.stat().st_mtime < source.stat().st_mtime
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"Conform WAVs to {SAMPLE_RATE} Hz / {BIT_DEPTH}-bit / {CHANNELS} ch")
+    parser.add_argument("--dir", type=Path, default=OUT, help="Directory of WAVs (default: build/OGG)")
+    parser.add_argument("--output-dir", type=Path, help="Write converted files here instead of in place")
+    parser.add_argument("--check", action="store_true", help="Only verify headers, convert nothing")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if BIT_DEPTH != 16 or CHANNELS != 1:
+        print(f"❌ Only 16-bit mono output is supported, config asks for {BIT_DEPTH}-bit / {CHANNELS} ch")
+        sys.exit(1)
+
+    source_dir = args.dir if args.dir.is_absolute() else ROOT / args.dir
+    wav_paths = sorted(path for path in source_dir.glob("*") if path.suffix.lower() == ".wav")
+    print(f"🔍 Checking {len(wav_paths)} headers in {source_dir}")
+    ok, bad = check_files(wav_paths)
+    print(f"   ✅ {len(ok)} conform ({SAMPLE_RATE} Hz, {BIT_DEPTH}-bit PCM, {CHANNELS} ch)")
+    for description, paths in sorted(bad.items(), key=lambda item: -len(item[1])):
+        examples = ", ".join(path.name for path in paths[:3])
+        print(f"   ❌ {len(paths)} × {description}  (e.g. {examples})")
+
+    if args.check:
+        sys.exit(1 if bad else 0)
+
+    output_dir = None
+    if args.output_dir:
+        output_dir = args.output_dir if args.output_dir.is_absolute() else ROOT / args.output_dir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        # Conforming files are copied as is so the output directory is complete
+        for path in ok:
+            if _is_stale(path, output_dir / path.name):
+                shutil.copy2(path, output_dir / path.name)
+
+    jobs = [
+        (path, (output_dir or source_dir) / path.name)
+        for description, paths in bad.items()
+        if not description.startswith("unreadable")
+        for path in paths
+    ]
+    if output_dir:
+        jobs = [(path, target) for path, target in jobs if _is_stale(path, target)]
+    if not jobs:
+        print("\n✅ Nothing to convert")
+        return
+
+    print(f"\n🔄 Converting {len(jobs)} files")
+    adjust_manifest = AdjustManifest() if output_dir is None and source_dir == OUT else None
+    counts = conform_batch(jobs, workers=args.workers, adjust_manifest=adjust_manifest)
+    print(f"\n✅ Converted {counts['converted']} files")
+    if counts["failed"]:
+        print(f"⚠️ {counts['failed']} files failed")
+
+
+if __name__ == "__main__":
+    main()
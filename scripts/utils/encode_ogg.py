@@ -0,0 +1,187 @@
+"""
+Encode rendered WAVs to Ogg Vorbis for shipping.
+
+build/OGG holds uncompressed 16-bit WAV; this stage encodes each file to
+build/vorbis/<strref>.ogg with libsndfile (via soundfile) on a process pool.
+Vorbis quality runs from 0.0 (smallest) to 1.0 (best), like oggenc's -q/10,
+and defaults to post_processing.vorbis_quality in config/defaults.yaml.
+
+Encoding is incremental: reports/encode-manifest.json records the WAV and Ogg
+digests and the quality of every file, and only new or changed WAVs (or a new
+quality) are re-encoded. deploy.py ships an .ogg only when this manifest says
+it was encoded from the WAV's current content (bg2vo.audio.EncodeManifest.encodes).
+
+Usage:
+    python scripts/utils/encode_ogg.py
+    python scripts/utils/encode_ogg.py --chapter 1 --quality 0.5
+    python scripts/utils/encode_ogg.py --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.audio import EncodeManifest, file_digest  # type: ignore[import-not-found]
+from bg2vo.config import load_config  # type: ignore[import-not-found]
+from adjust_audio import STREAM_BLOCK  # type: ignore[import]
+
+try:
+    import soundfile as sf  # type: ignore
+except ImportError:  # pragma: no cover - soundfile optional until encoding
+    sf = None
+
+DEFAULT_QUALITY = 0.4
+
+try:
+    settings = load_config()
+    OUT = Path(settings.outputs.get("ogg_dir", "build/OGG"))
+    VORBIS_DIR = Path(settings.outputs.get("vorbis_dir", "build/vorbis"))
+    QUALITY = float(settings.post_processing.get("vorbis_quality", DEFAULT_QUALITY))
+except Exception as exc:  # pragma: no cover - defensive fallback
+    print(f"⚠️ Config load failed ({exc}), using defaults")
+    OUT = Path("build/OGG")
+    VORBIS_DIR = Path("build/vorbis")
+    QUALITY = DEFAULT_QUALITY
+OUT = OUT if OUT.is_absolute() else ROOT / OUT
+VORBIS_DIR = VORBIS_DIR if VORBIS_DIR.is_absolute() else ROOT / VORBIS_DIR
+
+
+def encode_file(wav_path: Path, ogg_path: Path, quality: float) -> dict:
+    """
+    Encode one WAV to Ogg Vorbis, block by block, replacing ``ogg_path`` atomically.
+
+    Returns:
+        Manifest entry: wav/ogg digests and sizes, quality
+    """
+    with sf.SoundFile(str(wav_path)) as source:
+        ogg_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = ogg_path.with_name(ogg_path.name + ".tmp")
+        # libsndfile maps compression level 0 to Vorbis quality 1.0
+        with sf.SoundFile(
+            str(tmp_path), "w", samplerate=source.samplerate, channels=source.channels,
+            format="OGG", subtype="VORBIS", compression_level=1.0 - quality,
+        ) as target:
+            for block in source.blocks(blocksize=STREAM_BLOCK, dtype="float32"):
+                target.write(block)
+    os.replace(tmp_path, ogg_path)
+    return {
+        "wav": file_digest(wav_path),
+        "ogg": file_digest(ogg_path),
+        "wav_bytes": wav_path.stat().st_size,
+        "ogg_bytes": ogg_path.stat().st_size,
+        "quality": quality,
+    }
+
+
+def encode_batch(
+    wav_paths: list[Path],
+    quality: float,
+    out_dir: Path = VORBIS_DIR,
+    workers: int | None = None,
+    manifest: EncodeManifest | None = None,
+) -> tuple[Counter, int, int]:
+    """
+    Encode many WAVs on a process pool, skipping those already up to date.
+
+    Returns:
+        Tuple of (Counter of "encoded"/"skip"/"failed", total WAV bytes,
+        total Ogg bytes) over every file that has an up-to-date .ogg
+    """
+    if manifest is None:
+        manifest = EncodeManifest()
+    workers = workers or os.cpu_count() or 1
+    counts: Counter = Counter()
+    tasks = []
+    for wav_path in wav_paths:
+        if manifest.is_current(wav_path, out_dir / f"{wav_path.stem}.ogg", quality):
+            counts["skip"] += 1
+        else:
+            tasks.append(wav_path)
+
+    def _done(wav_path: Path, entry: dict) -> None:
+        manifest.record(wav_path.name, entry)
+        counts["encoded"] += 1
+        if counts["encoded"] % 100 == 0:
+            manifest.save()
+
+    try:
+        if workers == 1:
+            for wav_path in tasks:
+                try:
+                    _done(wav_path, encode_file(wav_path, out_dir / f"{wav_path.stem}.ogg", quality))
+                except Exception as exc:
+                    print(f"  ⚠️ {wav_path.name}: {exc}")
+                    counts["failed"] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(encode_file, wav_path, out_dir / f"{wav_path.stem}.ogg", quality): wav_path
+                    for wav_path in tasks
+                }
+                for future in as_completed(futures):
+                    wav_path = futures[future]
+                    try:
+                        _done(wav_path, future.result())
+                    except Exception as exc:
+                        print(f"  ⚠️ {wav_path.name}: {exc}")
+                        counts["failed"] += 1
+    finally:
+        manifest.save()
+
+    wav_bytes = ogg_bytes = 0
+    for wav_path in wav_paths:
+        entry = manifest.get(wav_path.name)
+        if entry and entry["quality"] == quality:
+            wav_bytes += entry["wav_bytes"]
+            ogg_bytes += entry["ogg_bytes"]
+    return counts, wav_bytes, ogg_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Encode build/OGG WAVs to Ogg Vorbis")
+    parser.add_argument("--chapter", type=int, help="Only encode lines of data/chapterN_lines.csv")
+    parser.add_argument("--quality", type=float, default=QUALITY, help=f"Vorbis quality 0.0-1.0 (default: {QUALITY})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if sf is None or "OGG" not in sf.available_formats():
+        print("❌ soundfile with Ogg Vorbis support is required: pip install soundfile")
+        sys.exit(1)
+    if not 0.0 <= args.quality <= 1.0:
+        print(f"❌ Quality must be between 0.0 and 1.0, got {args.quality}")
+        sys.exit(1)
+
+    if args.chapter:
+        input_csv = ROOT / "data" / f"chapter{args.chapter}_lines.csv"
+        if not input_csv.exists():
+            print(f"❌ Input CSV not found: {input_csv}")
+            sys.exit(1)
+        with input_csv.open(encoding="utf-8-sig", newline="") as f:
+            wav_paths = [OUT / f"{row['StrRef']}.wav" for row in csv.DictReader(f)]
+        wav_paths = [path for path in wav_paths if path.exists()]
+    else:
+        wav_paths = sorted(OUT.glob("*.wav"))
+
+    print(f"🗜️ Encoding {len(wav_paths)} WAVs to Vorbis q{args.quality:g} in {VORBIS_DIR}")
+    counts, wav_bytes, ogg_bytes = encode_batch(wav_paths, args.quality, workers=args.workers)
+
+    print(f"\n✅ Encoded {counts['encoded']}, up to date {counts['skip']}")
+    if counts["failed"]:
+        print(f"⚠️ {counts['failed']} files failed")
+    if wav_bytes:
+        saved = wav_bytes - ogg_bytes
+        print(f"📦 {wav_bytes / 1e6:,.1f} MB WAV → {ogg_bytes / 1e6:,.1f} MB Vorbis "
+              f"(saved {saved / 1e6:,.1f} MB, {saved / wav_bytes:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,20 +14,27 @@ Workflow:
 Usage:
     python scripts/utils/extract_emotion_refs.py --character Jaheira
     python scripts/utils/extract_emotion_refs.py --character Minsc --auto-detect
+    python scripts/utils/extract_emotion_refs.py --character Minsc --game "E:/.../Baldur's Gate II Enhanced Edition"
 """
 
 import argparse
 import json
+import os
 import shutil
 from pathlib import Path
 from typing import Dict, List, Optional
 import subprocess
 
-# Add parent to path for imports
+# Add utils to path for imports
 import sys
-sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from scripts.utils.classify_vocalizations import VocalizationType, classify_text
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from bg2vo.audio import WavIndex
+from bg2vo.gameres import WavProvider
+from classify_vocalizations import VocalizationType
+from vocalization_index import VocalizationIndex
 
 
 class EmotionRefBuilder:
@@ -48,6 +55,11 @@ class EmotionRefBuilder:
         # Load existing mapping if present
         self.mapping_file = refs_path / "emotion_refs.json"
         self.mapping = self._load_mapping()
+        
+        # Precomputed classifications (scripts/utils/vocalization_index.py)
+        self.voc_index = VocalizationIndex()
+        
+        self.wav_index = WavIndex()
     
     def _load_mapping(self) -> Dict:
         """Load existing emotion reference mapping."""
@@ -63,17 +75,10 @@ class EmotionRefBuilder:
         print(f"\n[OK] Saved mapping to {self.mapping_file}")
     
     def _get_audio_duration(self, wav_path: Path) -> float:
-        """Get audio duration in seconds (requires ffprobe)."""
+        """Get audio duration in seconds from the cached RIFF header."""
         try:
-            result = subprocess.run(
-                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                 '-of', 'default=noprint_wrappers=1:nokey=1', str(wav_path)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return float(result.stdout.strip())
-        except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+            return self.wav_index.duration(wav_path)
+        except (OSError, ValueError):
             return 0.0
     
     def _play_audio(self, wav_path: Path):
@@ -91,7 +96,7 @@ class EmotionRefBuilder:
     def extract_for_character(
         self,
         character: str,
-        wav_dir: Path,
+        wavs: WavProvider,
         all_lines_csv: Path,
         characters_csv: Path,
         auto_detect: bool = False
@@ -101,7 +106,7 @@ class EmotionRefBuilder:
         
         Args:
             character: Character name (e.g., "Jaheira")
-            wav_dir: Directory containing original game WAV files
+            wavs: Original game clips (exported WAV files and/or the game install)
             all_lines_csv: Path to all_lines.csv with Original_VO_WAV column
             characters_csv: Path to characters.csv with character mapping
             auto_detect: Auto-detect vocalizations using classifier
@@ -128,14 +133,14 @@ class EmotionRefBuilder:
         
         # Process each voice file
         for original_vo_wav, (strref_int, text) in sorted(lines_map.items()):
-            # Find the corresponding WAV file
-            # Original_VO_WAV like "JAHEIR01", need to add .WAV extension
-            wav_file = wav_dir / f"{original_vo_wav}.WAV"
-            if not wav_file.exists():
-                # Try lowercase
-                wav_file = wav_dir / f"{original_vo_wav}.wav"
-                if not wav_file.exists():
-                    continue
+            # Original_VO_WAV is a resref like "JAHEIR01"
+            try:
+                wav_file = wavs.find(original_vo_wav)
+            except (OSError, ValueError) as e:
+                print(f"[!] {original_vo_wav}: {e}")
+                continue
+            if wav_file is None:
+                continue
             
             processed += 1
             emotion_type = None
@@ -143,7 +148,7 @@ class EmotionRefBuilder:
             
             # Auto-detect vocalization?
             if auto_detect:
-                voc_result = classify_text(text, min_confidence=0.7)
+                voc_result = self.voc_index.classify(str(strref_int), text, min_confidence=0.7)
                 if not voc_result or not voc_result.get('is_pure'):
                     skipped += 1
                     continue  # Skip non-vocalizations
@@ -341,6 +346,12 @@ def main():
         type=Path,
         help="Directory with original WAV files (default: BG2 Files/WAV Files)"
     )
+    parser.add_argument(
+        '--game',
+        type=Path,
+        default=os.environ.get("BG2_GAME_DIR"),
+        help="Game directory with chitin.key, for clips missing from --wav-dir (default: $BG2_GAME_DIR)"
+    )
     parser.add_argument(
         '--all-lines-csv',
         type=Path,
@@ -381,8 +392,8 @@ def main():
     characters_csv = args.characters_csv or (base_path / "data" / "characters.csv")
     
     # Validate paths
-    if not wav_dir.exists():
-        print(f"[X] WAV directory not found: {wav_dir}")
+    if not wav_dir.exists() and args.game is None:
+        print(f"[X] WAV directory not found: {wav_dir} (pass --game to read clips from the game)")
         return
     if not all_lines_csv.exists():
         print(f"[X] Lines CSV not found: {all_lines_csv}")
@@ -392,13 +403,20 @@ def main():
         return
     
     # Extract references
-    builder.extract_for_character(
-        args.character,
-        wav_dir,
-        all_lines_csv,
-        characters_csv,
-        auto_detect=args.auto_detect
-    )
+    try:
+        wavs = WavProvider(game_dir=args.game, export_dir=wav_dir)
+        wavs.resources  # open chitin.key up front so a bad --game fails here
+    except (OSError, ValueError) as e:
+        print(f"[X] Cannot read game resources: {e}")
+        return
+    with wavs:
+        builder.extract_for_character(
+            args.character,
+            wavs,
+            all_lines_csv,
+            characters_csv,
+            auto_detect=args.auto_detect
+        )
     
     # Create generic fallbacks
     builder.create_generic_fallbacks()
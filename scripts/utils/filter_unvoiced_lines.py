@@ -6,40 +6,28 @@ Creates a new CSV with only unvoiced lines.
 from __future__ import annotations
 
 import csv
-import re
+import sys
 from pathlib import Path
 from typing import Dict
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.dparse import parse_dir, voiced  # type: ignore[import-not-found]
+
 DIALOG_DIR = ROOT / "BG2 Files" / "Dialog Files"
 INPUT_CSV = ROOT / "data" / "chapter1_lines.csv"
 OUTPUT_CSV = ROOT / "data" / "chapter1_unvoiced.csv"
 OUTPUT_WITH_WAV = ROOT / "data" / "chapter1_with_wav_refs.csv"
 
-# Match: SAY #12345 /* ~text~ [WAVFILE] */
-VOICED_PATTERN = re.compile(r'\bSAY\s+#(\d+)\s+/\*[^*]*\[([A-Z0-9_]+)\]\s*\*/', re.DOTALL)
-
 
 def get_voiced_strrefs() -> Dict[int, str]:
     """Return dict mapping StrRef to WAV filename for lines with voice acting."""
-    voiced = {}
-    
     if not DIALOG_DIR.exists():
         print(f"⚠️ Dialog directory not found: {DIALOG_DIR}")
-        return voiced
-    
-    for d_file in DIALOG_DIR.glob("*.D"):
-        try:
-            content = d_file.read_text(encoding="utf-8", errors="ignore")
-            for match in VOICED_PATTERN.finditer(content):
-                strref = int(match.group(1))
-                wav_file = match.group(2)
-                voiced[strref] = wav_file
-        except Exception as e:
-            print(f"⚠️ Error reading {d_file.name}: {e}")
-            continue
+        return {}
     
-    return voiced
+    return voiced(parse_dir(DIALOG_DIR))
 
 
 def filter_unvoiced_lines() -> None:
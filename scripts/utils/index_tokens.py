@@ -0,0 +1,77 @@
+"""Build the sentence/token-count index used for synthesis planning.
+
+Sanitizes every line, records sentence boundaries and counts Index-TTS BPE
+tokens per line and per sentence into reports/token-index.json. Only the
+Index-TTS tokenizer is loaded (no GPT/acoustic model), so run it with the
+Index-TTS Python environment but expect it to finish quickly. Unchanged lines
+are reused; a new bpe.model invalidates the whole index.
+
+Usage:
+    python scripts/utils/index_tokens.py
+    python scripts/utils/index_tokens.py --input data/chapter1_unvoiced_only.csv
+    python scripts/utils/index_tokens.py --report 120   # list lines over 120 tokens
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.config import load_config  # type: ignore[import-not-found]
+from bg2vo.tokens import IndexTTSTokenizer, TokenIndex  # type: ignore[import-not-found]
+
+DEFAULT_INPUT = ROOT / "data" / "all_lines.csv"
+DEFAULT_INDEX = ROOT / "reports" / "token-index.json"
+
+try:
+    settings = load_config()
+    INDEX_TTS_ROOT = Path(settings.paths.get("index_tts_root", r"C:\\Users\\tenod\\source\\repos\\TTS\\index-tts"))
+    INDEX_TTS_CONFIG = settings.index_tts.get("config", str(INDEX_TTS_ROOT / "checkpoints" / "config.yaml"))
+except Exception as exc:  # pragma: no cover - defensive fallback
+    print(f"⚠️ Config load failed ({exc}), using defaults")
+    INDEX_TTS_ROOT = Path(r"C:\\Users\\tenod\\source\\repos\\TTS\\index-tts")
+    INDEX_TTS_CONFIG = str(INDEX_TTS_ROOT / "checkpoints" / "config.yaml")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Index sentence boundaries and Index-TTS token counts")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Lines CSV to index (default: data/all_lines.csv)")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="Index file (default: reports/token-index.json)")
+    parser.add_argument("--report", type=int, metavar="TOKENS", help="Only list indexed lines longer than TOKENS")
+    args = parser.parse_args()
+
+    if args.report is not None:
+        index = TokenIndex(args.index)
+        long_lines = sorted(index.over_limit(args.report), key=lambda line: -line.tokens)
+        print(f"📏 {len(long_lines)} of {len(index)} lines exceed {args.report} tokens")
+        for line in long_lines:
+            print(f"   {line.strref:>7}: {line.tokens:4d} tokens, {len(line.sentences)} sentences (longest {line.longest_sentence})")
+        return
+
+    if not args.input.exists():
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(1)
+
+    tokenizer = IndexTTSTokenizer.from_config(INDEX_TTS_ROOT, Path(INDEX_TTS_CONFIG))
+    index = TokenIndex(args.index, tokenizer.fingerprint)
+    if index.stale:
+        print("⚠️ Tokenizer changed since last build, re-indexing everything")
+
+    print(f"📄 Indexing {args.input}")
+    with open(args.input, "r", encoding="utf-8-sig", newline="") as f:
+        tokenized, reused = index.update(csv.DictReader(f), tokenizer)
+    index.save()
+
+    total = sum(line.tokens for line in index)
+    print(f"   Tokenized: {tokenized}")
+    print(f"   Reused:    {reused}")
+    print(f"   Indexed:   {len(index)} lines, {total:,} tokens")
+    print(f"✅ Saved {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,17 @@
 Listen to Imoen audio clips to select the best ones for voice reference.
 Run this to hear each clip and note which ones showcase her character best.
 """
-import wave
 from pathlib import Path
 import subprocess
 import sys
 
 ROOT = Path(__file__).resolve().parents[2]
-BG2_AUDIO = ROOT / "BG2 Files"
+sys.path.insert(0, str(ROOT / "src"))
 
-def find_wav(filename: str) -> Path:
-    """Find WAV file in BG2 Files directory."""
-    matches = list(BG2_AUDIO.rglob(filename))
-    if not matches:
-        raise FileNotFoundError(f"Could not find {filename}")
-    return matches[0]
+from bg2vo.audio import wav_duration  # type: ignore[import-not-found]
+from bg2vo.gameres import WavProvider  # type: ignore[import-not-found]
 
-def get_duration(wav_path: Path) -> float:
-    """Get duration of WAV file in seconds."""
-    with wave.open(str(wav_path), 'rb') as wf:
-        frames = wf.getnframes()
-        rate = wf.getframerate()
-        return frames / float(rate)
+WAV_PROVIDER = WavProvider()
 
 def play_clip(wav_path: Path):
     """Play audio clip using Windows default player."""
@@ -36,10 +26,15 @@ def main():
     print("Note which clips best showcase her cheery personality!\n")
     
     # Get all Imoen clips
-    clips = sorted(BG2_AUDIO.rglob("IMOEN*.WAV"))[:20]
+    clips = []
+    for name in WAV_PROVIDER.names("IMOEN*")[:20]:
+        try:
+            clips.append(WAV_PROVIDER.path(name))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"   ✗ {e}")
     
     for i, clip_path in enumerate(clips, 1):
-        duration = get_duration(clip_path)
+        duration = wav_duration(clip_path)
         print(f"\n[{i}/20] {clip_path.name:15} ({duration:.2f}s)")
         print(f"      Playing... ", end="", flush=True)
         
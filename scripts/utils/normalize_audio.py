@@ -0,0 +1,401 @@
+"""
+Trim silence and normalize loudness of generated lines, per speaker.
+
+Each WAV is cut into 10 ms frames whose energies are computed in one NumPy
+pass; leading/trailing frames below trim_threshold_db are trimmed down to
+trim_pad_ms of silence. The trimmed line is then brought to the speaker's
+loudness target, measured either as the RMS of its voiced frames (dBFS) or as
+ITU-R BS.1770 integrated loudness (K-weighted, gated, LUFS). Gain is capped so
+peaks stay under peak_ceiling_db.
+
+Defaults come from the post_processing section of config/defaults.yaml; a
+speaker's voices.json entry may set "loudness_target". Files are processed on
+a process pool and the gain and trim applied to each are recorded in
+reports/normalize-manifest.json, so re-running skips files that are already
+done with the same settings. Run it after adjust_audio.py.
+
+Usage:
+    python scripts/utils/normalize_audio.py --chapter 1
+    python scripts/utils/normalize_audio.py --input data/test_lines.csv --mode lufs --target -23
+    python scripts/utils/normalize_audio.py --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+from scipy import signal
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.config import load_config  # type: ignore[import-not-found]
+from adjust_audio import AdjustManifest, file_digest, to_float32, to_pcm16  # type: ignore[import]
+
+DEFAULT_INPUT = ROOT / "data" / "all_lines.csv"
+MANIFEST_PATH = ROOT / "reports" / "normalize-manifest.json"
+
+FRAME_MS = 10
+# Changes smaller than this are not worth a re-quantization
+MIN_GAIN_DB = 0.05
+
+# BS.1770 gating: 400 ms blocks with 75 % overlap, -70 LUFS absolute and -10 LU relative gates
+LUFS_BLOCK_S = 0.4
+LUFS_HOP_S = 0.1
+LUFS_ABSOLUTE_GATE = -70.0
+LUFS_RELATIVE_GATE = -10.0
+
+DEFAULT_OPTIONS = {
+    "trim_threshold_db": -45.0,
+    "trim_pad_ms": 150,
+    "loudness_mode": "rms",
+    "loudness_target": -20.0,
+    "peak_ceiling_db": -1.0,
+}
+
+try:
+    settings = load_config()
+    OUT = Path(settings.outputs.get("ogg_dir", "build/OGG"))
+    if not OUT.is_absolute():
+        OUT = ROOT / OUT
+    CONFIG_OPTIONS = {**DEFAULT_OPTIONS, **settings.post_processing}
+except Exception as exc:  # pragma: no cover - defensive fallback
+    print(f"⚠️ Config load failed ({exc}), using defaults")
+    OUT = ROOT / "build" / "OGG"
+    CONFIG_OPTIONS = dict(DEFAULT_OPTIONS)
+
+
+def frame_energies_db(audio: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> tuple[np.ndarray, int]:
+    """
+    Mean-square energy (dBFS) of consecutive frames of a mono float32 buffer.
+
+    Returns:
+        Tuple of (per-frame dB array, frame length in samples); a final partial
+        frame is ignored
+    """
+    frame = max(int(sample_rate * frame_ms / 1000), 1)
+    count = len(audio) // frame
+    frames = audio[:count * frame].reshape(count, frame) / np.float32(32768)
+    power = np.einsum("ij,ij->i", frames, frames) / frame
+    return 10 * np.log10(np.maximum(power, 1e-12)), frame
+
+
+def trim_bounds(energies_db: np.ndarray, frame: int, length: int, threshold_db: float, pad: int) -> tuple[int, int]:
+    """
+    Sample range to keep: first to last voiced frame, widened by ``pad``.
+
+    All-silent clips are kept whole, and cuts shorter than a frame are
+    skipped so a trimmed file trims to itself.
+    """
+    voiced = np.flatnonzero(energies_db > threshold_db)
+    if not voiced.size:
+        return 0, length
+    start = max(int(voiced[0]) * frame - pad, 0)
+    end = min((int(voiced[-1]) + 1) * frame + pad, length)
+    return (0 if start < frame else start), (length if length - end < frame else end)
+
+
+def voiced_rms_db(energies_db: np.ndarray, threshold_db: float) -> float:
+    """RMS level (dBFS) over the voiced frames only, so pauses don't lower it."""
+    voiced = energies_db[energies_db > threshold_db]
+    if not voiced.size:
+        return float("-inf")
+    return float(10 * np.log10(np.mean(10 ** (voiced / 10))))
+
+
+def _biquad(kind: str, freq: float, gain_db: float, q: float, sample_rate: int) -> np.ndarray:
+    k = np.tan(np.pi * freq / sample_rate)
+    den = [1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k]
+    if kind == "high_shelf":
+        high = 10 ** (gain_db / 20)
+        band = high ** 0.4996667741545416
+        b = [high + band * k / q + k * k, 2 * (k * k - high), high - band * k / q + k * k]
+    else:
+        # BS.1770 specifies the RLB high-pass numerator as exactly [1, -2, 1]
+        b = [den[0], -2 * den[0], den[0]]
+    return np.array([*b, *den]) / den[0]
+
+
+@lru_cache(maxsize=None)
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """
+    BS.1770 K-weighting pre-filter as second-order sections for any rate.
+
+    The standard only tabulates 48 kHz coefficients; these analog prototypes
+    (shelf and RLB high-pass) reproduce them there and carry over to 22050 Hz.
+    """
+    return np.vstack([
+        _biquad("high_shelf", 1681.974450955533, 3.999843853973347, 0.7071752369554196, sample_rate),
+        _biquad("high_pass", 38.13547087602444, 0.0, 0.5003270373238773, sample_rate),
+    ])
+
+
+def integrated_lufs(audio: np.ndarray, sample_rate: int) -> float:
+    """Gated integrated loudness (LUFS) of a mono float32 buffer on the int16 scale."""
+    weighted = signal.sosfilt(k_weighting(sample_rate), audio.astype(np.float64) / 32768)
+    block = int(LUFS_BLOCK_S * sample_rate)
+    if len(weighted) < block:
+        powers = np.array([np.mean(weighted ** 2)]) if len(weighted) else np.zeros(0)
+    else:
+        # Block mean squares from a running sum instead of one pass per block
+        cumulative = np.concatenate(([0.0], np.cumsum(weighted ** 2)))
+        starts = np.arange(0, len(weighted) - block + 1, int(LUFS_HOP_S * sample_rate))
+        powers = (cumulative[starts + block] - cumulative[starts]) / block
+    loudness = -0.691 + 10 * np.log10(np.maximum(powers, 1e-20))
+    gated = powers[loudness > LUFS_ABSOLUTE_GATE]
+    if not gated.size:
+        return float("-inf")
+    relative = -0.691 + 10 * np.log10(np.mean(gated)) + LUFS_RELATIVE_GATE
+    kept = powers[(loudness > LUFS_ABSOLUTE_GATE) & (loudness > relative)]
+    return float(-0.691 + 10 * np.log10(np.mean(kept)))
+
+
+def normalization_gain(level: float, target: float, peak: float, ceiling_db: float) -> tuple[float, bool]:
+    """
+    Gain (dB) that moves ``level`` to ``target`` without pushing the sample
+    ``peak`` (int16 scale) above ``ceiling_db``.
+
+    Returns:
+        Tuple of (gain in dB, whether the ceiling limited it)
+    """
+    if not np.isfinite(level) or peak <= 0:
+        return 0.0, False
+    gain = target - level
+    headroom = ceiling_db - 20 * np.log10(peak / 32768)
+    if gain > headroom:
+        return float(headroom), True
+    return float(gain), False
+
+
+def normalize_file(wav_path: Path, options: dict) -> dict:
+    """
+    Trim and normalize one WAV in place, atomically.
+
+    Multi-channel files are measured on their mono mix and trimmed and scaled
+    as a whole, so the channels stay aligned.
+
+    Files that need neither trimming nor a meaningful gain change are left
+    byte-identical instead of being re-quantized.
+
+    Returns:
+        Manifest entry: input/output digests, gain_db, trim_ms, loudness, limited
+    """
+    before = file_digest(wav_path)
+    sample_rate, data = wavfile.read(str(wav_path))
+    audio = to_float32(data)
+    mono = audio.mean(axis=1) if audio.ndim > 1 else audio
+
+    energies, frame = frame_energies_db(mono, sample_rate)
+    pad = int(options["trim_pad_ms"] * sample_rate / 1000)
+    start, end = trim_bounds(energies, frame, len(mono), options["trim_threshold_db"], pad)
+    trimmed = mono[start:end]
+
+    if options["loudness_mode"] == "lufs":
+        level = integrated_lufs(trimmed, sample_rate)
+    else:
+        level = voiced_rms_db(energies, options["trim_threshold_db"])
+    # Loudness is measured on the mix, but every channel must stay under the ceiling
+    peak = float(np.max(np.abs(audio[start:end]))) if end > start else 0.0
+    gain_db, limited = normalization_gain(level, options["loudness_target"], peak, options["peak_ceiling_db"])
+
+    entry = {
+        "input": before,
+        "gain_db": round(gain_db, 2),
+        "trim_ms": [round(start * 1000 / sample_rate), round((len(mono) - end) * 1000 / sample_rate)],
+        "loudness": round(level, 2) if np.isfinite(level) else None,
+        "limited": limited,
+    }
+    if abs(gain_db) < MIN_GAIN_DB and start == 0 and end == len(mono):
+        entry["gain_db"] = 0.0
+        entry["output"] = before
+        return entry
+
+    result = audio[start:end] * np.float32(10 ** (gain_db / 20))
+    tmp_out = wav_path.with_name(f"{wav_path.stem}_normalized.wav")
+    wavfile.write(str(tmp_out), sample_rate, to_pcm16(result))
+    os.replace(tmp_out, wav_path)
+    entry["output"] = file_digest(wav_path)
+    return entry
+
+
+class NormalizeManifest:
+    """
+    Record of the trim and gain applied to each WAV, by content hash.
+
+    A file whose digest matches its recorded output with the same options is
+    already normalized and skipped. Anything else (a new render, an
+    adjust_audio re-render, or changed options) is normalized again; since
+    trim and gain are measured from the audio, re-normalizing a normalized
+    file only moves it to the new settings.
+    """
+
+    def __init__(self, path: Path = MANIFEST_PATH) -> None:
+        self.path = path
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            self._entries = json.loads(path.read_text(encoding="utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_done(self, wav_path: Path, options: dict) -> bool:
+        entry = self._entries.get(wav_path.name)
+        return bool(entry) and entry["options"] == options and entry["output"] == file_digest(wav_path)
+
+    def record(self, name: str, entry: dict, options: dict) -> None:
+        self._entries[name] = {**entry, "options": options}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def speaker_options(voices: dict, speaker: str, overrides: dict) -> dict:
+    """Config defaults, then the speaker's voices.json target, then CLI overrides."""
+    options = {key: CONFIG_OPTIONS[key] for key in DEFAULT_OPTIONS}
+    voice_config = voices.get(speaker, {})
+    if isinstance(voice_config, dict) and voice_config.get("loudness_target") is not None:
+        options["loudness_target"] = float(voice_config["loudness_target"])
+    options.update(overrides)
+    return options
+
+
+def normalize_batch(
+    jobs: list[tuple[Path, str, dict]],
+    workers: int | None = None,
+    manifest: NormalizeManifest | None = None,
+    adjust_manifest: AdjustManifest | None = None,
+) -> tuple[Counter, dict[str, list[dict]]]:
+    """
+    Normalize many WAVs on a process pool.
+
+    Args:
+        jobs: (wav path, speaker, options) triples
+        workers: Worker processes (default: os.cpu_count()); 1 runs inline
+        manifest: Manifest to consult and update (default: MANIFEST_PATH)
+        adjust_manifest: adjust_audio's manifest, told about the new digests
+            so it does not mistake normalized files for fresh renders
+
+    Returns:
+        Tuple of (Counter of "normalized"/"unchanged"/"skip"/"failed",
+        speaker -> manifest entries written this run)
+    """
+    if manifest is None:
+        manifest = NormalizeManifest()
+    workers = workers or os.cpu_count() or 1
+    counts: Counter = Counter()
+    by_speaker: dict[str, list[dict]] = defaultdict(list)
+    tasks = []
+    for wav_path, speaker, options in jobs:
+        if manifest.is_done(wav_path, options):
+            counts["skip"] += 1
+        else:
+            tasks.append((wav_path, speaker, options))
+
+    def _done(wav_path: Path, speaker: str, options: dict, entry: dict) -> None:
+        manifest.record(wav_path.name, entry, options)
+        if adjust_manifest is not None:
+            adjust_manifest.follow(wav_path.name, entry["input"], entry["output"])
+        by_speaker[speaker].append(entry)
+        counts["unchanged" if entry["output"] == entry["input"] else "normalized"] += 1
+        if sum(counts.values()) % 100 == 0:
+            manifest.save()
+
+    try:
+        if workers == 1:
+            for wav_path, speaker, options in tasks:
+                try:
+                    _done(wav_path, speaker, options, normalize_file(wav_path, options))
+                except Exception as exc:
+                    print(f"  ⚠️ {wav_path.name}: {exc}")
+                    counts["failed"] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(normalize_file, wav_path, options): (wav_path, speaker, options)
+                    for wav_path, speaker, options in tasks
+                }
+                for future in as_completed(futures):
+                    wav_path, speaker, options = futures[future]
+                    try:
+                        _done(wav_path, speaker, options, future.result())
+                    except Exception as exc:
+                        print(f"  ⚠️ {wav_path.name}: {exc}")
+                        counts["failed"] += 1
+    finally:
+        manifest.save()
+        if adjust_manifest is not None:
+            adjust_manifest.save()
+    return counts, by_speaker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trim silence and normalize loudness of generated WAVs")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--chapter", type=int, help="Normalize lines of data/chapterN_lines.csv")
+    source.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Lines CSV (default: data/all_lines.csv)")
+    parser.add_argument("--mode", choices=["rms", "lufs"], help="Loudness measure (default: config)")
+    parser.add_argument("--target", type=float, help="Target dBFS/LUFS for every speaker (overrides voices.json)")
+    parser.add_argument("--threshold-db", type=float, help="Silence threshold in dBFS (default: config)")
+    parser.add_argument("--pad-ms", type=int, help="Silence kept at each end in ms (default: config)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    input_csv = ROOT / "data" / f"chapter{args.chapter}_lines.csv" if args.chapter else args.input
+    if not input_csv.exists():
+        print(f"❌ Input CSV not found: {input_csv}")
+        sys.exit(1)
+
+    overrides: dict = {}
+    if args.mode:
+        overrides["loudness_mode"] = args.mode
+    if args.target is not None:
+        overrides["loudness_target"] = args.target
+    if args.threshold_db is not None:
+        overrides["trim_threshold_db"] = args.threshold_db
+    if args.pad_ms is not None:
+        overrides["trim_pad_ms"] = args.pad_ms
+
+    voices_path = ROOT / "data" / "voices.json"
+    voices = json.loads(voices_path.read_text(encoding="utf-8")) if voices_path.exists() else {}
+
+    jobs: list[tuple[Path, str, dict]] = []
+    with input_csv.open(encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            wav_path = OUT / f"{row['StrRef']}.wav"
+            if wav_path.exists():
+                speaker = row.get("Speaker") or ""
+                jobs.append((wav_path, speaker, speaker_options(voices, speaker, overrides)))
+
+    print(f"🔊 Normalizing {len(jobs)} files from {input_csv.name}")
+    counts, by_speaker = normalize_batch(jobs, workers=args.workers, adjust_manifest=AdjustManifest())
+
+    if by_speaker:
+        print(f"\n   {'speaker':<20} {'files':>6} {'mean gain':>10} {'limited':>8} {'trimmed s':>10}")
+        for speaker, entries in sorted(by_speaker.items()):
+            gains = [entry["gain_db"] for entry in entries]
+            trimmed = sum(sum(entry["trim_ms"]) for entry in entries) / 1000
+            limited = sum(entry["limited"] for entry in entries)
+            print(f"   {speaker or '?':<20} {len(entries):>6} {np.mean(gains):>+9.1f}dB {limited:>8} {trimmed:>10.1f}")
+
+    print(f"\n✅ Normalized {counts['normalized']}, already at target {counts['unchanged']}, "
+          f"unchanged since last run {counts['skip']}")
+    if counts["failed"]:
+        print(f"⚠️ {counts['failed']} files failed")
+    print(f"📄 Gains recorded in {MANIFEST_PATH.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,11 @@ Plays audio files and helps you choose the clearest ones.
 
 import pathlib
 import subprocess
-import wave
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[2] / "src"))
+
+from bg2vo.audio import shared_index  # type: ignore[import-not-found]
 
 # Imoen's voice files identified from dialog.tra
 IMOEN_CANDIDATES = [
@@ -40,19 +44,14 @@ IMOEN_CANDIDATES = [
 def get_audio_info(wav_path):
     """Get duration and format info from WAV file."""
     try:
-        with wave.open(str(wav_path), 'rb') as wav:
-            frames = wav.getnframes()
-            rate = wav.getframerate()
-            duration = frames / float(rate)
-            channels = wav.getnchannels()
-            sampwidth = wav.getsampwidth()
-            return {
-                'duration': duration,
-                'sample_rate': rate,
-                'channels': channels,
-                'bit_depth': sampwidth * 8,
-                'exists': True
-            }
+        info = shared_index().get(wav_path)
+        return {
+            'duration': info.duration,
+            'sample_rate': info.sample_rate,
+            'channels': info.channels,
+            'bit_depth': info.bits_per_sample,
+            'exists': True
+        }
     except Exception as e:
         return {'exists': False, 'error': str(e)}
 
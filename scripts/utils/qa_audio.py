@@ -0,0 +1,257 @@
+"""
+Automated QA pass over generated lines: rank the renders worth a listen.
+
+Every WAV in build/OGG is memory-mapped from its RIFF data offset and
+measured block by block (only one block is converted to float32 at a time)
+for clipping ratio, silence ratio (10 ms frames under the post_processing
+trim threshold), peak, RMS and duration.
+Duration is compared with the duration expected from the sanitized text
+length at that speaker's median seconds per character, and duration and
+loudness are scored against the speaker's own lines with a robust z-score
+(median/MAD), so a slow-talking speaker is not flagged for being slow.
+
+Files are analyzed on a process pool; the ranked report goes to
+reports/audio-qa.csv and the worst lines are printed.
+
+Usage:
+    python scripts/utils/qa_audio.py --chapter 1
+    python scripts/utils/qa_audio.py --input data/test_lines.csv --top 50
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bg2vo.audio import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM, read_wav_header  # type: ignore[import-not-found]
+from bg2vo.text import sanitize  # type: ignore[import-not-found]
+from adjust_audio import to_float32  # type: ignore[import]
+from normalize_audio import CONFIG_OPTIONS, FRAME_MS, OUT, frame_energies_db  # type: ignore[import]
+
+DEFAULT_INPUT = ROOT / "data" / "all_lines.csv"
+REPORT_PATH = ROOT / "reports" / "audio-qa.csv"
+
+SILENCE_DB = float(CONFIG_OPTIONS["trim_threshold_db"])
+CLIP_LEVEL = 32767 * 0.999
+CLIP_RATIO = 0.0005  # ~11 clipped samples per second at 22050 Hz
+SILENCE_RATIO = 0.5
+NEAR_SILENT_DB = -35.0
+OUTLIER_Z = 3.5
+# Speakers with fewer lines are compared against the whole corpus
+MIN_SPEAKER_LINES = 5
+# Floor for the MAD so near-identical lines do not turn tiny differences into outliers
+MIN_MAD = 0.05
+# Energy frames per analysis block (~20 s of audio); blocks hold whole frames
+BLOCK_FRAMES = 2048
+
+MEMMAP_DTYPES = {
+    (WAVE_FORMAT_PCM, 8): np.uint8,
+    (WAVE_FORMAT_PCM, 16): np.dtype("<i2"),
+    (WAVE_FORMAT_PCM, 32): np.dtype("<i4"),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype("<f4"),
+}
+
+
+def map_samples(path: Path) -> tuple[int, np.ndarray]:
+    """
+    Memory-map a WAV's samples as a (frames, channels) array in the file's dtype.
+
+    Nothing is converted here; analyze_file converts one block at a time.
+    Formats np.memmap cannot view directly (e.g. 24-bit) are read normally.
+    """
+    info = read_wav_header(path)
+    dtype = MEMMAP_DTYPES.get((info.format_tag, info.bits_per_sample))
+    if dtype is None:
+        sample_rate, data = wavfile.read(str(path))
+        return sample_rate, data if data.ndim > 1 else data[:, None]
+    count = info.frames * info.channels
+    data = np.memmap(path, dtype=dtype, mode="r", offset=info.data_offset, shape=(count,)) if count else np.zeros(0, dtype)
+    return info.sample_rate, data.reshape(info.frames, info.channels)
+
+
+def analyze_file(path: Path) -> dict:
+    """Level, clipping, silence and duration measurements for one WAV."""
+    try:
+        sample_rate, data = map_samples(path)
+    except (OSError, ValueError) as exc:
+        return {"error": str(exc)}
+    if not len(data):
+        return {"error": "no samples"}
+    block = max(int(sample_rate * FRAME_MS / 1000), 1) * BLOCK_FRAMES
+    peak = 0.0
+    square_sum = 0.0
+    clipped = 0
+    block_energies = []
+    for start in range(0, len(data), block):
+        samples = to_float32(data[start:start + block])
+        audio = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        magnitude = np.abs(audio)
+        peak = max(peak, float(magnitude.max()))
+        clipped += int(np.count_nonzero(magnitude >= CLIP_LEVEL))
+        square_sum += float(np.sum(np.square(audio / 32768, dtype=np.float64)))
+        block_energies.append(frame_energies_db(audio, sample_rate)[0])
+    energies = np.concatenate(block_energies)
+    voiced = energies[energies > SILENCE_DB]
+    return {
+        "duration": len(data) / sample_rate,
+        "peak_db": 20 * np.log10(max(peak, 1.0) / 32768),
+        "rms_db": 10 * np.log10(max(square_sum / len(data), 1e-12)),
+        "voiced_rms_db": float(10 * np.log10(np.mean(10 ** (voiced / 10)))) if voiced.size else -120.0,
+        "clip_ratio": clipped / len(data),
+        "silence_ratio": float(np.mean(energies <= SILENCE_DB)) if energies.size else 1.0,
+    }
+
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """(x - median) / (1.4826 * MAD), with the MAD floored at MIN_MAD."""
+    median = np.median(values)
+    mad = max(float(np.median(np.abs(values - median))), MIN_MAD)
+    return (values - median) / (1.4826 * mad)
+
+
+def score_lines(lines: list[dict]) -> list[dict]:
+    """
+    Add expected duration, per-speaker z-scores and flags to analyzed lines,
+    and return them ranked most suspect first.
+    """
+    measured = [line for line in lines if "error" not in line and line["chars"]]
+    by_speaker: dict[str, list[dict]] = defaultdict(list)
+    for line in measured:
+        by_speaker[line["speaker"]].append(line)
+
+    for speaker_lines in by_speaker.values():
+        group = speaker_lines if len(speaker_lines) >= MIN_SPEAKER_LINES else measured
+        rate = float(np.median([line["duration"] / line["chars"] for line in group]))
+        durations = np.log(np.array([line["duration"] / (line["chars"] * rate) for line in group]))
+        loudness = np.array([line["voiced_rms_db"] for line in group]) / 10
+        duration_z = robust_z(durations)
+        loudness_z = robust_z(loudness)
+        positions = {id(line): index for index, line in enumerate(group)}
+        for line in speaker_lines:
+            index = positions[id(line)]
+            line["expected"] = line["chars"] * rate
+            line["duration_z"] = float(duration_z[index])
+            line["loudness_z"] = float(loudness_z[index])
+
+    for line in lines:
+        flags = []
+        if "error" in line:
+            flags.append("unreadable")
+        else:
+            if line["clip_ratio"] > CLIP_RATIO:
+                flags.append("clipping")
+            if line["peak_db"] < NEAR_SILENT_DB:
+                flags.append("near silent")
+            elif line["silence_ratio"] > SILENCE_RATIO:
+                flags.append("mostly silent")
+            if line.get("duration_z", 0.0) > OUTLIER_Z:
+                flags.append("too long")
+            elif line.get("duration_z", 0.0) < -OUTLIER_Z:
+                flags.append("too short")
+            if line.get("loudness_z", 0.0) > OUTLIER_Z:
+                flags.append("loud")
+            elif line.get("loudness_z", 0.0) < -OUTLIER_Z:
+                flags.append("quiet")
+        line["flags"] = flags
+        line["score"] = len(flags) + max(abs(line.get("duration_z", 0.0)), abs(line.get("loudness_z", 0.0))) / 10
+
+    return sorted(lines, key=lambda line: -line["score"])
+
+
+def write_report(ranked: list[dict], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fieldnames = [
+        "Rank", "StrRef", "Speaker", "Flags", "Score", "Duration", "Expected", "DurationZ",
+        "PeakDb", "RmsDb", "LoudnessZ", "ClipRatio", "SilenceRatio", "Text",
+    ]
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for rank, line in enumerate(ranked, 1):
+            row = {
+                "Rank": rank,
+                "StrRef": line["strref"],
+                "Speaker": line["speaker"],
+                "Flags": "; ".join(line["flags"]) if "error" not in line else f"unreadable: {line['error']}",
+                "Score": f"{line['score']:.2f}",
+                "Text": line["text"],
+            }
+            if "error" not in line:
+                row.update({
+                    "Duration": f"{line['duration']:.2f}",
+                    "Expected": f"{line['expected']:.2f}" if "expected" in line else "",
+                    "DurationZ": f"{line['duration_z']:+.1f}" if "duration_z" in line else "",
+                    "PeakDb": f"{line['peak_db']:.1f}",
+                    "RmsDb": f"{line['rms_db']:.1f}",
+                    "LoudnessZ": f"{line['loudness_z']:+.1f}" if "loudness_z" in line else "",
+                    "ClipRatio": f"{line['clip_ratio']:.5f}",
+                    "SilenceRatio": f"{line['silence_ratio']:.2f}",
+                })
+            writer.writerow(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rank generated lines by audio QA problems")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--chapter", type=int, help="Analyze lines of data/chapterN_lines.csv")
+    source.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Lines CSV (default: data/all_lines.csv)")
+    parser.add_argument("--output", type=Path, default=REPORT_PATH, help="Report CSV (default: reports/audio-qa.csv)")
+    parser.add_argument("--top", type=int, default=20, help="Suspect lines to print (default: 20)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    input_csv = ROOT / "data" / f"chapter{args.chapter}_lines.csv" if args.chapter else args.input
+    if not input_csv.exists():
+        print(f"❌ Input CSV not found: {input_csv}")
+        sys.exit(1)
+
+    lines: list[dict] = []
+    with input_csv.open(encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            wav_path = OUT / f"{row['StrRef']}.wav"
+            if wav_path.exists():
+                text = sanitize(row.get("Text") or "")
+                lines.append({
+                    "strref": row["StrRef"],
+                    "speaker": row.get("Speaker") or "",
+                    "text": text,
+                    "chars": len(text),
+                    "path": wav_path,
+                })
+
+    print(f"🔬 Analyzing {len(lines)} WAVs from {input_csv.name}")
+    workers = args.workers or os.cpu_count() or 1
+    paths = [line["path"] for line in lines]
+    if workers == 1:
+        results = map(analyze_file, paths)
+        for line, result in zip(lines, results):
+            line.update(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(paths) // (workers * 8))
+            for line, result in zip(lines, pool.map(analyze_file, paths, chunksize=chunksize)):
+                line.update(result)
+
+    ranked = score_lines(lines)
+    write_report(ranked, args.output)
+
+    suspects = [line for line in ranked if line["flags"]]
+    print(f"\n⚠️ {len(suspects)} of {len(ranked)} lines flagged")
+    for line in suspects[:args.top]:
+        print(f"   {line['strref']:>7} {line['speaker'][:16]:<16} {', '.join(line['flags']):<28} {line['text'][:50]}")
+    print(f"\n📄 Ranked report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
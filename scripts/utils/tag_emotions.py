@@ -0,0 +1,95 @@
+"""Tag dialogue lines with an Emotion column for synth_batch.py.
+
+Streams all_lines.csv through bg2vo.emotions.detect_emotion on a process pool
+(scoring the sanitized text synth_batch.py synthesizes) and writes the label
+into the Emotion column, which synth_batch.py maps to emotion vectors. Only
+speakers passed with --speaker are tagged, or everyone with --all-speakers.
+
+Speakers with "auto_emotion": true in data/voices.json are never tagged:
+synth_batch.py gives a manual Emotion label priority over their blended
+emotion vectors, so a tag would switch blending off for them.
+Existing Emotion values are kept unless --overwrite is given.
+
+Usage:
+    python scripts/utils/tag_emotions.py --speaker Ilyich --speaker Jaheira
+    python scripts/utils/tag_emotions.py --all-speakers --output build/all_lines_tagged.csv
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bg2vo.emotions import tag_dialogue_emotions  # type: ignore[import-not-found]
+
+DEFAULT_INPUT = ROOT / "data" / "all_lines.csv"
+VOICES_JSON = ROOT / "data" / "voices.json"
+
+
+def auto_emotion_speakers(voices_path: Path) -> set[str]:
+    """Return speakers with "auto_emotion": true in voices.json."""
+    with open(voices_path, "r", encoding="utf-8") as f:
+        voices = json.load(f)
+    return {
+        speaker for speaker, config in voices.items()
+        if isinstance(config, dict) and config.get("auto_emotion")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tag dialogue lines with detected emotions")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Lines CSV (default: data/all_lines.csv)")
+    parser.add_argument("--output", type=Path, default=None, help="Output CSV (default: rewrite --input in place)")
+    parser.add_argument("--speaker", action="append", default=[], help="Tag this speaker (repeatable)")
+    parser.add_argument("--all-speakers", action="store_true", help="Tag every speaker without auto_emotion")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing Emotion values")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per worker task (default: 5000)")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(1)
+
+    # Blended at synthesis time; a manual label would override the blend
+    blended = auto_emotion_speakers(VOICES_JSON) if VOICES_JSON.exists() else set()
+    if args.all_speakers:
+        speakers = None
+        print("🎭 Tagging all speakers")
+    else:
+        speakers = set(args.speaker)
+        if not speakers:
+            print("⚠️ No speakers given. Pass --speaker NAME (repeatable) or --all-speakers.")
+            return
+        print(f"🎭 Tagging speakers: {', '.join(sorted(speakers))}")
+    requested = {speaker.lower() for speaker in args.speaker}
+    skipped = {speaker for speaker in blended if args.all_speakers or speaker.lower() in requested}
+    if skipped:
+        print(f"   Skipping auto_emotion speakers (blended in synth_batch.py): {', '.join(sorted(skipped))}")
+
+    output = args.output or args.input
+    start = time.perf_counter()
+    counts = tag_dialogue_emotions(
+        args.input,
+        output,
+        speakers=speakers,
+        exclude=blended,
+        overwrite=args.overwrite,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ Wrote {output} in {elapsed:.2f}s")
+    print(f"   Tagged lines: {sum(counts.values())}")
+    for emotion, count in counts.most_common():
+        print(f"   {emotion:10s}: {count}")
+
+
+if __name__ == "__main__":
+    main()
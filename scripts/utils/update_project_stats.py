@@ -15,10 +15,15 @@ Options:
 
 import argparse
 import csv
+import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from bg2vo.speakers import SpeakerResolver  # type: ignore[import-not-found]
+
 
 def load_all_lines(csv_path: Path) -> dict[str, set[int]]:
     """
@@ -52,7 +57,7 @@ def load_characters(csv_path: Path) -> list[dict]:
     print(f"📖 Loading {csv_path}")
     
     characters = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
         reader = csv.DictReader(f)
         for row in reader:
             characters.append(row)
@@ -61,50 +66,21 @@ def load_characters(csv_path: Path) -> list[dict]:
     return characters
 
 
-def get_dlg_files(character: dict) -> set[str]:
-    """Extract DLG file codes from character's DLGFiles column"""
-    dlg_files_str = character.get('DLGFiles', '')
-    if not dlg_files_str:
-        return set()
-    
-    # Split by | and remove .DLG extension
-    dlg_files = set()
-    for dlg in dlg_files_str.split('|'):
-        dlg = dlg.strip().replace('.DLG', '')
-        if dlg:
-            dlg_files.add(dlg)
-    
-    return dlg_files
-
-
 def map_speakers_to_characters(characters: list[dict], lines_by_speaker: dict) -> dict:
     """
     Map speakers from all_lines.csv to canonical character names.
     
-    Uses DLGFiles column to identify which speakers belong to each character.
+    Uses the Canonical, Aliases and DLGFiles columns (bg2vo.speakers.SpeakerResolver):
+    exact names first, then the longest DLG file or alias the speaker starts with.
     """
     print(f"\n🔗 Mapping speakers to characters...")
     
+    resolver = SpeakerResolver(characters)
     speaker_to_character = {}
-    
-    for char in characters:
-        canonical = char['Canonical']
-        dlg_files = get_dlg_files(char)
-        aliases_str = char.get('Aliases', '')
-        aliases = {a.strip() for a in aliases_str.split(';') if a.strip()}
-        
-        # Match speakers to this character
-        for speaker in lines_by_speaker.keys():
-            # Direct match with canonical name or aliases
-            if speaker == canonical or speaker in aliases:
-                speaker_to_character[speaker] = canonical
-                continue
-            
-            # Match with DLG files
-            for dlg in dlg_files:
-                if speaker.upper().startswith(dlg.upper()):
-                    speaker_to_character[speaker] = canonical
-                    break
+    for speaker in lines_by_speaker:
+        canonical = resolver.resolve(speaker)
+        if canonical is not None:
+            speaker_to_character[speaker] = canonical
     
     print(f"   Mapped {len(speaker_to_character)} speakers to characters")
     return speaker_to_character
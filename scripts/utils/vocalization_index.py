@@ -0,0 +1,211 @@
+"""
+Precomputed Vocalization Index
+
+Classifies the sanitized text of every StrRef in a lines dataset once and
+stores the vocalization type, confidence and is_pure flag in
+reports/vocalization-index.json. synth_batch.py and extract_emotion_refs.py
+look lines up here instead of re-running the regex classifier on every run.
+
+Each entry carries an MD5 of the line's raw text, so edited lines fall back to
+live classification until the index is rebuilt. The whole index is discarded
+when VOCALIZATION_PATTERNS, SPEECH_WORDS or TOKEN_REPLACEMENTS change, or
+when SANITIZE_VERSION or CLASSIFIER_VERSION is bumped for a logic change.
+
+Usage:
+    python scripts/utils/vocalization_index.py
+    python scripts/utils/vocalization_index.py --input data/chapter1_lines.csv
+    python scripts/utils/vocalization_index.py --rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts" / "utils"))
+
+from bg2vo.text import SANITIZE_VERSION, TOKEN_REPLACEMENTS, sanitize  # type: ignore[import-not-found]
+from classify_vocalizations import (  # type: ignore[import]
+    CLASSIFIER_VERSION,
+    SPEECH_WORDS,
+    VOCALIZATION_PATTERNS,
+    VocalizationType,
+    classify_text,
+)
+
+DEFAULT_INPUT = ROOT / "data" / "all_lines.csv"
+DEFAULT_INDEX = ROOT / "reports" / "vocalization-index.json"
+INDEX_VERSION = 1
+
+
+def text_digest(text: str) -> str:
+    """Return the MD5 used to detect edited lines."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def pattern_table_digest() -> str:
+    """Fingerprint sanitize() and the classifier; any change invalidates the index."""
+    hasher = hashlib.md5()
+    hasher.update(f"{INDEX_VERSION}|{SANITIZE_VERSION}|{CLASSIFIER_VERSION}\n".encode("utf-8"))
+    hasher.update(json.dumps(TOKEN_REPLACEMENTS, sort_keys=True).encode("utf-8"))
+    for voc_pattern in VOCALIZATION_PATTERNS:
+        hasher.update(
+            f"{voc_pattern.type.value}|{voc_pattern.pattern}|"
+            f"{voc_pattern.confidence!r}|{voc_pattern.description}\n".encode("utf-8")
+        )
+    hasher.update("|".join(sorted(SPEECH_WORDS)).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class VocalizationIndex:
+    """StrRef -> vocalization classification lookup backed by a JSON file."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX) -> None:
+        self.path = path
+        self.patterns = pattern_table_digest()
+        self._entries: Dict[str, Dict] = {}
+        self.stale = False
+
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("patterns") == self.patterns:
+                self._entries = data.get("entries", {})
+            else:
+                self.stale = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def vocalization_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if "type" in entry)
+
+    @staticmethod
+    def _classify(sanitized: str) -> Dict:
+        # Index at the lowest threshold; lookups apply their own cut-off.
+        result = classify_text(sanitized, min_confidence=0.0)
+        if not result:
+            return {}
+        return {
+            "type": result["type"].value,
+            "confidence": result["confidence"],
+            "pattern": result["pattern"],
+            "original": result["original"],
+            "is_pure": result["is_pure"],
+        }
+
+    def update(self, rows: Iterable[Dict[str, str]]) -> tuple[int, int]:
+        """Index every row, re-classifying only new or edited lines.
+
+        Returns:
+            Tuple of (classified, reused) counts
+        """
+        classified = 0
+        reused = 0
+        for row in rows:
+            strref = (row.get("StrRef") or "").strip()
+            text = row.get("Text") or ""
+            if not strref:
+                continue
+
+            digest = text_digest(text)
+            entry = self._entries.get(strref)
+            if entry and entry.get("digest") == digest:
+                reused += 1
+                continue
+
+            self._entries[strref] = {"digest": digest, **self._classify(sanitize(text))}
+            classified += 1
+        return classified, reused
+
+    def classify(
+        self,
+        strref: str,
+        text: str,
+        min_confidence: float = 0.5,
+        sanitized: str | None = None,
+    ) -> Optional[Dict]:
+        """
+        Look up the classification of a line's sanitized text.
+
+        Results match classify_text(sanitize(text), min_confidence). Lines that
+        are missing from the index or whose text changed are classified live.
+
+        Args:
+            strref: Line StrRef
+            text: Raw dialogue text as stored in the dataset
+            min_confidence: Minimum confidence threshold (0.0-1.0)
+            sanitized: Pre-sanitized text, if the caller already has it
+
+        Returns:
+            Same dictionary shape as classify_text, or None
+        """
+        entry = self._entries.get(str(strref).strip())
+        if entry is None or entry.get("digest") != text_digest(text):
+            return classify_text(sanitized if sanitized is not None else sanitize(text), min_confidence)
+
+        if "type" not in entry:
+            return None
+
+        if entry["confidence"] < min_confidence:
+            if not entry["is_pure"]:
+                return None
+            # A single word below the cut-off may still carry an action marker
+            # that clears it, so defer to the classifier for this rare case.
+            return classify_text(sanitized if sanitized is not None else sanitize(text), min_confidence)
+
+        return {
+            "type": VocalizationType(entry["type"]),
+            "confidence": entry["confidence"],
+            "pattern": entry["pattern"],
+            "original": entry["original"],
+            "is_pure": entry["is_pure"],
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": INDEX_VERSION,
+            "patterns": self.patterns,
+            "entries": self._entries,
+        }
+        self.path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the precomputed vocalization index")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Lines CSV to index (default: data/all_lines.csv)")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="Index file (default: reports/vocalization-index.json)")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the existing index and classify every line")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"[X] Lines CSV not found: {args.input}")
+        sys.exit(1)
+
+    if args.rebuild and args.index.exists():
+        args.index.unlink()
+
+    index = VocalizationIndex(args.index)
+    if index.stale:
+        print("[!] Pattern table changed since last build, re-indexing everything")
+
+    print(f"[*] Indexing {args.input}")
+    with open(args.input, "r", encoding="utf-8-sig", newline="") as f:
+        classified, reused = index.update(csv.DictReader(f))
+
+    index.save()
+
+    print(f"   Classified: {classified}")
+    print(f"   Reused:     {reused}")
+    print(f"   Indexed:    {len(index)} StrRefs ({index.vocalization_count()} with vocalizations)")
+    print(f"[OK] Saved {args.index}")
+
+
+if __name__ == "__main__":
+    main()
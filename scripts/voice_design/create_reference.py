@@ -6,23 +6,41 @@ This gives Index-TTS better voice characteristics to clone from.
 import wave
 import pathlib
 import struct
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts" / "utils"))
+
+from bg2vo.audio import read_wav_header  # type: ignore[import-not-found]
+from conform_audio import BIT_DEPTH, CHANNELS, SAMPLE_RATE, conform_file  # type: ignore[import]
+
+# Game-format copies of clips that were not already 22050 Hz / 16-bit / mono
+CONFORMED_DIR = ROOT / "build" / "conformed_refs"
 
 def concatenate_wav_files(input_files, output_file):
     """
     Concatenate multiple WAV files into a single reference file.
-    All inputs must have the same sample rate, channels, and bit depth.
+    Inputs not in the game format are conformed first (conform_audio.py),
+    into CONFORMED_DIR, so every clip shares one sample rate, depth and layout.
     """
+    sources = []
+    for wav_file in map(pathlib.Path, input_files):
+        if not read_wav_header(wav_file).conforms(SAMPLE_RATE, BIT_DEPTH, CHANNELS):
+            conformed = CONFORMED_DIR / wav_file.name
+            print(f"Conforming {wav_file.name} to {SAMPLE_RATE} Hz / {BIT_DEPTH}-bit / {CHANNELS} ch")
+            conform_file(wav_file, conformed)
+            wav_file = conformed
+        sources.append(wav_file)
+
     # Read first file to get parameters
-    with wave.open(str(input_files[0]), 'rb') as first_wav:
+    with wave.open(str(sources[0]), 'rb') as first_wav:
         params = first_wav.getparams()
         frames = []
         
         # Read all files
-        for wav_file in input_files:
+        for wav_file in sources:
             with wave.open(str(wav_file), 'rb') as wav:
-                if wav.getparams()[:3] != params[:3]:  # Check format compatibility
-                    print(f"Warning: {wav_file} has different format, skipping")
-                    continue
                 frames.append(wav.readframes(wav.getnframes()))
         
         # Write concatenated output
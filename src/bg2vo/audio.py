@@ -0,0 +1,276 @@
+"""WAV metadata read from RIFF headers only.
+
+read_wav_header walks the RIFF chunk list with seeks, reading just the
+``fmt `` chunk and the ``data`` chunk's header, so checking the format or
+duration of thousands of clips never touches their sample data.
+
+WavIndex caches those headers in SQLite (reports/wav-index.sqlite), keyed by
+path and validated by size and mtime, so repeat scans only stat the files.
+wav_duration reads through a shared index on DEFAULT_INDEX that is opened on
+first use, so importing a script never creates the database.
+
+EncodeManifest records which WAV content each Ogg Vorbis encode was made from
+(reports/encode-manifest.json). It lives here, with file_digest, so deploy.py
+can check encodes without importing the numpy/scipy audio scripts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Dict, Iterable
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_INDEX = ROOT / "reports" / "wav-index.sqlite"
+ENCODE_MANIFEST = ROOT / "reports" / "encode-manifest.json"
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.block_align if self.block_align else 0
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def conforms(self, sample_rate: int, bits_per_sample: int, channels: int = 1) -> bool:
+        """True for integer PCM with exactly the given rate, depth and channel count."""
+        return (
+            self.format_tag == WAVE_FORMAT_PCM
+            and self.sample_rate == sample_rate
+            and self.bits_per_sample == bits_per_sample
+            and self.channels == channels
+        )
+
+    def describe(self) -> str:
+        kind = {WAVE_FORMAT_PCM: "PCM", WAVE_FORMAT_IEEE_FLOAT: "float"}.get(self.format_tag, f"tag {self.format_tag:#06x}")
+        return f"{self.sample_rate} Hz, {self.bits_per_sample}-bit {kind}, {self.channels} ch"
+
+
+def read_wav_header(path: Path) -> WavInfo:
+    """Parse the format and data-chunk location of a WAV file.
+
+    Raises:
+        ValueError: If the file is not a RIFF/WAVE file or has no fmt/data chunk
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError(f"Not a RIFF/WAVE file: {path}")
+
+        fmt: tuple[int, ...] | None = None
+        data: tuple[int, int] | None = None
+        position = 12
+        while fmt is None or data is None:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, size = struct.unpack("<4sI", header)
+            position += 8
+            if chunk_id == b"fmt ":
+                body = f.read(min(size, 40))
+                if len(body) < 16:
+                    raise ValueError(f"Truncated fmt chunk: {path}")
+                format_tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # The real format is the first two bytes of the SubFormat GUID
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, rate, bits, block_align)
+            elif chunk_id == b"data":
+                # Streaming writers may leave the size unset; clamp to the file
+                data = (position, min(size, file_size - position))
+            # Chunks are word aligned
+            position += size + (size & 1)
+            f.seek(position)
+
+    if fmt is None or data is None:
+        raise ValueError(f"Missing {'fmt' if fmt is None else 'data'} chunk: {path}")
+    format_tag, channels, rate, bits, block_align = fmt
+    return WavInfo(format_tag, channels, rate, bits, block_align, data[0], data[1])
+
+
+class WavIndex:
+    """SQLite cache of WavInfo by absolute path, checked against size and mtime.
+
+    A changed or replaced file gets a new size or mtime and is re-parsed.
+    Files that are not valid WAVs are not cached and raise ValueError as
+    read_wav_header does.
+    """
+
+    _COLUMNS = "format_tag, channels, sample_rate, bits_per_sample, block_align, data_offset, data_size"
+    # Keeps IN (...) lists under SQLite's host-parameter limit
+    _BATCH = 500
+
+    def __init__(self, path: Path = DEFAULT_INDEX) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), isolation_level=None)
+        # WAL + NORMAL: a commit per cached header without an fsync each
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS wav (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+            "format_tag INTEGER, channels INTEGER, sample_rate INTEGER, bits_per_sample INTEGER, "
+            "block_align INTEGER, data_offset INTEGER, data_size INTEGER)"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "WavIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM wav").fetchone()[0]
+
+    def get(self, path: Path) -> WavInfo:
+        """Header info for one file, parsed only if not cached or changed."""
+        return self.get_many([path], strict=True)[Path(path)]
+
+    def duration(self, path: Path) -> float:
+        return self.get(path).duration
+
+    def get_many(self, paths: Iterable[Path], strict: bool = False) -> Dict[Path, WavInfo]:
+        """Header info for many files with one query per batch and one transaction for new entries.
+
+        Missing files and files that are not valid WAVs are left out of the
+        result, or raise FileNotFoundError / ValueError with ``strict``.
+        """
+        wanted: Dict[str, tuple[Path, os.stat_result]] = {}
+        for path in paths:
+            if not isinstance(path, Path):
+                path = Path(path)
+            # abspath rather than resolve(): no per-component symlink lookups
+            key = os.path.abspath(path)
+            try:
+                wanted[key] = (path, os.stat(key))
+            except FileNotFoundError:
+                if strict:
+                    raise
+
+        result: Dict[Path, WavInfo] = {}
+        keys = list(wanted)
+        for start in range(0, len(keys), self._BATCH):
+            batch = keys[start:start + self._BATCH]
+            rows = self._db.execute(
+                f"SELECT path, size, mtime, {self._COLUMNS} FROM wav WHERE path IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for key, size, mtime, *fields in rows:
+                path, stat = wanted[key]
+                if size == stat.st_size and mtime == stat.st_mtime_ns:
+                    result[path] = WavInfo(*fields)
+
+        fresh = []
+        for key, (path, stat) in wanted.items():
+            if path in result:
+                self.hits += 1
+                continue
+            self.misses += 1
+            try:
+                info = read_wav_header(path)
+            except ValueError:
+                if strict:
+                    raise
+                continue
+            result[path] = info
+            fresh.append((key, stat.st_size, stat.st_mtime_ns, *astuple(info)))
+
+        if fresh:
+            self._db.execute("BEGIN")
+            self._db.executemany(f"INSERT OR REPLACE INTO wav VALUES ({','.join('?' * 10)})", fresh)
+            self._db.execute("COMMIT")
+        return result
+
+
+_shared_index: WavIndex | None = None
+
+
+def shared_index() -> WavIndex:
+    """The WavIndex on DEFAULT_INDEX, opened on first call and reused after."""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = WavIndex(DEFAULT_INDEX)
+    return _shared_index
+
+
+def wav_duration(path: Path) -> float:
+    """Duration in seconds from the cached RIFF header (see shared_index)."""
+    return shared_index().duration(path)
+
+
+def file_digest(path: Path) -> str:
+    """MD5 of a file's contents."""
+    hasher = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class EncodeManifest:
+    """Record of which WAV content each .ogg was encoded from, by hash.
+
+    A WAV whose digest and quality match its entry, and whose .ogg still has
+    the recorded digest, is up to date; anything else is (re-)encoded.
+    """
+
+    def __init__(self, path: Path = ENCODE_MANIFEST) -> None:
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        if path.exists():
+            self._entries = json.loads(path.read_text(encoding="utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str) -> dict | None:
+        return self._entries.get(name)
+
+    def encodes(self, wav_path: Path, ogg_path: Path) -> bool:
+        """Whether ``ogg_path`` is the recorded encode of ``wav_path``'s current content."""
+        entry = self._entries.get(wav_path.name)
+        return (
+            bool(entry)
+            and ogg_path.exists()
+            and entry["wav"] == file_digest(wav_path)
+            and entry["ogg"] == file_digest(ogg_path)
+        )
+
+    def is_current(self, wav_path: Path, ogg_path: Path, quality: float) -> bool:
+        entry = self._entries.get(wav_path.name)
+        return bool(entry) and entry["quality"] == quality and self.encodes(wav_path, ogg_path)
+
+    def record(self, name: str, entry: dict) -> None:
+        self._entries[name] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,130 @@
+"""Chapter assignment and per-chapter CSV output.
+
+ChapterResolver maps a DLG file to its chapter with one dict lookup, built
+once from archive/data/dlg_chapter_map.csv (DLGFile, Chapter columns, where
+Chapter reads "Chapter 1 - Irenicus Dungeon" or "Unassigned").
+
+ChapterWriter takes lines one at a time and routes each to
+chapter<N>_lines.csv or chapter_unassigned.csv, so a whole corpus is split
+in one pass without holding it in memory. Rows go to temporary files; on
+close, an output is replaced only if its content changed, so unchanged
+chapter files keep their mtime.
+"""
+from __future__ import annotations
+
+import csv
+import filecmp
+import os
+from collections import Counter
+from pathlib import Path
+from typing import IO, Dict, Mapping, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+CHAPTER_MAP_CSV = ROOT / "archive" / "data" / "dlg_chapter_map.csv"
+CHAPTERS = range(1, 8)
+UNASSIGNED = "unassigned"
+
+
+def chapter_number(label: str | None) -> int | None:
+    """Chapter number from 'Chapter 1 - Irenicus Dungeon' (None for 'Unassigned')."""
+    parts = (label or "").split()
+    for index, part in enumerate(parts[:-1]):
+        if part == "Chapter" and parts[index + 1].isdigit():
+            return int(parts[index + 1])
+    return None
+
+
+def _dlg_key(name: str) -> str:
+    return Path(name.strip()).stem.upper()
+
+
+class ChapterResolver:
+    """DLG file (IMOEN2, IMOEN2.DLG, IMOEN2.D) -> chapter number."""
+
+    def __init__(self, mapping: Mapping[str, int] | None = None) -> None:
+        self._chapters: Dict[str, int] = {_dlg_key(name): chapter for name, chapter in (mapping or {}).items()}
+
+    @classmethod
+    def from_csv(cls, path: Path = CHAPTER_MAP_CSV) -> "ChapterResolver":
+        """Resolver for a DLG chapter map; empty if the file does not exist."""
+        mapping: Dict[str, int] = {}
+        if path.exists():
+            with path.open("r", encoding="utf-8-sig", newline="") as handle:
+                for row in csv.DictReader(handle):
+                    # The last row for a DLG wins; a later "Unassigned" row clears it
+                    key = _dlg_key(row.get("DLGFile") or "")
+                    chapter = chapter_number(row.get("Chapter"))
+                    if chapter is None:
+                        mapping.pop(key, None)
+                    else:
+                        mapping[key] = chapter
+        return cls(mapping)
+
+    def __len__(self) -> int:
+        return len(self._chapters)
+
+    def resolve(self, dlg: str, default: int | None = None) -> int | None:
+        return self._chapters.get(_dlg_key(dlg), default)
+
+
+class ChapterWriter:
+    """Route line rows to per-chapter CSVs in one pass; rewrite only changed files."""
+
+    def __init__(self, output_dir: Path, fieldnames: Sequence[str]) -> None:
+        self.output_dir = Path(output_dir)
+        self.fieldnames = list(fieldnames)
+        self.counts: Counter = Counter()
+        self.voiced: Counter = Counter()
+        self.changed: Dict[int | str, bool] = {}
+        self._open: Dict[int | str, Tuple[IO[str], csv.DictWriter, Path]] = {}
+
+    def __enter__(self) -> "ChapterWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def path(self, chapter: int | str) -> Path:
+        if chapter == UNASSIGNED:
+            return self.output_dir / "chapter_unassigned.csv"
+        return self.output_dir / f"chapter{chapter}_lines.csv"
+
+    def write(self, row: Mapping[str, str]) -> int | str:
+        """Append a row to its chapter's file (by the Chapter column); returns the chapter."""
+        chapter_text = (row.get("Chapter") or "").strip()
+        chapter: int | str = int(chapter_text) if chapter_text.isdigit() else UNASSIGNED
+        if chapter not in self._open:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path = self.path(chapter)
+            tmp_path = path.with_name(path.name + ".tmp")
+            handle = open(tmp_path, "w", encoding="utf-8", newline="")
+            writer = csv.DictWriter(handle, fieldnames=self.fieldnames)
+            writer.writeheader()
+            self._open[chapter] = (handle, writer, tmp_path)
+        self._open[chapter][1].writerow(row)
+        self.counts[chapter] += 1
+        if row.get("Original_VO_WAV"):
+            self.voiced[chapter] += 1
+        return chapter
+
+    def close(self) -> None:
+        """Move finished files into place, leaving byte-identical outputs untouched."""
+        for chapter, (handle, _, tmp_path) in self._open.items():
+            handle.close()
+            path = self.path(chapter)
+            if path.exists() and filecmp.cmp(tmp_path, path, shallow=False):
+                tmp_path.unlink()
+                self.changed[chapter] = False
+            else:
+                os.replace(tmp_path, path)
+                self.changed[chapter] = True
+        self._open.clear()
+
+    def discard(self) -> None:
+        for handle, _, tmp_path in self._open.values():
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+        self._open.clear()
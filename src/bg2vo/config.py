@@ -1,7 +1,7 @@
 """Configuration helpers for the BG2 Voiceover project."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict
 
@@ -23,6 +23,7 @@ class Settings:
     sanitization: Dict[str, str]
     synthesis: Dict[str, Any]
     weidu: Dict[str, str]
+    post_processing: Dict[str, Any] = field(default_factory=dict)
 
 
 def _load_yaml(path: Path) -> Dict[str, Any]:
@@ -43,4 +44,5 @@ def load_config(path: Path | None = None) -> Settings:
         sanitization=raw.get("sanitization", {}),
         synthesis=raw.get("synthesis", {}),
         weidu=raw.get("weidu", {}),
+        post_processing=raw.get("post_processing", {}),
     )
@@ -0,0 +1,381 @@
+"""Single-pass parser for Near Infinity / WeiDU .D dialogue exports.
+
+tokenize splits a file in one linear scan: every token pattern either
+matches up to a fixed delimiter or to the end of the file, so an
+unterminated comment or string costs one pass instead of backtracking.
+parse_text walks the tokens once and returns every spoken StrRef:
+
+- ``SAY #n`` and multi-SAY continuations ``= #n`` of states
+- ``REPLY #n`` and the ``++ #n`` / ``+ ~cond~ + #n`` short forms
+- lines of CHAIN and INTERJECT / INTERJECT_COPY_TRANS blocks, where ``==
+  DLG`` switches the speaker and ``=`` continues with the same one
+
+Each statement carries the speaking DLG, the state (or CHAIN) label and the
+text and sound resref from the export's trailing ``/* ~text~ [RESREF] */``
+comment. parse_files spreads whole files across a process pool;
+convert_d_to_csv, build_complete_lines_db and filter_unvoiced_lines all work
+from its output.
+
+DIndex persists those results in SQLite (reports/d-index.sqlite) with each
+file's size, mtime and hash, so a rebuild reparses only added or changed
+files and drops removed ones.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_INDEX = ROOT / "reports" / "d-index.sqlite"
+# Bump when parsing changes so cached results are rebuilt
+PARSER_VERSION = 3
+
+# Leading whitespace and // comments are folded into the next token. Every
+# alternative ends at its delimiter or at the end of the file (\Z), every
+# character starts some alternative and trailing whitespace matches ``end``,
+# so a match never fails and the prefix is never backtracked into.
+TOKEN_RE = re.compile(
+    r"""(?:\s|//[^\n]*)*(?:
+        (?P<comment>/\*.*?(?:\*/|\Z))
+      | (?P<string>~~~~~.*?(?:~~~~~|\Z)|~[^~]*(?:~|\Z)|%[^%]*(?:%|\Z)|"[^"]*(?:"|\Z))
+      | (?P<sound>\[[^\]\s]*\]?)
+      | (?P<strref>\#-?\d+)
+      | (?P<tra>@-?\d+)
+      | (?P<sym>==|=|\+\+|[+*\#@/\[\]])
+      | (?P<word>[^\s~%"\[\]\#@=+*/]+)
+      | (?P<end>\Z)
+    )""",
+    re.DOTALL | re.VERBOSE,
+)
+
+# ~text~ [RESREF] inside a /* */ comment
+COMMENT_RE = re.compile(
+    r"""\s*(?:~~~~~(?P<long>.*?)~~~~~|~(?P<tilde>[^~]*)~|%(?P<percent>[^%]*)%|"(?P<quote>[^"]*)")?
+        \s*(?:\[(?P<sound>[^\]\s]+)\])?""",
+    re.DOTALL | re.VERBOSE,
+)
+
+Token = Tuple[str, str]
+
+STATE, CHAIN, TOP = "state", "chain", "top"
+CHAIN_KEYWORDS = {
+    "INTERJECT", "INTERJECT_COPY_TRANS", "INTERJECT_COPY_TRANS2", "INTERJECT_COPY_TRANS3",
+    "INTERJECT_COPY_TRANS4", "I_C_T", "I_C_T2", "I_C_T3", "I_C_T4",
+}
+CHAIN_ENDS = {"END", "EXIT", "COPY_TRANS", "COPY_TRANS_LATE"}
+APPEND_KEYWORDS = {"APPEND", "APPEND_EARLY", "REPLACE", "EXTEND_TOP", "EXTEND_BOTTOM"}
+# Keywords followed by a StrRef that is not dialogue
+SKIPPED_STRREFS = {"JOURNAL", "SOLVED_JOURNAL", "UNSOLVED_JOURNAL", "WEIGHT", "FLAGS"}
+KEYWORDS = {"SAY", "REPLY", "BEGIN", "CHAIN", "IF"} | CHAIN_KEYWORDS | CHAIN_ENDS | APPEND_KEYWORDS | SKIPPED_STRREFS
+
+
+@dataclass(frozen=True)
+class Statement:
+    dlg: str
+    kind: str  # "SAY" or "REPLY"
+    strref: int
+    text: str = ""
+    sound: str = ""
+    label: str = ""
+
+
+def tokenize(content: str) -> Iterator[Token]:
+    """(kind, source text) tokens of a .D file, comments included, whitespace dropped."""
+    for match in TOKEN_RE.finditer(content):
+        kind = match.lastgroup
+        if kind != "end":
+            yield kind, match[kind]
+
+
+def _name(token: Token) -> str:
+    """Value of a word or ~string~ used as a DLG name or label."""
+    kind, value = token
+    if kind != "string":
+        return value
+    delimiter = "~~~~~" if value.startswith("~~~~~") else value[0]
+    body = value[len(delimiter):]
+    return body[:-len(delimiter)] if body.endswith(delimiter) else body
+
+
+def _line(tokens: List[Token], index: int, dlg: str, kind: str, label: str) -> Statement:
+    """Statement for the StrRef token at ``index`` and the comment or sound right after it."""
+    strref = int(tokens[index][1][1:])
+    text = sound = ""
+    if index + 1 < len(tokens):
+        next_kind, value = tokens[index + 1]
+        if next_kind == "comment":
+            body = value[2:-2] if value.endswith("*/") else value[2:]
+            match = COMMENT_RE.match(body)
+            text = (match["long"] or match["tilde"] or match["percent"] or match["quote"] or "").strip()
+            sound = match["sound"] or ""
+        elif next_kind == "sound" and value.endswith("]"):
+            sound = value[1:-1]
+    return Statement(dlg, kind, strref, text, sound, label)
+
+
+def parse_text(content: str, dlg: str) -> List[Statement]:
+    """Statements of one .D file's content, in file order.
+
+    ``dlg`` names the speaker until a ``BEGIN ~DLG~`` or ``APPEND DLG``
+    says otherwise.
+    """
+    # The last match is always ``end``; padding keeps every lookahead in range
+    tokens = [(match.lastgroup, match[match.lastgroup]) for match in TOKEN_RE.finditer(content)]
+    tokens.extend([("end", "")] * 3)
+    statements: List[Statement] = []
+    mode, speaker, label = TOP, dlg, ""
+    index = 0
+    while True:
+        kind, value = tokens[index]
+        if kind == "word":
+            if value not in KEYWORDS:
+                pass
+            elif value == "SAY" or value == "REPLY":
+                if tokens[index + 1][0] == "strref":
+                    index += 1
+                    statements.append(_line(tokens, index, speaker, value, label))
+            elif value in SKIPPED_STRREFS:
+                if tokens[index + 1][0] == "strref":
+                    index += 1
+            elif value == "END":
+                if mode != TOP:
+                    mode, label = TOP, ""
+            elif value == "IF":
+                # State header at the top or inside APPEND; IFs in states are transitions
+                if mode == TOP:
+                    index = _skip_state_header(tokens, index)
+                    mode, label = STATE, _name(tokens[index])
+            elif value == "BEGIN":
+                # BEGIN ~DLG~ (a state's BEGIN is consumed with its header)
+                if mode == TOP:
+                    mode, speaker, label = TOP, _name(tokens[index + 1]), ""
+                    index += 1
+            elif value in APPEND_KEYWORDS:
+                index = _skip_if_file_exists(tokens, index + 1)
+                speaker = _name(tokens[index])
+                if value.startswith("EXTEND"):
+                    mode, label = STATE, _name(tokens[index + 1])
+            elif mode == CHAIN:
+                if value in CHAIN_ENDS:
+                    mode, label = TOP, ""
+            elif value == "CHAIN":
+                index += 1
+                if tokens[index] == ("word", "IF"):
+                    index = _skip_condition(tokens, index) + 1
+                index = _skip_if_file_exists(tokens, index)
+                mode, speaker, label = CHAIN, _name(tokens[index]), _name(tokens[index + 1])
+                index += 1
+            elif value in CHAIN_KEYWORDS:
+                index += 1
+                if tokens[index] == ("word", "SAFE"):
+                    index += 1
+                index = _skip_if_file_exists(tokens, index)
+                mode, speaker, label = CHAIN, _name(tokens[index]), _name(tokens[index + 1])
+                index += 1
+        elif kind == "strref":
+            if mode == CHAIN:
+                statements.append(_line(tokens, index, speaker, "SAY", label))
+        elif kind == "sym":
+            if mode == STATE:
+                if tokens[index + 1][0] == "strref" and value in ("=", "+", "++"):
+                    index += 1
+                    statements.append(_line(tokens, index, speaker, "SAY" if value == "=" else "REPLY", label))
+            elif mode == CHAIN and value == "==":
+                index = _skip_if_file_exists(tokens, index + 1)
+                speaker = _name(tokens[index])
+                if tokens[index + 1] == ("word", "IF"):
+                    index = _skip_condition(tokens, index + 1)
+        elif kind == "end":
+            break
+        index += 1
+    return statements
+
+
+def _skip_state_header(tokens: List[Token], index: int) -> int:
+    """Index of the label of an ``IF [WEIGHT #n] ~cond~ [THEN] [BEGIN] label`` starting at ``index``."""
+    index += 1
+    if tokens[index] == ("word", "WEIGHT"):
+        index += 2
+    if tokens[index][0] == "string":
+        index += 1
+    if tokens[index] == ("word", "THEN"):
+        index += 1
+    if tokens[index] == ("word", "BEGIN"):
+        index += 1
+    return index
+
+
+def _skip_if_file_exists(tokens: List[Token], index: int) -> int:
+    """``index``, or the token after it if it is the optional IF_FILE_EXISTS."""
+    return index + 1 if tokens[index] == ("word", "IF_FILE_EXISTS") else index
+
+
+def _skip_condition(tokens: List[Token], index: int) -> int:
+    """Index of the THEN closing an ``IF [WEIGHT #n] ~cond~ THEN`` starting at ``index``."""
+    for position in range(index, min(index + 6, len(tokens))):
+        if tokens[position] == ("word", "THEN"):
+            return position
+    return index
+
+
+def parse_file(path: Path) -> List[Statement]:
+    """Statements of one .D file; the DLG name is the file stem."""
+    path = Path(path)
+    return parse_text(path.read_text(encoding="utf-8", errors="ignore"), path.stem)
+
+
+def _parse_or_error(path: Path) -> List[Statement] | str:
+    try:
+        return parse_file(path)
+    except OSError as exc:
+        return str(exc)
+
+
+def parse_files(paths: Iterable[Path], workers: int | None = None) -> Dict[Path, List[Statement]]:
+    """Parse many .D files on a process pool, keyed by path in input order.
+
+    Unreadable files are reported and left out.
+    """
+    paths = [Path(path) for path in paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        results: Iterable[List[Statement] | str] = map(_parse_or_error, paths)
+        return _collect(paths, results)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // (workers * 8))
+        return _collect(paths, pool.map(_parse_or_error, paths, chunksize=chunksize))
+
+
+def _collect(paths: List[Path], results: Iterable[List[Statement] | str]) -> Dict[Path, List[Statement]]:
+    parsed: Dict[Path, List[Statement]] = {}
+    for path, result in zip(paths, results):
+        if isinstance(result, str):
+            print(f"  ⚠️ {path.name}: {result}")
+        else:
+            parsed[path] = result
+    return parsed
+
+
+def parse_dir(directory: Path, workers: int | None = None) -> Dict[Path, List[Statement]]:
+    """Parse every *.D file of a directory, sorted by name."""
+    return parse_files(sorted(Path(directory).glob("*.D")), workers)
+
+
+def voiced(parsed: Dict[Path, List[Statement]]) -> Dict[int, str]:
+    """StrRef -> original sound resref of every SAY that has one."""
+    return {
+        statement.strref: statement.sound
+        for statements in parsed.values()
+        for statement in statements
+        if statement.kind == "SAY" and statement.sound
+    }
+
+
+def file_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+class DIndex:
+    """SQLite cache of parse results per .D file, checked against size, mtime and hash.
+
+    A file whose size or mtime changed is hashed; only a changed hash gets it
+    reparsed. Results from another PARSER_VERSION are discarded on open.
+    """
+
+    def __init__(self, path: Path = DEFAULT_INDEX) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        version = self._db.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+        if version is None or int(version[0]) != PARSER_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS file")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('parser_version', ?)", (str(PARSER_VERSION),))
+        # One JSON array of Statement field lists per file: loading the
+        # corpus is a json.loads per file rather than a row per statement
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS file (path TEXT PRIMARY KEY, directory TEXT, size INTEGER, "
+            "mtime INTEGER, hash TEXT, statements TEXT)"
+        )
+
+    def __enter__(self) -> "DIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def update(self, directory: Path, workers: int | None = None) -> Counter:
+        """Bring the index of ``directory``'s *.D files up to date.
+
+        Returns:
+            Counter of added, changed, unchanged and removed files
+        """
+        directory_key = os.path.abspath(directory)
+        current = {os.path.abspath(path): path.stat() for path in Path(directory).glob("*.D")}
+        known = {
+            path: (size, mtime, digest)
+            for path, size, mtime, digest in self._db.execute(
+                "SELECT path, size, mtime, hash FROM file WHERE directory = ?", (directory_key,)
+            )
+        }
+
+        counts: Counter = Counter()
+        touched = []
+        to_parse: Dict[str, str] = {}
+        for key, stat in current.items():
+            if key not in known:
+                to_parse[key] = file_hash(Path(key))
+                counts["added"] += 1
+                continue
+            size, mtime, digest = known[key]
+            if size == stat.st_size and mtime == stat.st_mtime_ns:
+                counts["unchanged"] += 1
+                continue
+            new_digest = file_hash(Path(key))
+            if new_digest == digest:
+                # Touched but not edited: keep the parse, remember the new mtime
+                touched.append((stat.st_size, stat.st_mtime_ns, key))
+                counts["unchanged"] += 1
+            else:
+                to_parse[key] = new_digest
+                counts["changed"] += 1
+        removed = [key for key in known if key not in current]
+        counts["removed"] = len(removed)
+
+        parsed = parse_files([Path(key) for key in sorted(to_parse)], workers)
+
+        self._db.execute("BEGIN")
+        self._db.executemany("DELETE FROM file WHERE path = ?", ((key,) for key in removed + list(to_parse)))
+        self._db.executemany("UPDATE file SET size = ?, mtime = ? WHERE path = ?", touched)
+        for path, statements in parsed.items():
+            key = os.path.abspath(path)
+            stat = current[key]
+            rows = [astuple(statement) for statement in statements]
+            self._db.execute(
+                "INSERT INTO file VALUES (?, ?, ?, ?, ?, ?)",
+                (key, directory_key, stat.st_size, stat.st_mtime_ns, to_parse[key], json.dumps(rows)),
+            )
+        self._db.execute("COMMIT")
+        return counts
+
+    def statements(self, directory: Path) -> Dict[Path, List[Statement]]:
+        """Cached parse results of ``directory``, by path sorted by name."""
+        rows = self._db.execute(
+            "SELECT path, statements FROM file WHERE directory = ? ORDER BY path",
+            (os.path.abspath(directory),),
+        )
+        return {Path(path): [Statement(*fields) for fields in json.loads(statements)] for path, statements in rows}
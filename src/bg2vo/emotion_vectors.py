@@ -0,0 +1,126 @@
+"""Vectorized emotion scoring that blends 8-D emo_vectors for whole batches.
+
+detect_emotion picks a single label per line and get_emotion_config returns
+that label's fixed vector. This engine instead scores every line against every
+label at once and mixes the label vectors by those scores, so a line with both
+angry and fearful cues gets a bit of each instead of snapping to one preset.
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from .emotions import (
+    CONCERN_WORDS,
+    EMOTION_CAP,
+    EMOTION_KEYWORDS,
+    EMOTION_VECTORS,
+    QUESTION_WORDS,
+    SHOUT_PATTERN,
+)
+
+# Scored labels; "borrowed_voice" is a marker without a vector and never scored.
+LABELS: tuple[str, ...] = ("angry", "sad", "fear", "happy", "urgent", "hesitant", "neutral")
+LABEL_INDEX = {label: index for index, label in enumerate(LABELS)}
+
+# (len(LABELS), 8) matrix of the preset vectors, built once at import time.
+BASE_VECTORS = np.array([EMOTION_VECTORS[label] for label in LABELS], dtype=np.float32)
+
+# Punctuation cues. All but HESITATION_WEIGHT mirror detect_emotion's rules;
+# detect_emotion ignores a single "...", but a blend can afford a weak nudge.
+EXCLAMATION_WEIGHT = 2.0  # "!!" -> angry
+ELLIPSIS_WEIGHT = 2.0  # two or more "..." -> sad
+HESITATION_WEIGHT = 1.0  # a single "..." -> hesitant (no detect_emotion counterpart)
+SHOUT_WEIGHT = 1.0  # ALL CAPS word -> angry
+CONCERN_WEIGHT = 1.0  # "what's wrong?" style question -> fear
+NEUTRAL_BASELINE = 0.5  # keeps weak cues from dominating the blend
+
+
+def _contains_any(lowered: np.ndarray, words: Sequence[str]) -> np.ndarray:
+    hits = np.zeros(lowered.shape, dtype=bool)
+    for word in words:
+        hits |= np.char.find(lowered, word) >= 0
+    return hits
+
+
+class EmotionVectorEngine:
+    """Score and blend emotion vectors for batches of dialogue lines.
+
+    Per-speaker weighting comes from an ``emotion_weights`` mapping in a
+    speaker's voices.json entry, e.g. ``{"angry": 1.5, "happy": 0.5}``. Each
+    weight scales that label's score before blending; missing labels keep 1.0.
+    """
+
+    def __init__(self, speaker_weights: Mapping[str, Mapping[str, float]] | None = None) -> None:
+        self._speaker_rows: dict[str, np.ndarray] = {}
+        for speaker, weights in (speaker_weights or {}).items():
+            row = np.ones(len(LABELS), dtype=np.float32)
+            for label, weight in weights.items():
+                if label in LABEL_INDEX:
+                    row[LABEL_INDEX[label]] = float(weight)
+            self._speaker_rows[speaker] = row
+
+    @classmethod
+    def from_voices(cls, voices: Mapping[str, Any]) -> "EmotionVectorEngine":
+        """Build an engine from a raw voices.json mapping."""
+        weights: dict[str, Mapping[str, float]] = {}
+        for speaker, config in voices.items():
+            if isinstance(config, dict) and isinstance(config.get("emotion_weights"), dict):
+                weights[speaker] = config["emotion_weights"]
+        return cls(weights)
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (N, len(LABELS)) matrix of keyword and punctuation scores."""
+        raw = np.asarray(list(texts), dtype=np.str_)
+        scores = np.zeros((raw.shape[0], len(LABELS)), dtype=np.float32)
+        if raw.shape[0] == 0:
+            return scores
+
+        lowered = np.char.lower(raw)
+        for label, keywords in EMOTION_KEYWORDS.items():
+            column = scores[:, LABEL_INDEX[label]]
+            for keyword in keywords:
+                column += np.char.find(lowered, keyword) >= 0
+
+        exclamations = np.char.count(raw, "!")
+        ellipses = np.char.count(raw, "...")
+        questions = np.char.count(raw, "?")
+        shouting = np.fromiter((SHOUT_PATTERN.search(text) is not None for text in raw), dtype=bool, count=raw.shape[0])
+        concerned = (questions > 0) & _contains_any(lowered, QUESTION_WORDS) & _contains_any(lowered, CONCERN_WORDS)
+
+        scores[:, LABEL_INDEX["angry"]] += EXCLAMATION_WEIGHT * (exclamations >= 2) + SHOUT_WEIGHT * shouting
+        scores[:, LABEL_INDEX["sad"]] += ELLIPSIS_WEIGHT * (ellipses >= 2)
+        scores[:, LABEL_INDEX["hesitant"]] += HESITATION_WEIGHT * (ellipses == 1)
+        scores[:, LABEL_INDEX["fear"]] += CONCERN_WEIGHT * concerned
+        scores[:, LABEL_INDEX["neutral"]] = NEUTRAL_BASELINE
+        return scores
+
+    def weigh(self, scores: np.ndarray, speakers: Sequence[str] | None) -> np.ndarray:
+        """Apply per-speaker label weights to a score matrix."""
+        if not speakers or not self._speaker_rows:
+            return scores
+        ones = np.ones(len(LABELS), dtype=np.float32)
+        factors = np.stack([self._speaker_rows.get(speaker, ones) for speaker in speakers])
+        return scores * factors
+
+    def analyze(
+        self, texts: Sequence[str], speakers: Sequence[str] | None = None
+    ) -> tuple[np.ndarray, list[str]]:
+        """Return blended (N, 8) emo_vectors and the dominant label per line.
+
+        Vectors mix the preset vectors by score share and are clipped to
+        [0, EMOTION_CAP]: a negative speaker weight makes the mix non-convex
+        and could otherwise push a component outside that range. Labels are
+        only used for logging.
+        """
+        scores = self.weigh(self.score(texts), speakers)
+        totals = scores.sum(axis=1, keepdims=True)
+        mix = np.divide(scores, totals, out=np.zeros_like(scores), where=totals > 0)
+        vectors = np.clip(mix @ BASE_VECTORS, 0.0, EMOTION_CAP)
+        labels = [LABELS[index] for index in scores.argmax(axis=1)] if len(scores) else []
+        return vectors, labels
+
+    def blend(self, texts: Sequence[str], speakers: Sequence[str] | None = None) -> np.ndarray:
+        """Return an (N, 8) float32 matrix of blended emo_vectors."""
+        return self.analyze(texts, speakers)[0]
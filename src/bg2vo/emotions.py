@@ -1,53 +1,78 @@
 """Emotion detection for dialogue lines to guide TTS synthesis."""
 from __future__ import annotations
 
+import csv
+import os
 import re
-from typing import Literal
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, Sequence
+
+from .text import sanitize
 
 EmotionType = Literal["angry", "sad", "happy", "fear", "neutral", "urgent", "hesitant", "borrowed_voice"]
 
 
-def detect_emotion(text: str) -> EmotionType:
-    """
-    Detect emotion from dialogue text using keyword analysis and punctuation.
-    
-    Returns emotion label for use with Index-TTS emo_audio_prompt parameter.
-    """
-    text_lower = text.lower()
-    
+# Keyword tables, in detection priority order after the punctuation checks
+EMOTION_KEYWORDS: dict[str, tuple[str, ...]] = {
     # ANGRY/AGGRESSIVE patterns
-    angry_keywords = [
+    "angry": (
         'rip', 'tear', 'kill', 'die', 'death', 'blood', 'fool', 'idiot',
         'damn', 'curse', 'enough!', 'silence!', 'attack', 'fight', 'battle',
         'rage', 'fury', 'hate', 'destroy', 'crush'
-    ]
-    
+    ),
     # SAD/MOURNING patterns
-    sad_keywords = [
+    "sad": (
         'khalid', 'dead', 'lost', 'gone', 'mourn', 'grief', 'sorrow',
         'miss', 'alone', 'tears', 'cry', 'weep', 'pain', 'suffer',
         'goodbye', 'farewell', 'never again'
-    ]
-    
-    # HAPPY/PLEASED patterns
-    happy_keywords = [
-        'wonderful', 'excellent', 'perfect', 'good', 'great', 'joy',
-        'delight', 'pleased', 'glad', 'happy', 'smile', 'laugh',
-        'celebrate', 'success', 'victory', 'triumph'
-    ]
-    
+    ),
     # FEAR/WORRY patterns
-    fear_keywords = [
+    "fear": (
         'afraid', 'fear', 'scared', 'worry', 'danger', 'trap', 'help!',
         'run!', 'flee', 'escape', 'hide', 'careful', 'watch out',
         'beware', 'threat', 'peril'
-    ]
-    
+    ),
+    # HAPPY/PLEASED patterns
+    "happy": (
+        'wonderful', 'excellent', 'perfect', 'good', 'great', 'joy',
+        'delight', 'pleased', 'glad', 'happy', 'smile', 'laugh',
+        'celebrate', 'success', 'victory', 'triumph'
+    ),
     # URGENT/TENSE patterns
-    urgent_keywords = [
+    "urgent": (
         'hurry', 'quick', 'fast', 'now!', 'must', 'immediately', 'urgent',
         'rush', 'time', 'before', 'after', 'soon', 'wait'
-    ]
+    ),
+}
+
+QUESTION_WORDS = ('what', 'where', 'who', 'how', 'why')
+CONCERN_WORDS = ('happen', 'wrong', 'matter', 'is it')
+SHOUT_PATTERN = re.compile(r'\b[A-Z]{3,}\b')
+
+# Emotion vectors: [Happy, Angry, Sad, Afraid, Disgusted, Melancholic, Surprised, Calm]
+# All emotions capped at 30% (0.3) max for subtlety
+EMOTION_CAP = 0.3
+EMOTION_VECTORS: dict[str, list[float] | None] = {
+    "angry": [0.0, 0.3, 0.0, 0.0, 0.15, 0.0, 0.0, 0.0],  # Moderate angry, some disgust
+    "sad": [0.0, 0.0, 0.3, 0.0, 0.0, 0.2, 0.0, 0.0],  # Sad + melancholic
+    "happy": [0.3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.15, 0.0],  # Happy + some surprise
+    "fear": [0.0, 0.0, 0.0, 0.3, 0.0, 0.0, 0.15, 0.0],  # Afraid + surprise
+    "urgent": [0.0, 0.25, 0.0, 0.15, 0.0, 0.0, 0.0, 0.0],  # Moderate angry + some fear
+    "hesitant": [0.0, 0.0, 0.2, 0.2, 0.0, 0.0, 0.0, 0.0],  # Fear + some sadness
+    "borrowed_voice": None,  # Marker only - uses speed/pitch_shift instead
+    "neutral": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.3],  # Calm/neutral
+}
+
+
+def detect_emotion(text: str) -> EmotionType:
+    """
+    Detect emotion from dialogue text using keyword analysis and punctuation.
+    
+    Returns emotion label for use with Index-TTS emo_audio_prompt parameter.
+    """
+    text_lower = text.lower()
     
     # Punctuation-based detection
     exclamation_count = text.count('!')
@@ -63,28 +88,17 @@ def detect_emotion(text: str) -> EmotionType:
         return "sad"
     
     # Keyword-based detection (prioritized)
-    if any(keyword in text_lower for keyword in angry_keywords):
-        return "angry"
-    
-    if any(keyword in text_lower for keyword in sad_keywords):
-        return "sad"
-    
-    if any(keyword in text_lower for keyword in fear_keywords):
-        return "fear"
-    
-    if any(keyword in text_lower for keyword in happy_keywords):
-        return "happy"
-    
-    if any(keyword in text_lower for keyword in urgent_keywords):
-        return "urgent"
+    for emotion, keywords in EMOTION_KEYWORDS.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return emotion  # type: ignore[return-value]
     
     # Question with urgency = fear or concern
-    if question_count > 0 and any(word in text_lower for word in ['what', 'where', 'who', 'how', 'why']):
-        if any(word in text_lower for word in ['happen', 'wrong', 'matter', 'is it']):
+    if question_count > 0 and any(word in text_lower for word in QUESTION_WORDS):
+        if any(word in text_lower for word in CONCERN_WORDS):
             return "fear"
     
     # All caps words = shouting/anger
-    if re.search(r'\b[A-Z]{3,}\b', text):
+    if SHOUT_PATTERN.search(text):
         return "angry"
     
     # Default neutral
@@ -103,59 +117,135 @@ def get_emotion_config(emotion: EmotionType, character: str) -> dict:
     Special emotion 'borrowed_voice' is used when a character borrows another
     companion's voice. This doesn't add emotion params but serves as a marker.
     """
-    # Emotion vectors: [Happy, Angry, Sad, Afraid, Disgusted, Melancholic, Surprised, Calm]
-    # All emotions capped at 30% (0.3) max for subtlety
-    emotion_vectors = {
-        "angry": {
-            "vector": [0.0, 0.3, 0.0, 0.0, 0.15, 0.0, 0.0, 0.0],  # Moderate angry, some disgust
-        },
-        "sad": {
-            "vector": [0.0, 0.0, 0.3, 0.0, 0.0, 0.2, 0.0, 0.0],  # Sad + melancholic
-        },
-        "happy": {
-            "vector": [0.3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.15, 0.0],  # Happy + some surprise
-        },
-        "fear": {
-            "vector": [0.0, 0.0, 0.0, 0.3, 0.0, 0.0, 0.15, 0.0],  # Afraid + surprise
-        },
-        "urgent": {
-            "vector": [0.0, 0.25, 0.0, 0.15, 0.0, 0.0, 0.0, 0.0],  # Moderate angry + some fear
-        },
-        "hesitant": {
-            "vector": [0.0, 0.0, 0.2, 0.2, 0.0, 0.0, 0.0, 0.0],  # Fear + some sadness
-        },
-        "borrowed_voice": {
-            "vector": None,  # Marker only - uses speed/pitch_shift instead
-        },
-        "neutral": {
-            "vector": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.3],  # Calm/neutral
-        },
-    }
-    
-    config = emotion_vectors.get(emotion, emotion_vectors["neutral"])
+    vector = EMOTION_VECTORS.get(emotion, EMOTION_VECTORS["neutral"])
     
     result = {}
-    if config["vector"]:
-        result["emo_vector"] = config["vector"]
+    if vector:
+        result["emo_vector"] = list(vector)
     
     return result
 
 
+def _detect_chunk(texts: Sequence[str | None]) -> list[str]:
+    """Worker entry point: detect emotions for one chunk (None = leave untagged).
+
+    Texts are scored after sanitize(), as synth_batch.py scores them.
+    """
+    return [detect_emotion(sanitize(text)) if text is not None else "" for text in texts]
+
+
+def _chunked(rows: Iterable[dict[str, str]], size: int) -> Iterator[list[dict[str, str]]]:
+    chunk: list[dict[str, str]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def tag_dialogue_emotions(
+    csv_path: Path,
+    output_path: Path | None = None,
+    *,
+    speakers: Iterable[str] | None = None,
+    exclude: Iterable[str] = (),
+    overwrite: bool = False,
+    workers: int | None = None,
+    chunk_size: int = 5000,
+) -> Counter[str]:
+    """
+    Stream a lines CSV through detect_emotion across a process pool.
+
+    Rows are read and written in chunks, with at most two chunks per worker in
+    flight, so memory stays flat regardless of file size. Tagged labels go into
+    an Emotion column that synth_batch.py maps through get_emotion_config.
+
+    Args:
+        csv_path: Input CSV with Speaker and Text columns
+        output_path: Where to write the tagged CSV (may equal csv_path); None
+            only counts emotions
+        speakers: Speakers to tag (case-insensitive); None tags everyone
+        exclude: Speakers never tagged, even when ``speakers`` is None
+        overwrite: Replace existing non-empty Emotion values
+        workers: Worker processes (default: os.cpu_count()); 1 runs inline
+        chunk_size: Rows per worker task
+
+    Returns:
+        Counter mapping emotion label to number of lines tagged
+    """
+    opted_in = {speaker.strip().lower() for speaker in speakers} if speakers is not None else None
+    excluded = {speaker.strip().lower() for speaker in exclude}
+    workers = workers or os.cpu_count() or 1
+    counts: Counter[str] = Counter()
+
+    def _texts(chunk: list[dict[str, str]]) -> list[str | None]:
+        texts: list[str | None] = []
+        for row in chunk:
+            speaker = (row.get("Speaker") or "").strip().lower()
+            wanted = (opted_in is None or speaker in opted_in) and speaker not in excluded
+            if wanted and row.get("Text") is not None and (overwrite or not (row.get("Emotion") or "").strip()):
+                texts.append(row["Text"])
+            else:
+                texts.append(None)
+        return texts
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as source:
+        reader = csv.DictReader(source)
+        fieldnames = list(reader.fieldnames or [])
+        if "Emotion" not in fieldnames:
+            fieldnames.append("Emotion")
+
+        writer = None
+        target = None
+        tmp_path = None
+        if output_path is not None:
+            tmp_path = output_path.with_name(output_path.name + ".tmp")
+            target = open(tmp_path, "w", encoding="utf-8", newline="")
+            writer = csv.DictWriter(target, fieldnames=fieldnames)
+            writer.writeheader()
+
+        def _emit(chunk: list[dict[str, str]], labels: list[str]) -> None:
+            for row, label in zip(chunk, labels):
+                if label:
+                    row["Emotion"] = label
+                    counts[label] += 1
+                if writer is not None:
+                    writer.writerow(row)
+
+        try:
+            if workers == 1:
+                for chunk in _chunked(reader, chunk_size):
+                    _emit(chunk, _detect_chunk(_texts(chunk)))
+            else:
+                pending: deque[tuple[list[dict[str, str]], Future[list[str]]]] = deque()
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for chunk in _chunked(reader, chunk_size):
+                        pending.append((chunk, pool.submit(_detect_chunk, _texts(chunk))))
+                        if len(pending) >= workers * 2:
+                            done_chunk, future = pending.popleft()
+                            _emit(done_chunk, future.result())
+                    while pending:
+                        done_chunk, future = pending.popleft()
+                        _emit(done_chunk, future.result())
+        except BaseException:
+            if target is not None:
+                target.close()
+                tmp_path.unlink(missing_ok=True)  # type: ignore[union-attr]
+            raise
+
+    if target is not None:
+        target.close()
+        os.replace(tmp_path, output_path)  # type: ignore[arg-type]
+
+    return counts
+
+
 def analyze_dialogue_emotions(csv_path: str) -> dict[str, int]:
     """
     Analyze a CSV file and count emotion distribution.
     
     Returns dict mapping emotion type to count.
     """
-    import csv
-    from pathlib import Path
-    
-    emotion_counts: dict[str, int] = {}
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            emotion = detect_emotion(row['Text'])
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-    
-    return emotion_counts
+    return dict(tag_dialogue_emotions(Path(csv_path), overwrite=True))
@@ -0,0 +1,355 @@
+"""Game resources read straight from chitin.key, BIFF archives and override.
+
+GameResources parses chitin.key once (the KEY's BIF and resource tables are
+viewed as NumPy structured arrays over an mmap) and maps each BIFF file
+lazily on first use, so reading one resource touches only its own bytes.
+Loose files in override take precedence, as in the game.
+
+WavProvider hands out original voice clips by resref: from a Near Infinity
+export if there is one, or else from the game, extracting each sound
+resource once into a cache (build/wav_cache) that is kept per game install
+and refreshed when the resource's BIFF or override file changes.
+
+parse_dlg turns a binary DLG V1.0 resource into the same Statement records
+bg2vo.dparse produces from Near Infinity .D exports: one SAY per state and
+one REPLY per transition with text, with text and sound resref from the
+TLK when one is given.
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import io
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:  # Optional: decoding Ogg Vorbis sound resources
+    import soundfile as sf  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    sf = None
+
+from .dparse import Statement
+from .tlk import TlkFile
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_EXPORT_DIR = ROOT / "BG2 Files"
+DEFAULT_WAV_CACHE = ROOT / "build" / "wav_cache"
+
+TYPE_WAV = 0x0004
+TYPE_DLG = 0x03F3
+EXTENSIONS = {TYPE_WAV: "wav", TYPE_DLG: "dlg"}
+
+KEY_HEADER = struct.Struct("<4s4sIIII")
+KEY_BIF_DTYPE = np.dtype([
+    ("length", "<u4"),
+    ("name_offset", "<u4"),
+    ("name_length", "<u2"),
+    ("location", "<u2"),
+])
+KEY_RESOURCE_DTYPE = np.dtype([("resref", "S8"), ("type", "<u2"), ("locator", "<u4")])
+
+BIFF_HEADER = struct.Struct("<4s4sIII")
+BIFF_FILE_DTYPE = np.dtype([
+    ("locator", "<u4"),
+    ("offset", "<u4"),
+    ("size", "<u4"),
+    ("type", "<u2"),
+    ("unknown", "<u2"),
+])
+
+DLG_HEADER = struct.Struct("<4s4s10I")
+DLG_STATE_DTYPE = np.dtype([("strref", "<u4"), ("first", "<u4"), ("count", "<u4"), ("trigger", "<u4")])
+DLG_TRANSITION_DTYPE = np.dtype([
+    ("flags", "<u4"),
+    ("strref", "<u4"),
+    ("journal", "<u4"),
+    ("trigger", "<u4"),
+    ("action", "<u4"),
+    ("next_dlg", "S8"),
+    ("next_state", "<u4"),
+])
+TRANSITION_HAS_TEXT = 0x0001
+NO_STRREF = 0xFFFFFFFF
+
+
+def find_path(base: Path, relative: str) -> Path | None:
+    """Resolve a KEY-style path ("data\\\\Dialog.bif") under ``base``, ignoring case."""
+    current = Path(base)
+    for part in relative.replace("\\", "/").split("/"):
+        if not part:
+            continue
+        candidate = current / part
+        if not candidate.exists():
+            matches = [entry for entry in os.listdir(current) if entry.lower() == part.lower()] if current.is_dir() else []
+            if not matches:
+                return None
+            candidate = current / matches[0]
+        current = candidate
+    return current
+
+
+class BiffFile:
+    """Memory-mapped BIFF V1 archive."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        signature, version, file_count, _, entries_offset = BIFF_HEADER.unpack_from(self._map)
+        if signature != b"BIFF" or version != b"V1  ":
+            self.close()
+            raise ValueError(f"Unsupported BIFF archive {signature!r} {version!r} (only uncompressed BIFF V1): {self.path}")
+        self.entries: np.ndarray = np.frombuffer(self._map, dtype=BIFF_FILE_DTYPE, count=file_count, offset=entries_offset)
+        self._rows = {int(locator) & 0x3FFF: row for row, locator in enumerate(self.entries["locator"].tolist())}
+
+    def close(self) -> None:
+        self.entries = np.zeros(0, dtype=BIFF_FILE_DTYPE)
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def read(self, file_index: int) -> bytes:
+        entry = self.entries[self._rows[file_index]]
+        start = int(entry["offset"])
+        return self._map[start:start + int(entry["size"])]
+
+
+class GameResources:
+    """Resource lookup over chitin.key, its BIFF archives and the override folder.
+
+    ``read(resref, type)`` raises KeyError for unknown resources. Close (or
+    use as a context manager) to release the mapped files.
+    """
+
+    def __init__(self, game_dir: Path) -> None:
+        self.game_dir = Path(game_dir)
+        key_path = find_path(self.game_dir, "chitin.key")
+        if key_path is None:
+            raise FileNotFoundError(f"chitin.key not found in {self.game_dir}")
+        with open(key_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            signature, version, bif_count, resource_count, bif_offset, resource_offset = KEY_HEADER.unpack_from(data)
+            if signature != b"KEY " or version != b"V1  ":
+                raise ValueError(f"Unexpected KEY header: {signature!r} {version!r}")
+            bifs = np.frombuffer(data, dtype=KEY_BIF_DTYPE, count=bif_count, offset=bif_offset)
+            self.bif_names: List[str] = [
+                data[offset:offset + length].split(b"\0", 1)[0].decode("ascii", errors="ignore")
+                for offset, length in zip(bifs["name_offset"].tolist(), bifs["name_length"].tolist())
+            ]
+            resources = np.frombuffer(data, dtype=KEY_RESOURCE_DTYPE, count=resource_count, offset=resource_offset)
+            self._locators: Dict[Tuple[str, int], int] = {
+                (resref.decode("ascii", errors="ignore").upper(), res_type): locator
+                for resref, res_type, locator in zip(
+                    resources["resref"].tolist(), resources["type"].tolist(), resources["locator"].tolist()
+                )
+            }
+            # The views must go before the mapping can be closed
+            del bifs, resources
+
+        override_dir = find_path(self.game_dir, "override")
+        self._override: Dict[str, Path] = (
+            {path.name.lower(): path for path in override_dir.iterdir()} if override_dir is not None else {}
+        )
+        self._bifs: Dict[int, BiffFile] = {}
+        self._bif_paths: Dict[int, Path] = {}
+
+    def __enter__(self) -> "GameResources":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for biff in self._bifs.values():
+            biff.close()
+        self._bifs.clear()
+
+    def _override_path(self, resref: str, res_type: int) -> Path | None:
+        if res_type not in EXTENSIONS:
+            return None
+        return self._override.get(f"{resref}.{EXTENSIONS[res_type]}".lower())
+
+    def names(self, res_type: int) -> List[str]:
+        """Sorted resrefs of a type, from the KEY and the override folder."""
+        names = {resref for resref, kind in self._locators if kind == res_type}
+        if res_type in EXTENSIONS:
+            suffix = f".{EXTENSIONS[res_type]}"
+            names.update(path.stem.upper() for name, path in self._override.items() if name.endswith(suffix))
+        return sorted(names)
+
+    def _bif_path(self, bif_index: int) -> Path:
+        path = self._bif_paths.get(bif_index)
+        if path is None:
+            path = find_path(self.game_dir, self.bif_names[bif_index])
+            if path is None:
+                raise FileNotFoundError(f"BIFF archive not found: {self.bif_names[bif_index]}")
+            self._bif_paths[bif_index] = path
+        return path
+
+    def source(self, resref: str, res_type: int) -> Path:
+        """File a resource is read from: its override file or its BIFF archive."""
+        resref = resref.upper()
+        override = self._override_path(resref, res_type)
+        if override is not None:
+            return override
+        return self._bif_path(self._locators[(resref, res_type)] >> 20)
+
+    def read(self, resref: str, res_type: int) -> bytes:
+        resref = resref.upper()
+        override = self._override_path(resref, res_type)
+        if override is not None:
+            return override.read_bytes()
+        locator = self._locators[(resref, res_type)]
+        bif_index = locator >> 20
+        biff = self._bifs.get(bif_index)
+        if biff is None:
+            biff = self._bifs[bif_index] = BiffFile(self._bif_path(bif_index))
+        return biff.read(locator & 0x3FFF)
+
+
+class WavProvider:
+    """Original voice clips by resref ("IMOEN01" or "IMOEN01.WAV").
+
+    Lookup order: the export directory (walked once, on first use), then
+    the game's sound resources. Extracted clips are cached under
+    ``cache_dir/<game dir hash>/`` and re-extracted when their override
+    file or BIFF archive is newer than the cached copy. Ogg Vorbis
+    resources are decoded to 16-bit PCM (needs soundfile); ACM-compressed
+    (WAVC) resources are not supported and raise ValueError.
+    """
+
+    def __init__(
+        self,
+        game_dir: Path | None = None,
+        export_dir: Path | None = DEFAULT_EXPORT_DIR,
+        cache_dir: Path = DEFAULT_WAV_CACHE,
+    ) -> None:
+        game_dir = game_dir or os.environ.get("BG2_GAME_DIR")
+        self.game_dir = Path(game_dir) if game_dir else None
+        self.export_dir = Path(export_dir) if export_dir else None
+        self.cache_dir = Path(cache_dir)
+        if self.game_dir is not None:
+            # Extractions from different installs never mix
+            self.cache_dir /= hashlib.md5(os.path.abspath(self.game_dir).encode("utf-8")).hexdigest()[:12]
+        self._exported: Dict[str, Path] | None = None
+        self._resources: GameResources | None = None
+
+    def __enter__(self) -> "WavProvider":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._resources is not None:
+            self._resources.close()
+            self._resources = None
+
+    @staticmethod
+    def _resref(name: str) -> str:
+        name = Path(name).name.upper()
+        return name[:-4] if name.endswith(".WAV") else name
+
+    @property
+    def exported(self) -> Dict[str, Path]:
+        """Resref -> WAV under the export directory (walked on first use)."""
+        if self._exported is None:
+            self._exported = {}
+            if self.export_dir is not None and self.export_dir.is_dir():
+                for directory, _, files in os.walk(self.export_dir):
+                    for file_name in files:
+                        if file_name.lower().endswith(".wav"):
+                            self._exported.setdefault(file_name[:-4].upper(), Path(directory) / file_name)
+        return self._exported
+
+    @property
+    def resources(self) -> GameResources | None:
+        if self._resources is None and self.game_dir is not None:
+            self._resources = GameResources(self.game_dir)
+        return self._resources
+
+    def find(self, name: str) -> Path | None:
+        """Path of a clip, extracting it from the game if needed; None if there is no such clip."""
+        resref = self._resref(name)
+        exported = self.exported.get(resref)
+        if exported is not None:
+            return exported
+        if self.resources is None:
+            return None
+        try:
+            source = self.resources.source(resref, TYPE_WAV)
+        except KeyError:
+            return None
+        cached = self.cache_dir / f"{resref}.WAV"
+        if cached.exists() and cached.stat().st_mtime_ns >= source.stat().st_mtime_ns:
+            return cached
+        data = self.resources.read(resref, TYPE_WAV)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cached.with_suffix(".tmp")
+        tmp_path.write_bytes(self._to_wav(data, resref))
+        os.replace(tmp_path, cached)
+        return cached
+
+    def path(self, name: str) -> Path:
+        """Like find(), but raises FileNotFoundError for unknown clips."""
+        found = self.find(name)
+        if found is None:
+            raise FileNotFoundError(f"Could not find {name}")
+        return found
+
+    def names(self, pattern: str = "*") -> List[str]:
+        """Sorted resrefs matching a glob pattern ("IMOEN*"), from the export and the game."""
+        pattern = self._resref(pattern)
+        names = set(self.exported)
+        if self.resources is not None:
+            names.update(self.resources.names(TYPE_WAV))
+        return sorted(name for name in names if fnmatch.fnmatchcase(name, pattern))
+
+    @staticmethod
+    def _to_wav(data: bytes, resref: str) -> bytes:
+        if data[:4] == b"RIFF":
+            return data
+        if data[:4] == b"OggS":
+            if sf is None:
+                raise ValueError(f"{resref} is Ogg Vorbis; install soundfile to decode it")
+            audio, sample_rate = sf.read(io.BytesIO(data), dtype="int16")
+            out = io.BytesIO()
+            sf.write(out, audio, sample_rate, format="WAV", subtype="PCM_16")
+            return out.getvalue()
+        raise ValueError(f"{resref}: unsupported sound format {data[:4]!r} (ACM/WAVC clips need a Near Infinity export)")
+
+
+def parse_dlg(data: bytes, name: str, tlk: TlkFile | None = None) -> List[Statement]:
+    """SAY/REPLY statements of a DLG V1.0 resource, labelled by state index.
+
+    With ``tlk``, text and sound resref are filled in from the TLK entries.
+
+    Raises:
+        ValueError: If the data is not a DLG V1.0 resource
+    """
+    if len(data) < DLG_HEADER.size or data[:8] != b"DLG V1.0":
+        raise ValueError(f"Not a DLG V1.0 resource: {name}")
+    _, _, state_count, state_offset, transition_count, transition_offset, *_ = DLG_HEADER.unpack_from(data)
+    states = np.frombuffer(data, dtype=DLG_STATE_DTYPE, count=state_count, offset=state_offset)
+    transitions = np.frombuffer(data, dtype=DLG_TRANSITION_DTYPE, count=transition_count, offset=transition_offset)
+
+    def statement(kind: str, strref: int, label: int) -> Statement:
+        if tlk is None or strref >= len(tlk):
+            return Statement(name, kind, strref, label=str(label))
+        return Statement(name, kind, strref, tlk[strref], tlk.sound(strref), str(label))
+
+    statements: List[Statement] = []
+    for index, (strref, first, count) in enumerate(
+        zip(states["strref"].tolist(), states["first"].tolist(), states["count"].tolist())
+    ):
+        if strref != NO_STRREF:
+            statements.append(statement("SAY", strref, index))
+        replies = transitions[first:first + count]
+        for flags, reply in zip(replies["flags"].tolist(), replies["strref"].tolist()):
+            if flags & TRANSITION_HAS_TEXT and reply != NO_STRREF:
+                statements.append(statement("REPLY", reply, index))
+    return statements
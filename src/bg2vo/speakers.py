@@ -0,0 +1,87 @@
+"""Speaker attribution from data/characters.csv.
+
+SpeakerResolver maps a DLG resource, .D file, *_dlg.csv export or speaker
+alias to its canonical character. It is built once from the Canonical,
+Aliases and DLGFiles columns:
+
+- exact names (canonical names, DLG stems, aliases) go in one dict;
+- the same names also act as prefixes ("MAZZY" covers MAZZY7.DLG), bucketed
+  by length, so a lookup costs at most one probe per distinct prefix length
+  (DLG names are at most 8 characters) and the longest prefix wins.
+
+Canonical names and DLG files take precedence over aliases, so an alias
+shared by several rows (DRYAD) never shadows a character's own name.
+"""
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping
+
+ROOT = Path(__file__).resolve().parents[2]
+CHARACTERS_CSV = ROOT / "data" / "characters.csv"
+
+# File suffixes stripped before lookup: IMOEN2.DLG, IMOEN2.D, IMOEN2_dlg.csv
+NAME_SUFFIXES = (".DLG", ".D", "_DLG.CSV", "_DLG", ".CSV")
+
+
+def _key(name: str) -> str:
+    key = Path(name.strip()).name.upper()
+    for suffix in NAME_SUFFIXES:
+        if key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def _split(value: str | None, separator: str) -> List[str]:
+    return [_key(part) for part in (value or "").split(separator) if part.strip()]
+
+
+class SpeakerResolver:
+    """DLG file / alias -> canonical character, built once from characters.csv."""
+
+    def __init__(self, rows: Iterable[Mapping[str, str]] = ()) -> None:
+        self._exact: Dict[str, str] = {}
+        aliases: Dict[str, str] = {}
+        for row in rows:
+            canonical = (row.get("Canonical") or "").strip()
+            if not canonical:
+                continue
+            self._exact.setdefault(_key(canonical), canonical)
+            for dlg in _split(row.get("DLGFiles"), "|"):
+                self._exact.setdefault(dlg, canonical)
+            for alias in _split(row.get("Aliases"), ";"):
+                aliases.setdefault(alias, canonical)
+        for alias, canonical in aliases.items():
+            self._exact.setdefault(alias, canonical)
+        self._lengths = sorted({len(name) for name in self._exact}, reverse=True)
+
+    @classmethod
+    def from_csv(cls, path: Path = CHARACTERS_CSV) -> "SpeakerResolver":
+        """Resolver for a characters.csv; empty if the file does not exist."""
+        if not path.exists():
+            return cls()
+        with path.open("r", encoding="utf-8-sig", newline="") as handle:
+            return cls(csv.DictReader(handle))
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.resolve(name) is not None
+
+    def resolve(self, name: str, default: str | None = None) -> str | None:
+        """Canonical character for a DLG/.D/export file name or alias, else ``default``.
+
+        Exact names first, then the longest known name that ``name`` starts with.
+        """
+        key = _key(name)
+        canonical = self._exact.get(key)
+        if canonical is not None:
+            return canonical
+        for length in self._lengths:
+            if length < len(key):
+                canonical = self._exact.get(key[:length])
+                if canonical is not None:
+                    return canonical
+        return default
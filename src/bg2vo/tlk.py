@@ -0,0 +1,358 @@
+"""Memory-mapped access to Infinity Engine dialog.tlk files.
+
+TlkFile maps the file read-only and views the 26-byte entry table as a NumPy
+structured array, so opening even the full BG2:EE TLK costs a header parse.
+Strings are decoded only when asked for, one at a time via ``tlk[strref]`` or
+in bulk via ``get_many``. Opened with ``writable=True`` the entry table can
+be patched in place: ``set_sounds`` rewrites only the entries that change.
+
+TlkIndex is a persistent StrRef -> text cache for any text source (binary
+TLK, Near Infinity's dialog_tlk.csv export or a WeiDU dialog.tra): one
+uint32 offsets array plus one UTF-8 blob under reports/tlk-index, named by
+the source file's hash and opened with mmap.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_DIR = ROOT / "reports" / "tlk-index"
+
+HEADER = struct.Struct("<4s4sHII")
+ENTRY_DTYPE = np.dtype([
+    ("flags", "<u2"),
+    ("sound", "S8"),
+    ("volume", "<u4"),
+    ("pitch", "<u4"),
+    ("offset", "<u4"),
+    ("length", "<u4"),
+])
+
+FLAG_TEXT = 0x0001
+FLAG_SOUND = 0x0002
+FLAG_TOKENS = 0x0004
+
+
+class TlkFile:
+    """Lazily decoded view of a TLK V1 file.
+
+    ``tlk[strref]`` returns the stripped text, or "" for entries without
+    text; StrRefs past the end raise IndexError. Close the file (or use it as
+    a context manager) to release the mapping; with ``writable`` the changes
+    are flushed to disk then.
+    """
+
+    def __init__(self, path: Path, encoding: str = "cp1252", writable: bool = False) -> None:
+        self.path = Path(path)
+        self.encoding = encoding
+        self.writable = writable
+        self._file = open(self.path, "r+b" if writable else "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except ValueError as exc:  # empty file
+            self._file.close()
+            raise ValueError(f"TLK file too small: {self.path}") from exc
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"TLK file too small: {self.path}")
+        signature, version, self.language_id, count, self.string_offset = HEADER.unpack_from(self._map)
+        if signature != b"TLK " or not version.startswith(b"V1"):
+            self.close()
+            raise ValueError(f"Unexpected TLK header: {signature!r} {version!r}")
+        if HEADER.size + count * ENTRY_DTYPE.itemsize > len(self._map):
+            self.close()
+            raise ValueError("TLK entry table exceeds file length")
+
+        self.entries: np.ndarray = np.frombuffer(self._map, dtype=ENTRY_DTYPE, count=count, offset=HEADER.size)
+
+    def __enter__(self) -> "TlkFile":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The NumPy view must go before the mapping can be closed
+        self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        if getattr(self, "_map", None) is not None and not self._map.closed:
+            if self.writable:
+                self._map.flush()
+            self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _decode(self, offset: int, length: int) -> str:
+        start = self.string_offset + offset
+        return self._map[start:start + length].decode(self.encoding, errors="ignore").strip()
+
+    def __getitem__(self, strref: int) -> str:
+        if not 0 <= strref < len(self.entries):
+            raise IndexError(f"StrRef {strref} out of range (0-{len(self.entries) - 1})")
+        entry = self.entries[strref]
+        if not entry["flags"] & FLAG_TEXT or entry["length"] == 0:
+            return ""
+        return self._decode(int(entry["offset"]), int(entry["length"]))
+
+    def sound(self, strref: int) -> str:
+        """Sound resref of an entry ("" if none)."""
+        entry = self.entries[strref]
+        if not entry["flags"] & FLAG_SOUND:
+            return ""
+        return entry["sound"].rstrip(b"\0").decode("ascii", errors="ignore")
+
+    def get_many(self, strrefs: Iterable[int]) -> Dict[int, str]:
+        """Decode many StrRefs at once; entries without text or out of range are left out.
+
+        Range and flag checks and offset arithmetic run on the whole
+        selection as arrays; only the string slices are taken one by one.
+        """
+        wanted = np.unique(np.fromiter((int(strref) for strref in strrefs), dtype=np.int64))
+        wanted = wanted[(wanted >= 0) & (wanted < len(self.entries))]
+        rows = self.entries[wanted]
+        keep = ((rows["flags"] & FLAG_TEXT) != 0) & (rows["length"] > 0)
+        wanted = wanted[keep]
+        starts = rows["offset"][keep].astype(np.int64) + self.string_offset
+        ends = starts + rows["length"][keep]
+        texts: Dict[int, str] = {}
+        for strref, start, end in zip(wanted.tolist(), starts.tolist(), ends.tolist()):
+            text = self._map[start:end].decode(self.encoding, errors="ignore").strip()
+            if text:
+                texts[strref] = text
+        return texts
+
+    def to_dict(self) -> Dict[int, str]:
+        """Every non-empty string, StrRef -> text."""
+        return self.get_many(range(len(self.entries)))
+
+    def set_sounds(self, sounds: Mapping[int, str]) -> Dict[int, Tuple[int, str]]:
+        """Point entries at sound resrefs, writing only the entries that differ.
+
+        An empty resref clears the entry's sound (and its FLAG_SOUND bit).
+
+        Returns:
+            StrRef -> previous (flags, resref) of every changed entry, for restore()
+
+        Raises:
+            IndexError: If a StrRef is out of range
+            ValueError: If a resref is longer than 8 characters
+        """
+        if not self.writable:
+            raise ValueError(f"TLK opened read-only: {self.path}")
+        strrefs = self._checked(sounds)
+        resrefs = np.array([sounds[strref].upper().encode("ascii") for strref in strrefs.tolist()], dtype="S9")
+        if np.any(np.char.str_len(resrefs) > 8):
+            raise ValueError("Sound resrefs are at most 8 characters")
+        rows = self.entries[strrefs]
+        has_sound = np.char.str_len(resrefs) > 0
+        flags = np.where(has_sound, rows["flags"] | FLAG_SOUND, rows["flags"] & (0xFFFF ^ FLAG_SOUND)).astype("<u2")
+        changed = (rows["sound"] != resrefs) | (rows["flags"] != flags)
+        return self._write(strrefs[changed], flags[changed], resrefs[changed].astype("S8"))
+
+    def restore(self, previous: Mapping[int, Tuple[int, str]]) -> Dict[int, Tuple[int, str]]:
+        """Write back (flags, resref) pairs as returned by set_sounds."""
+        if not self.writable:
+            raise ValueError(f"TLK opened read-only: {self.path}")
+        strrefs = self._checked(previous)
+        flags = np.array([previous[strref][0] for strref in strrefs.tolist()], dtype="<u2")
+        resrefs = np.array([previous[strref][1].encode("ascii") for strref in strrefs.tolist()], dtype="S8")
+        return self._write(strrefs, flags, resrefs)
+
+    def _checked(self, values: Mapping[int, object]) -> np.ndarray:
+        strrefs = np.fromiter((int(strref) for strref in values), dtype=np.int64, count=len(values))
+        out_of_range = strrefs[(strrefs < 0) | (strrefs >= len(self.entries))]
+        if out_of_range.size:
+            raise IndexError(f"StrRef {int(out_of_range[0])} out of range (0-{len(self.entries) - 1})")
+        return strrefs
+
+    def _write(self, strrefs: np.ndarray, flags: np.ndarray, resrefs: np.ndarray) -> Dict[int, Tuple[int, str]]:
+        rows = self.entries[strrefs]
+        previous = {
+            strref: (int(flag), sound.decode("ascii", errors="ignore"))
+            for strref, flag, sound in zip(strrefs.tolist(), rows["flags"].tolist(), rows["sound"].tolist())
+        }
+        # Field views of the mapped table: only these entries' bytes are touched
+        self.entries["flags"][strrefs] = flags
+        self.entries["sound"][strrefs] = resrefs
+        return previous
+
+
+INDEX_MAGIC = b"BGTX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sII")  # magic, version, entry count
+
+# @12345 = ~text~
+TRA_PATTERN = re.compile(r"@(\d+)\s*=\s*~([^~]*)~", re.DOTALL)
+
+
+def read_tlk_csv(path: Path) -> Dict[int, str]:
+    """StrRef -> text from a Near Infinity CSV export (StrRef, Text columns)."""
+    texts: Dict[int, str] = {}
+    with Path(path).open("r", encoding="utf-8", errors="ignore") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                strref = int(row["StrRef"])
+            except (ValueError, KeyError):
+                continue
+            text = (row.get("Text") or "").strip()
+            if text:
+                texts[strref] = text
+    return texts
+
+
+def read_tra(path: Path) -> Dict[int, str]:
+    """StrRef -> text from a WeiDU .tra file."""
+    content = Path(path).read_text(encoding="utf-8", errors="ignore")
+    return {int(match.group(1)): match.group(2).strip() for match in TRA_PATTERN.finditer(content)}
+
+
+def read_text_source(path: Path, encoding: str = "cp1252") -> Dict[int, str]:
+    """StrRef -> text from a .tlk, .csv or .tra file, by extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".tlk":
+        with TlkFile(path, encoding) as tlk:
+            return tlk.to_dict()
+    if suffix == ".csv":
+        return read_tlk_csv(path)
+    if suffix == ".tra":
+        return read_tra(path)
+    raise ValueError(f"Unsupported text source (expected .tlk, .csv or .tra): {path}")
+
+
+class TlkIndex:
+    """Compact, memory-mapped StrRef -> text table.
+
+    Layout: INDEX_HEADER, ``count + 1`` little-endian uint32 offsets, then the
+    UTF-8 text of every StrRef back to back; an entry's text is
+    ``blob[offsets[i]:offsets[i + 1]]`` and empty for StrRefs without text.
+    Only the pages actually read are brought into memory.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = INDEX_HEADER.unpack_from(self._map)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Not a TLK index (version {INDEX_VERSION}): {self.path}")
+        self.offsets: np.ndarray = np.frombuffer(self._map, dtype="<u4", count=count + 1, offset=INDEX_HEADER.size)
+        self._blob = INDEX_HEADER.size + 4 * (count + 1)
+
+    @classmethod
+    def open(cls, source: Path, cache_dir: Path = DEFAULT_CACHE_DIR, encoding: str = "cp1252") -> "TlkIndex":
+        """Open the cached index for ``source``, building it first if the source changed."""
+        source = Path(source)
+        cache_dir = Path(cache_dir)
+        digest = source_digest(source, cache_dir, encoding)
+        path = cache_dir / f"{digest}.idx"
+        if not path.exists():
+            cls.write(path, read_text_source(source, encoding))
+        return cls(path)
+
+    @staticmethod
+    def write(path: Path, texts: Mapping[int, str]) -> None:
+        count = max(texts, default=-1) + 1
+        encoded = [b""] * count
+        for strref, text in texts.items():
+            if strref >= 0:
+                encoded[strref] = text.encode("utf-8")
+        offsets = np.zeros(count + 1, dtype="<u4")
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count))
+            f.write(offsets.tobytes())
+            f.write(b"".join(encoded))
+        os.replace(tmp_path, path)
+
+    def __enter__(self) -> "TlkIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.offsets = np.zeros(1, dtype="<u4")
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __contains__(self, strref: object) -> bool:
+        return isinstance(strref, int) and 0 <= strref < len(self) and self.offsets[strref + 1] > self.offsets[strref]
+
+    def get(self, strref: int, default: str | None = None) -> str | None:
+        if not 0 <= strref < len(self):
+            return default
+        start, end = int(self.offsets[strref]), int(self.offsets[strref + 1])
+        if start == end:
+            return default
+        return self._map[self._blob + start:self._blob + end].decode("utf-8")
+
+    def __getitem__(self, strref: int) -> str:
+        text = self.get(strref)
+        if text is None:
+            raise KeyError(strref)
+        return text
+
+    def get_many(self, strrefs: Iterable[int]) -> Dict[int, str]:
+        """StrRef -> text for the given StrRefs that have text."""
+        wanted = np.unique(np.fromiter((int(strref) for strref in strrefs), dtype=np.int64))
+        wanted = wanted[(wanted >= 0) & (wanted < len(self))]
+        starts = self.offsets[wanted].astype(np.int64) + self._blob
+        ends = self.offsets[wanted + 1].astype(np.int64) + self._blob
+        keep = ends > starts
+        return {
+            strref: self._map[start:end].decode("utf-8")
+            for strref, start, end in zip(wanted[keep].tolist(), starts[keep].tolist(), ends[keep].tolist())
+        }
+
+
+def source_digest(source: Path, cache_dir: Path = DEFAULT_CACHE_DIR, encoding: str = "cp1252") -> str:
+    """Content hash naming the index of ``source``.
+
+    The hash is remembered per path with the file's size and mtime in
+    ``cache_dir/sources.json``, so an unchanged source is never re-read;
+    an index replaced by a rebuild is deleted.
+    """
+    source = Path(source)
+    stat = source.stat()
+    key = os.path.abspath(source)
+    sources_path = Path(cache_dir) / "sources.json"
+    sources = json.loads(sources_path.read_text(encoding="utf-8")) if sources_path.exists() else {}
+    entry = sources.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns and entry["encoding"] == encoding:
+        return entry["digest"]
+
+    hasher = hashlib.md5(f"v{INDEX_VERSION}:{encoding}:".encode("ascii"))
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    digest = hasher.hexdigest()
+
+    if entry and entry["digest"] != digest and not any(
+        other["digest"] == entry["digest"] for path, other in sources.items() if path != key
+    ):
+        (Path(cache_dir) / f"{entry['digest']}.idx").unlink(missing_ok=True)
+    sources[key] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "encoding": encoding, "digest": digest}
+    sources_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = sources_path.with_name(sources_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(sources, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, sources_path)
+    return digest
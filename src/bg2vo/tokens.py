@@ -0,0 +1,362 @@
+"""Sentence boundaries and Index-TTS token counts for synthesis planning.
+
+The index records, for every StrRef, where each sentence of the sanitized text
+ends and how many Index-TTS BPE tokens the line and each sentence take. Batch
+sizing, long-line splitting and ETA estimates can query it instead of guessing
+from character counts.
+
+Only the tokenizer (text normalizer + bpe.model) is loaded, never the GPT or
+acoustic model, and only on first use.
+
+FrontendCache/CachingTokenizer reuse the same fingerprint to let
+synth_batch.py skip normalization and tokenization on re-renders.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Protocol, Tuple
+
+from .text import sanitize
+
+INDEX_VERSION = 1
+
+# Sentence ends: runs of . ! ? (including "...") followed by whitespace or end.
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s|$)")
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Return (start, end) character spans of each sentence in ``text``."""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    ends = [match.end() for match in SENTENCE_END.finditer(text)]
+    if not ends or ends[-1] < len(text):
+        ends.append(len(text))
+    for end in ends:
+        segment = text[start:end]
+        if segment.strip():
+            # Skip the whitespace between sentences so spans start on a character.
+            spans.append((start + len(segment) - len(segment.lstrip()), end))
+        start = end
+    return spans
+
+
+class Tokenizer(Protocol):
+    fingerprint: str
+
+    def count(self, text: str) -> int: ...
+
+
+class IndexTTSTokenizer:
+    """Lazy wrapper around Index-TTS's TextNormalizer + TextTokenizer."""
+
+    def __init__(self, index_tts_root: Path, bpe_model: Path | None = None) -> None:
+        self.index_tts_root = Path(index_tts_root)
+        self.bpe_model = Path(bpe_model) if bpe_model else self.index_tts_root / "checkpoints" / "bpe.model"
+        self._tokenizer: Any = None
+        self._fingerprint: str | None = None
+
+    @classmethod
+    def from_config(cls, index_tts_root: Path, config_yaml: Path | None = None) -> "IndexTTSTokenizer":
+        """Resolve bpe.model from Index-TTS's checkpoints/config.yaml."""
+        checkpoints = Path(index_tts_root) / "checkpoints"
+        config_yaml = Path(config_yaml) if config_yaml else checkpoints / "config.yaml"
+        bpe_name = "bpe.model"
+        if config_yaml.exists():
+            from .config import _load_yaml
+
+            dataset = _load_yaml(config_yaml).get("dataset") or {}
+            bpe_name = dataset.get("bpe_model", bpe_name)
+        return cls(index_tts_root, checkpoints / bpe_name)
+
+    @property
+    def fingerprint(self) -> str:
+        """MD5 of bpe.model plus the Index-TTS package version."""
+        if self._fingerprint is None:
+            if not self.bpe_model.exists():
+                raise FileNotFoundError(f"Index-TTS BPE model not found: {self.bpe_model}")
+            hasher = hashlib.md5(self.bpe_model.read_bytes())
+            try:
+                from importlib.metadata import version
+
+                hasher.update(version("indextts").encode("utf-8"))
+            except Exception:  # pragma: no cover - package metadata optional
+                pass
+            self._fingerprint = hasher.hexdigest()
+        return self._fingerprint
+
+    def _load(self) -> Any:
+        if self._tokenizer is None:
+            if str(self.index_tts_root) not in sys.path:
+                sys.path.insert(0, str(self.index_tts_root))
+            try:
+                from indextts.utils.front import TextNormalizer, TextTokenizer  # type: ignore[import-not-found]
+            except ModuleNotFoundError as exc:  # pragma: no cover - clearer error to caller
+                raise RuntimeError(
+                    "Index-TTS not found. Please install the repo or update index_tts_root in config."
+                ) from exc
+            normalizer = TextNormalizer()
+            normalizer.load()
+            self._tokenizer = TextTokenizer(str(self.bpe_model), normalizer)
+        return self._tokenizer
+
+    def tokenize(self, text: str) -> List[str]:
+        return self._load().tokenize(text)
+
+    def count(self, text: str) -> int:
+        return len(self.tokenize(text))
+
+
+@dataclass
+class LineTokens:
+    strref: str
+    tokens: int
+    sentences: List[Tuple[int, int]] = field(default_factory=list)
+    sentence_tokens: List[int] = field(default_factory=list)
+
+    @property
+    def longest_sentence(self) -> int:
+        return max(self.sentence_tokens, default=0)
+
+
+class TokenIndex:
+    """StrRef -> LineTokens cache backed by a JSON file.
+
+    Entries are keyed by StrRef and carry an MD5 of the sanitized text; the
+    whole file is discarded when the tokenizer fingerprint changes.
+    """
+
+    def __init__(self, path: Path, fingerprint: str | None = None) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.stale = False
+
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            stored = data.get("tokenizer")
+            if data.get("version") == INDEX_VERSION and (fingerprint is None or stored == fingerprint):
+                self._entries = data.get("entries", {})
+                self.fingerprint = stored
+            else:
+                self.stale = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, strref: object) -> bool:
+        return str(strref) in self._entries
+
+    def update(self, rows: Iterable[Dict[str, str]], tokenizer: Tokenizer) -> Tuple[int, int]:
+        """Index every row, tokenizing only new or edited lines.
+
+        Returns:
+            Tuple of (tokenized, reused) counts
+        """
+        if self.fingerprint not in (None, tokenizer.fingerprint):
+            self._entries = {}
+        self.fingerprint = tokenizer.fingerprint
+
+        tokenized = 0
+        reused = 0
+        for row in rows:
+            strref = (row.get("StrRef") or "").strip()
+            if not strref:
+                continue
+            sanitized = sanitize(row.get("Text") or "")
+            digest = hashlib.md5(sanitized.encode("utf-8")).hexdigest()
+            entry = self._entries.get(strref)
+            if entry and entry["digest"] == digest:
+                reused += 1
+                continue
+
+            spans = split_sentences(sanitized)
+            self._entries[strref] = {
+                "digest": digest,
+                "tokens": tokenizer.count(sanitized) if sanitized else 0,
+                "sentences": [list(span) for span in spans],
+                "sentence_tokens": [tokenizer.count(sanitized[s:e]) for s, e in spans],
+            }
+            tokenized += 1
+        return tokenized, reused
+
+    def get(self, strref: str | int) -> LineTokens | None:
+        entry = self._entries.get(str(strref))
+        if entry is None:
+            return None
+        return LineTokens(
+            strref=str(strref),
+            tokens=entry["tokens"],
+            sentences=[tuple(span) for span in entry["sentences"]],  # type: ignore[misc]
+            sentence_tokens=list(entry["sentence_tokens"]),
+        )
+
+    def __iter__(self) -> Iterator[LineTokens]:
+        for strref in self._entries:
+            line = self.get(strref)
+            if line is not None:
+                yield line
+
+    def total_tokens(self, strrefs: Iterable[str | int]) -> int:
+        """Sum of token counts for the given StrRefs (unknown ones count 0)."""
+        return sum(self._entries.get(str(strref), {}).get("tokens", 0) for strref in strrefs)
+
+    def over_limit(self, max_tokens: int) -> List[LineTokens]:
+        """Lines whose full text exceeds ``max_tokens`` (candidates for splitting)."""
+        return [line for line in self if line.tokens > max_tokens]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": INDEX_VERSION,
+            "tokenizer": self.fingerprint,
+            "entries": self._entries,
+        }
+        self.path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+
+
+class FrontendCache:
+    """Persistent cache of Index-TTS text-frontend output.
+
+    Stores the normalizer output, BPE pieces and token ids for each exact text
+    sent to Index-TTS, keyed by an MD5 of the text. The file is JSON lines: a
+    header with the tokenizer fingerprint, then one entry per line, so save()
+    only appends entries added since the last save. A file written for another
+    fingerprint (or cut short by a crash) is rewritten on the next save.
+    """
+
+    def __init__(self, path: Path, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[str] = []
+        self._rewrite = True
+        self.hits = 0
+        self.misses = 0
+
+        if path.exists():
+            with path.open("r", encoding="utf-8") as handle:
+                try:
+                    header = json.loads(handle.readline() or "null")
+                    if header == self._header():
+                        for line in handle:
+                            record = json.loads(line)
+                            self._entries[record.pop("key")] = record
+                        self._rewrite = False
+                except ValueError:
+                    pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _header(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "tokenizer": self.fingerprint}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Dict[str, Any] | None:
+        entry = self._entries.get(self.key(text))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, text: str, normalized: str, tokens: List[str], ids: List[int]) -> Dict[str, Any]:
+        entry = {
+            "normalized": normalized,
+            "tokens": list(tokens),
+            "ids": [int(token_id) for token_id in ids],
+        }
+        key = self.key(text)
+        self._entries[key] = entry
+        self._pending.append(key)
+        return entry
+
+    @staticmethod
+    def _line(key: str, entry: Dict[str, Any]) -> str:
+        return json.dumps({"key": key, **entry}, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def save(self) -> None:
+        if not self._rewrite:
+            if self._pending:
+                with self.path.open("a", encoding="utf-8") as handle:
+                    handle.writelines(self._line(key, self._entries[key]) for key in self._pending)
+            self._pending.clear()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            handle.write(json.dumps(self._header(), separators=(",", ":")) + "\n")
+            handle.writelines(self._line(key, entry) for key, entry in self._entries.items())
+        os.replace(tmp_path, self.path)
+        self._pending.clear()
+        self._rewrite = False
+
+
+class _RecordingNormalizer:
+    """Wraps a text normalizer and remembers its most recent output."""
+
+    def __init__(self, inner: Any) -> None:
+        self._inner = inner
+        self.last: str | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def normalize(self, text: str, *args: Any, **kwargs: Any) -> str:
+        self.last = self._inner.normalize(text, *args, **kwargs)
+        return self.last
+
+
+class CachingTokenizer:
+    """Drop-in proxy for Index-TTS's TextTokenizer backed by a FrontendCache.
+
+    ``tokenize`` (normalization + BPE) is served from the cache when the exact
+    text was seen before; ``convert_tokens_to_ids`` uses the cached piece ids.
+    Everything else is delegated to the wrapped tokenizer.
+
+    The wrapped tokenizer's normalizer is swapped for a recording wrapper, so
+    on a miss the normalized text stored in the cache is the one the tokenizer
+    produced itself rather than a second normalization pass.
+    """
+
+    def __init__(self, inner: Any, cache: FrontendCache) -> None:
+        self._inner = inner
+        self._cache = cache
+        self._piece_ids: Dict[str, int] = {}
+        normalizer = getattr(inner, "normalizer", None)
+        self._normalizer = _RecordingNormalizer(normalizer) if normalizer is not None else None
+        if self._normalizer is not None:
+            inner.normalizer = self._normalizer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def tokenize(self, text: str) -> List[str]:
+        entry = self._cache.get(text)
+        if entry is None:
+            normalized = None
+            if self._normalizer is not None:
+                self._normalizer.last = None
+            tokens = self._inner.tokenize(text)
+            if self._normalizer is not None:
+                normalized = self._normalizer.last
+            entry = self._cache.put(text, text if normalized is None else normalized, tokens, self._inner.convert_tokens_to_ids(tokens))
+        self._piece_ids.update(zip(entry["tokens"], entry["ids"]))
+        return list(entry["tokens"])
+
+    def convert_tokens_to_ids(self, tokens: str | List[str]) -> List[int]:
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        try:
+            return [self._piece_ids[token] for token in tokens]
+        except KeyError:
+            return self._inner.convert_tokens_to_ids(tokens)
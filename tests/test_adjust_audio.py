@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import scipy.io.wavfile as wavfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts" / "utils"))
+
+import adjust_audio  # type: ignore[import]  # noqa: E402
+
+
+def _stereo(frames: int = 22050) -> np.ndarray:
+    t = np.arange(frames) / 22050
+    left = 8000 * np.sin(2 * np.pi * 220 * t)
+    right = 4000 * np.sin(2 * np.pi * 330 * t)
+    return np.column_stack([left, right]).astype(np.int16)
+
+
+def test_stereo_gain_and_speed_round_trip(tmp_path):
+    source = tmp_path / "stereo.wav"
+    output = tmp_path / "out.wav"
+    audio = _stereo()
+    wavfile.write(str(source), 22050, audio)
+
+    adjust_audio.process_audio_file(source, output, gain_db=-6, verbose=False)
+    rate, data = wavfile.read(str(output))
+    assert rate == 22050 and data.shape == audio.shape
+    expected = audio * np.float32(10 ** (-6 / 20))
+    assert np.abs(data - expected).max() <= 1.5  # one dithered LSB
+
+    adjust_audio.process_audio_file(source, output, speed=0.95, verbose=False)
+    _, data = wavfile.read(str(output))
+    assert data.ndim == 2 and data.shape[1] == 2
+    assert abs(len(data) - len(audio) / 0.95) <= 1
+    # Channels stay apart: the quieter right channel stays quieter
+    assert np.abs(data[:, 1]).max() < np.abs(data[:, 0]).max()
+
+
+def test_dither_is_seeded_per_channel():
+    audio = np.full((1000, 2), 0.5, dtype=np.float32)
+
+    first = adjust_audio.to_pcm16(audio)
+    assert first.shape == audio.shape
+    assert np.array_equal(first, adjust_audio.to_pcm16(audio))
+    assert not np.array_equal(first[:, 0], first[:, 1])
+    # Mono keeps its (frames, 2) noise draw, so existing renders stay byte-identical
+    pairs = np.random.default_rng(0).random((1000, 2), dtype=np.float32)
+    expected = np.rint(audio[:, 0] + (pairs[:, 0] - pairs[:, 1])).astype(np.int16)
+    assert np.array_equal(adjust_audio.to_pcm16(audio[:, 0]), expected)
+
+
+def test_pitch_shift_handles_each_stereo_channel():
+    audio = adjust_audio.to_float32(_stereo())
+
+    shifted = adjust_audio.change_pitch(audio, 22050, -2)
+
+    assert shifted.shape == audio.shape
+    for channel in range(2):
+        mono = adjust_audio.change_pitch(audio[:, channel], 22050, -2)
+        assert np.allclose(shifted[:, channel], mono)
+    with pytest.raises(ValueError):
+        adjust_audio.TimeStretcher(1.1).process(audio)
+
+
+def _streamed(audio: np.ndarray, block: int, **params) -> np.ndarray:
+    channels = audio.shape[1] if audio.ndim > 1 else 1
+    stages = adjust_audio.build_stages(len(audio), channels=channels, **params)
+    pieces = [adjust_audio.run_stages(stages, audio[start:start + block]) for start in range(0, len(audio), block)]
+    pieces.append(adjust_audio.run_stages(stages, audio[:0], final=True))
+    return np.concatenate(pieces)
+
+
+@pytest.mark.parametrize("params", [
+    {"speed": 0.95},
+    {"pitch_shift": -2},
+    {"speed": 1.1, "pitch_shift": 3, "gain_db": -2},
+])
+def test_streamed_stereo_matches_one_shot_for_any_block_size(params):
+    audio = (np.random.default_rng(1).standard_normal((30011, 2)) * 3000).astype(np.float32)
+
+    whole = _streamed(audio, len(audio), **params)
+    for block in (1000, 4096, 7777):
+        # Float32 rounding only; a dithered LSB is 1.0
+        assert np.allclose(_streamed(audio, block, **params), whole, atol=0.01)
+    assert np.allclose(_streamed(audio[:, 1], 4096, **params), whole[:, 1], atol=0.01)
+    if "pitch_shift" not in params:
+        assert np.allclose(whole, adjust_audio.change_speed(audio, 22050, params["speed"])[0], atol=0.01)
+    elif "speed" not in params:
+        assert np.allclose(whole, adjust_audio.change_pitch(audio, 22050, params["pitch_shift"]), atol=0.01)
+
+
+def test_stream_process_file_keeps_stereo(tmp_path):
+    source = tmp_path / "stereo.wav"
+    output = tmp_path / "out.wav"
+    audio = _stereo(30011)
+    wavfile.write(str(source), 22050, audio)
+
+    adjust_audio.stream_process_file(source, output, speed=0.95, pitch_shift=-2, block_size=4096)
+
+    _, data = wavfile.read(str(output))
+    expected = _streamed(adjust_audio.to_float32(audio), len(audio), speed=0.95, pitch_shift=-2)
+    assert data.shape == expected.shape
+    assert np.abs(data - expected).max() <= 1.5
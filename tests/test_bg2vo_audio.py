@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+import bg2vo.audio as audio_mod  # type: ignore[import-not-found]
+
+
+def _wav_bytes(rate: int, bits: int, channels: int, frames: int, extra: bytes = b"") -> bytes:
+    block_align = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", 1, channels, rate, rate * block_align, block_align, bits)
+    data = b"\x00" * (frames * block_align)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra + b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_read_wav_header_skips_unknown_chunks(tmp_path):
+    # Odd-sized LIST chunk before data exercises the word-alignment padding
+    extra = b"LIST" + struct.pack("<I", 5) + b"INFOx" + b"\x00"
+    path = tmp_path / "line.wav"
+    path.write_bytes(_wav_bytes(22050, 16, 1, 22050, extra))
+
+    info = audio_mod.read_wav_header(path)
+
+    assert (info.sample_rate, info.bits_per_sample, info.channels) == (22050, 16, 1)
+    assert info.frames == 22050 and info.duration == pytest.approx(1.0)
+    assert info.conforms(22050, 16)
+    assert not info.conforms(44100, 16)
+
+
+def test_read_wav_header_rejects_non_riff(tmp_path):
+    path = tmp_path / "line.wav"
+    path.write_bytes(b"OggS" + b"\x00" * 40)
+
+    with pytest.raises(ValueError):
+        audio_mod.read_wav_header(path)
+
+
+def test_wav_index_reparses_only_changed_files(tmp_path):
+    first = tmp_path / "a.wav"
+    second = tmp_path / "b.wav"
+    first.write_bytes(_wav_bytes(22050, 16, 1, 22050))
+    second.write_bytes(_wav_bytes(44100, 16, 2, 4410))
+
+    with audio_mod.WavIndex(tmp_path / "index.sqlite") as index:
+        assert index.get_many([first, second])[second].sample_rate == 44100
+        assert index.misses == 2
+
+    first.write_bytes(_wav_bytes(22050, 16, 1, 11025))
+    with audio_mod.WavIndex(tmp_path / "index.sqlite") as index:
+        infos = index.get_many([first, second])
+        assert (index.hits, index.misses) == (1, 1)
+        assert infos[first].duration == pytest.approx(0.5)
+
+        # Missing clips are skipped unless strict
+        assert set(index.get_many([first, tmp_path / "missing.wav"])) == {first}
+        with pytest.raises(FileNotFoundError):
+            index.get_many([tmp_path / "missing.wav"], strict=True)
+
+
+def test_wav_duration_opens_shared_index_on_first_use(tmp_path, monkeypatch):
+    index_path = tmp_path / "wav-index.sqlite"
+    monkeypatch.setattr(audio_mod, "DEFAULT_INDEX", index_path)
+    monkeypatch.setattr(audio_mod, "_shared_index", None)
+    clip = tmp_path / "clip.wav"
+    clip.write_bytes(_wav_bytes(22050, 16, 1, 11025))
+
+    assert not index_path.exists()
+    assert audio_mod.wav_duration(clip) == pytest.approx(0.5)
+    assert index_path.exists()
+    assert audio_mod.shared_index() is audio_mod.shared_index()
+    audio_mod.shared_index().close()
+
+
+def test_encode_manifest_tracks_wav_and_ogg_content(tmp_path):
+    wav, ogg = tmp_path / "1.wav", tmp_path / "1.ogg"
+    wav.write_bytes(_wav_bytes(22050, 16, 1, 100))
+    ogg.write_bytes(b"OggS-encoded")
+    manifest = audio_mod.EncodeManifest(tmp_path / "encode-manifest.json")
+    manifest.record("1.wav", {"wav": audio_mod.file_digest(wav), "ogg": audio_mod.file_digest(ogg), "quality": 0.4})
+    manifest.save()
+
+    reloaded = audio_mod.EncodeManifest(tmp_path / "encode-manifest.json")
+    assert reloaded.encodes(wav, ogg)
+    assert reloaded.is_current(wav, ogg, 0.4) and not reloaded.is_current(wav, ogg, 0.5)
+    wav.write_bytes(_wav_bytes(22050, 16, 1, 200))
+    assert not reloaded.encodes(wav, ogg)
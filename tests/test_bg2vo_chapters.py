@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+
+from bg2vo.chapters import UNASSIGNED, ChapterResolver, ChapterWriter, chapter_number  # type: ignore[import-not-found]
+
+FIELDS = ["StrRef", "Speaker", "Text", "Original_VO_WAV", "Chapter", "DLG_File"]
+
+
+def _rows(text: str) -> list[dict[str, str]]:
+    return [
+        {"StrRef": "1", "Speaker": "Imoen", "Text": text, "Original_VO_WAV": "IMOEN01", "Chapter": "1", "DLG_File": "IMOEN2"},
+        {"StrRef": "2", "Speaker": "Aerie", "Text": "Hi.", "Original_VO_WAV": "", "Chapter": "", "DLG_File": "AERIE"},
+        {"StrRef": "3", "Speaker": "Minsc", "Text": "Boo!", "Original_VO_WAV": "", "Chapter": "2", "DLG_File": "MINSC"},
+    ]
+
+
+def test_chapter_resolver_reads_map(tmp_path):
+    map_csv = tmp_path / "dlg_chapter_map.csv"
+    map_csv.write_text(
+        "Speaker,DLGFile,Chapter,Priority,Notes\n"
+        "Dryad,IDRYAD1.DLG,Chapter 1 - Irenicus Dungeon,1,\n"
+        "Aerie,AERIEJ.DLG,Unassigned,3,\n"
+        "Minsc,MINSCJ.DLG,Chapter 2 - Waukeen's Promenade,2,\n"
+        "Minsc,MINSCJ.DLG,Chapter 3 - Trademeet,2,\n",
+        encoding="utf-8",
+    )
+    chapters = ChapterResolver.from_csv(map_csv)
+
+    assert chapter_number("Chapter 4 - Underdark") == 4
+    assert chapter_number("Unassigned") is None
+    assert len(chapters) == 2
+    assert chapters.resolve("MINSCJ") == 3  # Last row wins
+    assert chapters.resolve("idryad1.d") == 1
+    assert chapters.resolve("AERIEJ") is None
+    assert chapters.resolve("AERIEJ", 3) == 3
+
+
+def test_chapter_writer_routes_rows_and_skips_unchanged_files(tmp_path):
+    with ChapterWriter(tmp_path, FIELDS) as writer:
+        for row in _rows("Heya!"):
+            writer.write(row)
+    assert writer.counts == {1: 1, 2: 1, UNASSIGNED: 1}
+    assert writer.voiced == {1: 1}
+    assert (tmp_path / "chapter_unassigned.csv").read_text(encoding="utf-8").splitlines()[1].startswith("2,Aerie")
+
+    os.utime(tmp_path / "chapter2_lines.csv", (0, 0))
+    with ChapterWriter(tmp_path, FIELDS) as writer:
+        for row in _rows("Heya, again!"):
+            writer.write(row)
+    assert writer.changed == {1: True, 2: False, UNASSIGNED: False}
+    assert (tmp_path / "chapter2_lines.csv").stat().st_mtime == 0
+    assert "Heya, again!" in (tmp_path / "chapter1_lines.csv").read_text(encoding="utf-8")
+    assert not list(tmp_path.glob("*.tmp"))
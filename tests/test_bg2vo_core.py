@@ -8,7 +8,9 @@ import pytest
 
 import bg2vo.audit as audit_mod  # type: ignore[import-not-found]
 import bg2vo.config as config_mod  # type: ignore[import-not-found]
+import bg2vo.emotions as emotions_mod  # type: ignore[import-not-found]
 import bg2vo.lines as lines_mod  # type: ignore[import-not-found]
+import bg2vo.text as text_mod  # type: ignore[import-not-found]
 import bg2vo.voices as voices_mod  # type: ignore[import-not-found]
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -83,4 +85,48 @@ def test_count_lines_from_csv(tmp_path):
     counts = audit_mod.count_lines(csv_path)
 
     assert counts["Imoen"] == 2
-    assert counts["Minsc"] == 1
\ No newline at end of file
+    assert counts["Minsc"] == 1
+
+
+def test_sanitize_drops_direct_address_tokens():
+    assert text_mod.sanitize("<CHARNAME>, we must go.") == "We must go."
+    assert text_mod.sanitize("Hello, <CHARNAME>!") == "Hello!"
+    assert text_mod.sanitize("<PRO_HESHE> is ~here~.") == "They are here."
+
+
+def test_tag_dialogue_emotions_respects_opt_in(tmp_path):
+    csv_path = tmp_path / "all_lines.csv"
+    csv_path.write_text(
+        "StrRef,Speaker,Text,Emotion\n"
+        "1,Ilyich,You will die!!,\n"
+        "2,Imoen,You will die!!,\n"
+        "3,Ilyich,Hello there.,sad\n",
+        encoding="utf-8",
+    )
+
+    counts = emotions_mod.tag_dialogue_emotions(csv_path, csv_path, speakers=["ilyich"], workers=1)
+
+    rows = csv_path.read_text(encoding="utf-8").splitlines()
+    assert rows[1].endswith(",angry")
+    assert rows[2].endswith(",")  # Imoen not opted in
+    assert rows[3].endswith(",sad")  # Manual value preserved
+    assert counts == {"angry": 1}
+
+
+def test_tag_dialogue_emotions_excludes_speakers_and_scores_sanitized_text(tmp_path):
+    csv_path = tmp_path / "all_lines.csv"
+    csv_path.write_text(
+        "StrRef,Speaker,Text,Emotion\n"
+        "1,Ilyich,You will die!!,\n"
+        "2,Jaheira,You will die!!,\n"
+        "3,Ilyich,Hello <CHARNAME>?,\n",
+        encoding="utf-8",
+    )
+
+    counts = emotions_mod.tag_dialogue_emotions(csv_path, csv_path, exclude=["JAHEIRA"], workers=1)
+
+    rows = csv_path.read_text(encoding="utf-8").splitlines()
+    assert rows[1].endswith(",angry")
+    assert rows[2].endswith(",")  # Excluded (auto_emotion speakers are blended instead)
+    assert rows[3].endswith(",neutral")  # Scored as "Hello you?", not the raw <CHARNAME> token
+    assert counts == {"angry": 1, "neutral": 1}
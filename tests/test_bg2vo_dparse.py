@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import bg2vo.dparse as dparse  # type: ignore[import-not-found]
+
+D_TEXT = """BEGIN ~IMOEN2~
+
+IF ~~ THEN BEGIN 0 // from:
+  SAY #38537 /* ~Heya! It's me, Imoen.~ [IMOEN15] */
+  IF ~~ THEN REPLY #38538 /* ~Imoen! Are you all right?~ */ GOTO 1
+END
+
+IF ~~ THEN BEGIN 1 // from: 0.0
+  SAY #38606 /* ~I'm fine.~ */
+  IF ~~ THEN EXIT
+END
+"""
+
+
+def test_parse_text_extracts_says_and_replies():
+    statements = dparse.parse_text(D_TEXT, "IMOEN2")
+
+    assert [(s.kind, s.strref, s.sound) for s in statements] == [
+        ("SAY", 38537, "IMOEN15"),
+        ("REPLY", 38538, ""),
+        ("SAY", 38606, ""),
+    ]
+    assert statements[0].text == "Heya! It's me, Imoen."
+    assert statements[0].dlg == "IMOEN2"
+
+
+def test_parse_text_follows_chains_multi_say_and_labels():
+    content = """BEGIN ~IMOEN2~
+IF WEIGHT #2 ~Global("x","GLOBAL",1)~ THEN BEGIN start
+  SAY #10 /* ~First.~ [IMOEN10] */ = #11 /* %Second "quoted".% */
+  ++ #12 /* ~Reply.~ */ + 1
+  + ~True()~ + #13 GOTO 1
+  IF ~~ THEN UNSOLVED_JOURNAL #99 EXIT
+END
+
+CHAIN IF ~Global("y","GLOBAL",1)~ THEN IMOEN2 talk
+  #20 /* ~Imoen.~ */
+  == JAHEIRJ IF ~InParty("Jaheira")~ THEN #21 /* ~Jaheira.~ [JAHEIR21] */
+  = #22
+  == IMOEN2 #23
+EXIT
+
+INTERJECT_COPY_TRANS SAFE MINSC 4
+  == MINSCJ #30 /* ~Boo!~ */
+END
+"""
+    statements = dparse.parse_text(content, "FILE")
+
+    assert [(s.dlg, s.kind, s.strref, s.label) for s in statements] == [
+        ("IMOEN2", "SAY", 10, "start"),
+        ("IMOEN2", "SAY", 11, "start"),
+        ("IMOEN2", "REPLY", 12, "start"),
+        ("IMOEN2", "REPLY", 13, "start"),
+        ("IMOEN2", "SAY", 20, "talk"),
+        ("JAHEIRJ", "SAY", 21, "talk"),
+        ("JAHEIRJ", "SAY", 22, "talk"),
+        ("IMOEN2", "SAY", 23, "talk"),
+        ("MINSCJ", "SAY", 30, "4"),
+    ]
+    assert (statements[1].text, statements[5].sound) == ('Second "quoted".', "JAHEIR21")
+
+
+def test_parse_text_accepts_every_state_header_form():
+    headers = ["IF ~True()~ THEN BEGIN s1", "IF ~True()~ BEGIN s1", "IF ~True()~ THEN s1", "IF ~True()~ s1"]
+    for header in headers:
+        statements = dparse.parse_text(f"BEGIN ~BAR~\n{header}\n  SAY #100 = #101\n  ++ #103 EXIT\nEND\n", "FILE")
+
+        assert [(s.dlg, s.kind, s.strref, s.label) for s in statements] == [
+            ("BAR", "SAY", 100, "s1"),
+            ("BAR", "SAY", 101, "s1"),
+            ("BAR", "REPLY", 103, "s1"),
+        ], header
+
+
+def test_parse_text_skips_if_file_exists():
+    content = """APPEND IF_FILE_EXISTS BAR
+IF ~~ s1 SAY #1 END
+END
+CHAIN IF_FILE_EXISTS BAR lbl
+  #2
+  == IF_FILE_EXISTS BAZ #3
+EXIT
+INTERJECT_COPY_TRANS SAFE IF_FILE_EXISTS QUX 4
+  == QUXJ #4
+END
+"""
+    statements = dparse.parse_text(content, "FILE")
+
+    assert [(s.dlg, s.strref, s.label) for s in statements] == [
+        ("BAR", 1, "s1"), ("BAR", 2, "lbl"), ("BAZ", 3, "lbl"), ("QUXJ", 4, "4"),
+    ]
+
+
+def test_parse_text_survives_unterminated_comment():
+    statements = dparse.parse_text("SAY #1 /* ~One.~ */\nSAY #2 /* ~Two.~ [TWO] \n" + "SAY #3 ~ " * 1000, "X")
+
+    assert [(s.strref, s.text, s.sound) for s in statements] == [(1, "One.", ""), (2, "Two.", "TWO")]
+
+
+def test_parse_files_in_pool_keeps_input_order(tmp_path):
+    paths = []
+    for name in ("B.D", "A.D", "C.D"):
+        path = tmp_path / name
+        path.write_text(D_TEXT, encoding="utf-8")
+        paths.append(path)
+
+    parsed = dparse.parse_files(paths + [tmp_path / "missing.D"], workers=2)
+
+    assert list(parsed) == paths
+    assert dparse.voiced(parsed) == {38537: "IMOEN15"}
+
+
+def test_d_index_reparses_only_changed_files(tmp_path):
+    corpus = tmp_path / "Dialog Files"
+    corpus.mkdir()
+    (corpus / "IMOEN2.D").write_text(D_TEXT, encoding="utf-8")
+    (corpus / "MINSC.D").write_text("SAY #100 /* ~Go for the eyes, Boo!~ [MINSC01] */", encoding="utf-8")
+
+    with dparse.DIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(corpus, workers=1)["added"] == 2
+
+        (corpus / "MINSC.D").write_text("SAY #101 /* ~Butt-kicking for goodness!~ */", encoding="utf-8")
+        (corpus / "IMOEN2.D").touch()
+        (corpus / "NEW.D").write_text("SAY #7 /* ~Hm.~ */", encoding="utf-8")
+        counts = index.update(corpus, workers=1)
+        assert (counts["added"], counts["changed"], counts["unchanged"], counts["removed"]) == (1, 1, 1, 0)
+
+        (corpus / "NEW.D").unlink()
+        assert index.update(corpus, workers=1)["removed"] == 1
+        parsed = index.statements(corpus)
+
+    assert [path.name for path in parsed] == ["IMOEN2.D", "MINSC.D"]
+    assert parsed[corpus / "MINSC.D"] == [dparse.Statement("MINSC", "SAY", 101, "Butt-kicking for goodness!")]
+    assert parsed[corpus / "IMOEN2.D"] == dparse.parse_text(D_TEXT, "IMOEN2")
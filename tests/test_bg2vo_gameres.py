@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import struct
+
+import pytest
+
+import bg2vo.gameres as gameres  # type: ignore[import-not-found]
+from bg2vo.dparse import Statement  # type: ignore[import-not-found]
+from bg2vo.tlk import TlkFile  # type: ignore[import-not-found]
+
+from test_bg2vo_tlk import _tlk_bytes
+
+
+def _dlg_bytes(states: list[tuple[int, list[int | None]]]) -> bytes:
+    """DLG V1.0 from (state strref, [reply strref or None for no text]) pairs."""
+    state_table = transition_table = b""
+    first = 0
+    for strref, replies in states:
+        state_table += struct.pack("<4I", strref, first, len(replies), 0xFFFFFFFF)
+        for reply in replies:
+            flags = 0x8 if reply is None else 0x9
+            transition_table += struct.pack("<5I8sI", flags, reply or 0, 0, 0, 0, b"", 0)
+        first += len(replies)
+    header_size = gameres.DLG_HEADER.size
+    header = struct.pack(
+        "<4s4s10I", b"DLG ", b"V1.0", len(states), header_size, first, header_size + len(state_table),
+        0, 0, 0, 0, 0, 0,
+    )
+    return header + state_table + transition_table
+
+
+def _game_dir(tmp_path, resources: dict[str, bytes], res_type: int = gameres.TYPE_DLG) -> None:
+    """chitin.key plus data/Dialog.bif holding the given resources (DLG by default)."""
+    names = list(resources)
+    entries_offset = gameres.BIFF_HEADER.size
+    offset = entries_offset + 16 * len(names)
+    table = blob = b""
+    for index, name in enumerate(names):
+        table += struct.pack("<IIIHH", index, offset + len(blob), len(resources[name]), res_type, 0)
+        blob += resources[name]
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "Dialog.bif").write_bytes(
+        struct.pack("<4s4sIII", b"BIFF", b"V1  ", len(names), 0, entries_offset) + table + blob
+    )
+
+    bif_name = b"data\\DIALOG.BIF\0"
+    bif_offset = gameres.KEY_HEADER.size
+    name_offset = bif_offset + 12
+    resource_offset = name_offset + len(bif_name)
+    key = struct.pack("<4s4sIIII", b"KEY ", b"V1  ", 1, len(names), bif_offset, resource_offset)
+    key += struct.pack("<IIHH", len(blob), name_offset, len(bif_name), 0) + bif_name
+    for index, name in enumerate(names):
+        key += struct.pack("<8sHI", name.encode("ascii"), res_type, index)
+    (tmp_path / "CHITIN.KEY").write_bytes(key)
+
+
+def test_game_resources_read_dlg_from_biff_and_override(tmp_path):
+    _game_dir(tmp_path, {"IMOEN2": _dlg_bytes([(1, [2, None]), (3, [])]), "MINSC": _dlg_bytes([(4, [])])})
+    (tmp_path / "override").mkdir()
+    (tmp_path / "override" / "minsc.dlg").write_bytes(_dlg_bytes([(5, [])]))
+    (tmp_path / "dialog.tlk").write_bytes(_tlk_bytes([
+        ("", ""), ("Heya!", "IMOEN15"), ("Imoen!", ""), ("Let's go.", ""), ("Boo?", ""), ("Go for the eyes!", "MINSC01"),
+    ]))
+
+    with gameres.GameResources(tmp_path) as resources, TlkFile(tmp_path / "dialog.tlk") as tlk:
+        assert resources.names(gameres.TYPE_DLG) == ["IMOEN2", "MINSC"]
+        imoen = gameres.parse_dlg(resources.read("imoen2", gameres.TYPE_DLG), "IMOEN2", tlk)
+        minsc = gameres.parse_dlg(resources.read("MINSC", gameres.TYPE_DLG), "MINSC", tlk)
+
+    assert imoen == [
+        Statement("IMOEN2", "SAY", 1, "Heya!", "IMOEN15", "0"),
+        Statement("IMOEN2", "REPLY", 2, "Imoen!", "", "0"),
+        Statement("IMOEN2", "SAY", 3, "Let's go.", "", "1"),
+    ]
+    assert minsc == [Statement("MINSC", "SAY", 5, "Go for the eyes!", "MINSC01", "0")]
+
+
+def test_wav_provider_extracts_caches_and_prefers_exports(tmp_path):
+    game = tmp_path / "game"
+    game.mkdir()
+    _game_dir(game, {"IMOEN01": b"RIFF-imoen01", "IMOEN02": b"RIFF-imoen02", "MINSC01": b"WAVCacm"}, gameres.TYPE_WAV)
+    exports = tmp_path / "BG2 Files" / "WAV Files"
+    exports.mkdir(parents=True)
+    (exports / "imoen02.wav").write_bytes(b"RIFF-exported")
+    (game / "override").mkdir()
+
+    with gameres.WavProvider(game, tmp_path / "BG2 Files", tmp_path / "cache") as wavs:
+        cached = wavs.cache_dir / "IMOEN01.WAV"
+        assert wavs.names("IMOEN*") == ["IMOEN01", "IMOEN02"]
+        assert wavs.path("imoen01.WAV") == cached
+        assert cached.read_bytes() == b"RIFF-imoen01"
+        assert wavs.path("IMOEN02").read_bytes() == b"RIFF-exported"
+        assert wavs.find("JAHEIR01") is None
+        with pytest.raises(ValueError):
+            wavs.find("MINSC01")
+
+    # An override newer than the cached copy is extracted again
+    os.utime(cached, ns=(0, 0))
+    (game / "override" / "IMOEN01.WAV").write_bytes(b"RIFF-override")
+    with gameres.WavProvider(game, None, tmp_path / "cache") as wavs:
+        assert wavs.path("IMOEN01") == cached
+        assert cached.read_bytes() == b"RIFF-override"
+
+    # Clips are cached per game install
+    other = tmp_path / "other"
+    other.mkdir()
+    _game_dir(other, {"IMOEN01": b"RIFF-other"}, gameres.TYPE_WAV)
+    with gameres.WavProvider(other, None, tmp_path / "cache") as wavs:
+        assert wavs.path("IMOEN01").read_bytes() == b"RIFF-other"
+    assert cached.read_bytes() == b"RIFF-override"
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from bg2vo.speakers import SpeakerResolver  # type: ignore[import-not-found]
+
+
+def test_speaker_resolver_exact_prefix_and_aliases(tmp_path):
+    csv_path = tmp_path / "characters.csv"
+    csv_path.write_text(
+        "\ufeffCanonical,Aliases,DLGFiles\n"
+        "Imoen,IMOEN;IMOEN2,BIMOEN2.DLG|IMOEN2.DLG|IMOEN2J.DLG\n"
+        "Mazzy,MAZZY,MAZZY.DLG|MAZZY25J.DLG\n"
+        "HaerDalis,HAERDALI;HAERDA,HAERDALI.DLG\n"
+        "IDRYAD1,DRYAD,IDRYAD1.DLG\n"
+        "DRYAD,DRYAD,DRYAD.DLG\n",
+        encoding="utf-8",
+    )
+    speakers = SpeakerResolver.from_csv(csv_path)
+
+    assert speakers.resolve("BIMOEN2") == "Imoen"
+    assert speakers.resolve("imoen2j.dlg") == "Imoen"
+    assert speakers.resolve("IMOEN2_dlg.csv") == "Imoen"
+    assert speakers.resolve("Imoen") == "Imoen"
+    assert speakers.resolve("MAZZY7.D") == "Mazzy"  # prefix
+    assert speakers.resolve("HAERDALIS") == "HaerDalis"  # longest prefix HAERDALI
+    assert speakers.resolve("DRYAD") == "DRYAD"  # own name beats the shared alias
+    assert speakers.resolve("IDRYAD1") == "IDRYAD1"
+    assert speakers.resolve("GAELAN", "Gaelan") == "Gaelan"
+    assert "GAELAN" not in speakers
+    assert len(SpeakerResolver.from_csv(tmp_path / "missing.csv")) == 0
+
+
+def test_shipped_characters_cover_banter_dlgs():
+    # Names match as prefixes only, so "B" banter files must be listed in DLGFiles
+    speakers = SpeakerResolver.from_csv()
+
+    assert speakers.resolve("BJAHEIRA.D") == "Jaheira"
+    assert speakers.resolve("BJAHEI25.D") == "Jaheira"
+    assert speakers.resolve("BYOSHIMO.D") == "Yoshimo"
+    assert speakers.resolve("BSAREVOK.D") == "Sarevok"
+    assert speakers.resolve("BKELDORN.D") == "Keldorn"
+    assert speakers.resolve("XYOSHIMO.D") is None  # no substring matches
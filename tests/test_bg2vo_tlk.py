@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+import bg2vo.tlk as tlk_mod  # type: ignore[import-not-found]
+
+
+def _tlk_bytes(entries: list[tuple[str, str]]) -> bytes:
+    """Build a TLK V1 file from (text, sound resref) pairs."""
+    table = b""
+    blob = b""
+    for text, sound in entries:
+        flags = (tlk_mod.FLAG_TEXT if text else 0) | (tlk_mod.FLAG_SOUND if sound else 0)
+        encoded = text.encode("cp1252")
+        table += struct.pack("<H8sIIII", flags, sound.encode("ascii"), 0, 0, len(blob), len(encoded))
+        blob += encoded
+    header = struct.pack("<4s4sHII", b"TLK ", b"V1  ", 0, len(entries), 18 + len(table))
+    return header + table + blob
+
+
+def test_tlk_file_decodes_lazily_and_in_bulk(tmp_path):
+    path = tmp_path / "dialog.tlk"
+    path.write_bytes(_tlk_bytes([("<NO TEXT>", ""), ("", ""), ("Heya! It's me, Imoen. ", "IMOEN15"), ("Go for the eyes, Boo!", "")]))
+
+    with tlk_mod.TlkFile(path) as tlk:
+        assert len(tlk) == 4
+        assert tlk[2] == "Heya! It's me, Imoen."
+        assert tlk[1] == ""
+        assert tlk.sound(2) == "IMOEN15"
+        assert tlk.get_many([3, 1, 2, 99, 3]) == {2: "Heya! It's me, Imoen.", 3: "Go for the eyes, Boo!"}
+        with pytest.raises(IndexError):
+            tlk[4]
+
+
+def test_tlk_file_rejects_other_files(tmp_path):
+    path = tmp_path / "dialog.tlk"
+    path.write_bytes(b"KEY V1  " + b"\x00" * 20)
+
+    with pytest.raises(ValueError):
+        tlk_mod.TlkFile(path)
+
+
+def test_tlk_index_caches_by_source_hash(tmp_path):
+    source = tmp_path / "dialog.tlk"
+    source.write_bytes(_tlk_bytes([("", ""), ("Heya! It's me, Imoen.", ""), ("Café", "")]))
+    cache = tmp_path / "cache"
+
+    with tlk_mod.TlkIndex.open(source, cache) as index:
+        assert len(index) == 3
+        assert index[2] == "Café"
+        assert index.get(0) is None
+        assert index.get_many([2, 0, 1, 7]) == {1: "Heya! It's me, Imoen.", 2: "Café"}
+    first = sorted(cache.glob("*.idx"))
+    assert len(first) == 1
+
+    source.write_bytes(_tlk_bytes([("Go for the eyes, Boo!", "")]))
+    with tlk_mod.TlkIndex.open(source, cache) as index:
+        assert index[0] == "Go for the eyes, Boo!"
+    rebuilt = sorted(cache.glob("*.idx"))
+    assert len(rebuilt) == 1 and rebuilt != first
+
+
+def test_tlk_file_patches_and_restores_sounds_in_place(tmp_path):
+    path = tmp_path / "dialog.tlk"
+    original = _tlk_bytes([("Heya!", ""), ("Boo!", "MINSC01"), ("Hm.", "")])
+    path.write_bytes(original)
+
+    with tlk_mod.TlkFile(path, writable=True) as tlk:
+        previous = tlk.set_sounds({0: "oh0", 1: "OH1", 2: ""})
+        # An empty resref leaves a soundless entry alone
+        assert previous == {0: (tlk_mod.FLAG_TEXT, ""), 1: (tlk_mod.FLAG_TEXT | tlk_mod.FLAG_SOUND, "MINSC01")}
+        assert tlk.set_sounds({0: "OH0"}) == {}
+        with pytest.raises(ValueError):
+            tlk.set_sounds({0: "OH1234567"})
+
+    with tlk_mod.TlkFile(path) as tlk:
+        assert (tlk.sound(0), tlk.sound(1), tlk[0]) == ("OH0", "OH1", "Heya!")
+
+    with tlk_mod.TlkFile(path, writable=True) as tlk:
+        assert tlk.set_sounds({1: ""}) == {1: (tlk_mod.FLAG_TEXT | tlk_mod.FLAG_SOUND, "OH1")}
+        assert tlk.entries["flags"][1] == tlk_mod.FLAG_TEXT
+
+    with tlk_mod.TlkFile(path, writable=True) as tlk:
+        tlk.restore(previous)
+    assert path.read_bytes() == original
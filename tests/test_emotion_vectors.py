@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import bg2vo.emotion_vectors as vectors_mod  # type: ignore[import-not-found]
+import bg2vo.emotions as emotions_mod  # type: ignore[import-not-found]
+
+
+def test_blend_keeps_neutral_preset_and_leads_with_the_cue():
+    engine = vectors_mod.EmotionVectorEngine()
+
+    blended, labels = engine.analyze(["Hello there.", "You will die, fool!!"])
+
+    assert labels == ["neutral", "angry"]
+    assert blended[0].tolist() == pytest.approx(emotions_mod.EMOTION_VECTORS["neutral"])
+    assert blended[1].argmax() == 1  # Angry dimension dominates
+    assert blended.max() <= np.float32(emotions_mod.EMOTION_CAP)
+
+
+def test_speaker_weights_shift_the_blend():
+    voices = {"Ilyich": {"ref": "refs/ilyich_ref.wav", "emotion_weights": {"angry": 3.0}}}
+    engine = vectors_mod.EmotionVectorEngine.from_voices(voices)
+    text = ["I hate this place, I am so alone."]
+
+    plain = engine.blend(text, ["Jaheira"])[0]
+    weighted = engine.blend(text, ["Ilyich"])[0]
+
+    assert weighted[1] > plain[1]  # Angry
+    assert weighted[2] < plain[2]  # Sad
+
+
+def test_negative_speaker_weights_stay_in_range():
+    engine = vectors_mod.EmotionVectorEngine({"Sarevok": {"neutral": -1.0}})
+
+    blended = engine.blend(["You will die, fool!!", "Hello there."], ["Sarevok", "Sarevok"])
+
+    assert blended.min() >= 0.0
+    assert blended.max() <= np.float32(emotions_mod.EMOTION_CAP)
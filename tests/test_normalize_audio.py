@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts" / "utils"))
+
+import normalize_audio  # type: ignore[import]  # noqa: E402
+
+RATE = 22050
+OPTIONS = {
+    "trim_threshold_db": -45.0,
+    "trim_pad_ms": 150,
+    "loudness_mode": "rms",
+    "loudness_target": -20.0,
+    "peak_ceiling_db": -1.0,
+}
+
+
+def _line(path: Path, amplitude: float = 2000.0, channels: int = 1) -> np.ndarray:
+    """0.5 s silence, 1 s of 220 Hz tone, 0.5 s silence."""
+    tone = amplitude * np.sin(2 * np.pi * 220 * np.arange(RATE) / RATE)
+    audio = np.concatenate([np.zeros(RATE // 2), tone, np.zeros(RATE // 2)])
+    if channels > 1:
+        audio = np.column_stack([audio * (0.5 + index) for index in range(channels)])
+    data = audio.astype(np.int16)
+    wavfile.write(str(path), RATE, data)
+    return data
+
+
+def _voiced_rms(path: Path) -> float:
+    _, data = wavfile.read(str(path))
+    audio = normalize_audio.to_float32(data)
+    energies, _ = normalize_audio.frame_energies_db(audio.mean(axis=1) if audio.ndim > 1 else audio, RATE)
+    return normalize_audio.voiced_rms_db(energies, OPTIONS["trim_threshold_db"])
+
+
+def test_normalize_file_trims_and_reaches_rms_target(tmp_path):
+    path = tmp_path / "1.wav"
+    _line(path)
+
+    entry = normalize_audio.normalize_file(path, OPTIONS)
+
+    # 500 ms of silence trimmed to 150 ms, to the nearest 10 ms frame
+    assert all(abs(trim - 350) <= normalize_audio.FRAME_MS for trim in entry["trim_ms"])
+    assert not entry["limited"]
+    _, data = wavfile.read(str(path))
+    assert abs(len(data) / RATE * 1000 - (2000 - sum(entry["trim_ms"]))) <= 1  # trim_ms is rounded
+    assert abs(_voiced_rms(path) - OPTIONS["loudness_target"]) < 0.1
+
+
+def test_normalize_file_lufs_mode_and_peak_ceiling(tmp_path):
+    path = tmp_path / "2.wav"
+    _line(path)
+    entry = normalize_audio.normalize_file(path, {**OPTIONS, "loudness_mode": "lufs", "loudness_target": -23.0})
+    _, data = wavfile.read(str(path))
+    assert abs(normalize_audio.integrated_lufs(normalize_audio.to_float32(data), RATE) + 23.0) < 0.1
+    assert entry["output"] != entry["input"]
+
+    # A target far above the ceiling is limited to it
+    entry = normalize_audio.normalize_file(path, {**OPTIONS, "loudness_target": 0.0})
+    _, data = wavfile.read(str(path))
+    assert entry["limited"]
+    assert 20 * np.log10(np.abs(data).max() / 32768) <= OPTIONS["peak_ceiling_db"] + 0.01
+
+
+def test_normalize_file_keeps_stereo_and_limits_every_channel(tmp_path):
+    path = tmp_path / "3.wav"
+    _line(path, amplitude=10000.0, channels=2)
+
+    entry = normalize_audio.normalize_file(path, {**OPTIONS, "loudness_target": 0.0})
+
+    _, data = wavfile.read(str(path))
+    assert data.ndim == 2 and data.shape[1] == 2
+    assert all(abs(trim - 350) <= normalize_audio.FRAME_MS for trim in entry["trim_ms"])
+    # The louder right channel, not the mono mix, sets the ceiling
+    assert entry["limited"]
+    assert 20 * np.log10(np.abs(data).max() / 32768) <= OPTIONS["peak_ceiling_db"] + 0.01
+
+
+def test_normalize_batch_skips_files_already_done(tmp_path):
+    path = tmp_path / "4.wav"
+    _line(path)
+    manifest = normalize_audio.NormalizeManifest(tmp_path / "normalize-manifest.json")
+    jobs = [(path, "Imoen", OPTIONS)]
+
+    counts, by_speaker = normalize_audio.normalize_batch(jobs, workers=1, manifest=manifest)
+    assert counts["normalized"] == 1 and len(by_speaker["Imoen"]) == 1
+    normalized = path.read_bytes()
+
+    reloaded = normalize_audio.NormalizeManifest(tmp_path / "normalize-manifest.json")
+    counts, _ = normalize_audio.normalize_batch(jobs, workers=1, manifest=reloaded)
+    assert counts == {"skip": 1}
+    assert path.read_bytes() == normalized
+
+    # New options re-normalize the file
+    louder = [(path, "Imoen", {**OPTIONS, "loudness_target": -18.0})]
+    counts, _ = normalize_audio.normalize_batch(louder, workers=1, manifest=reloaded)
+    assert counts["normalized"] == 1
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import bg2vo.tokens as tokens_mod  # type: ignore[import-not-found]
+
+
+class _WordTokenizer:
+    fingerprint = "words-v1"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+def test_split_sentences_keeps_ellipses_together():
+    text = "Kha... Khalid? We must go"
+
+    spans = tokens_mod.split_sentences(text)
+
+    assert [text[start:end] for start, end in spans] == ["Kha...", "Khalid?", "We must go"]
+
+
+def test_token_index_reuses_unchanged_lines(tmp_path):
+    index_path = tmp_path / "token-index.json"
+    rows = [
+        {"StrRef": "1", "Text": "<CHARNAME>, wake up! We have to go."},
+        {"StrRef": "2", "Text": "For Boo!"},
+    ]
+    tokenizer = _WordTokenizer()
+
+    index = tokens_mod.TokenIndex(index_path, tokenizer.fingerprint)
+    assert index.update(rows, tokenizer) == (2, 0)
+    index.save()
+
+    reloaded = tokens_mod.TokenIndex(index_path, tokenizer.fingerprint)
+    rows[1] = {"StrRef": "2", "Text": "For Boo! Swords, not words!"}
+    assert reloaded.update(rows, tokenizer) == (1, 1)
+
+    line = reloaded.get(1)
+    assert line is not None
+    assert line.tokens == 6  # "Wake up! We have to go."
+    assert line.sentence_tokens == [2, 4]
+    assert reloaded.total_tokens(["1", "2", "999"]) == 6 + 5
+    assert [hit.strref for hit in reloaded.over_limit(5)] == ["1"]
+
+    assert tokens_mod.TokenIndex(index_path, "other-tokenizer").stale
+
+
+class _Normalizer:
+    def __init__(self):
+        self.calls = 0
+
+    def normalize(self, text):
+        self.calls += 1
+        return text.upper()
+
+
+class _PieceTokenizer:
+    def __init__(self):
+        self.calls = 0
+        self.normalizer = _Normalizer()
+
+    def tokenize(self, text):
+        self.calls += 1
+        return ["▁" + word for word in self.normalizer.normalize(text).split()]
+
+    def convert_tokens_to_ids(self, tokens):
+        return [len(token) for token in tokens]
+
+
+def test_caching_tokenizer_reuses_frontend_output(tmp_path):
+    path = tmp_path / "frontend-cache.jsonl"
+    inner = _PieceTokenizer()
+    normalizer = inner.normalizer
+    cache = tokens_mod.FrontendCache(path, "bpe-v1")
+    tokenizer = tokens_mod.CachingTokenizer(inner, cache)
+
+    tokens = tokenizer.tokenize("hello there")
+    assert tokenizer.tokenize("hello there") == tokens
+    assert tokenizer.convert_tokens_to_ids(tokens) == [6, 6]
+    assert inner.calls == 1
+    assert normalizer.calls == 1
+    cache.save()
+    tokenizer.tokenize("general kenobi")
+    cache.save()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3  # header + appended entries
+
+    reloaded = tokens_mod.FrontendCache(path, "bpe-v1")
+    assert reloaded.get("hello there")["normalized"] == "HELLO THERE"
+    assert reloaded.get("general kenobi")["tokens"] == ["▁GENERAL", "▁KENOBI"]
+    assert len(tokens_mod.FrontendCache(path, "bpe-v2")) == 0